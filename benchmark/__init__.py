@@ -0,0 +1 @@
+"""pytots 性能基准"""
@@ -0,0 +1,78 @@
+"""
+批量转换基准
+
+动态生成一组相互引用的 dataclass 模型（每个模型引用若干个共享的子模型），
+对比逐个调用 `convert_to_ts` 与不同线程数的 `Converter.convert_many`，并校验两者的输出一致。
+在带 GIL 的 CPython 上线程数主要影响调度开销，自由线程构建上才能体现并行加速。
+
+运行：
+    python -m benchmark.bench_batch [--models 2000] [--fields 8] [--workers 1 2 4 8]
+"""
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import make_dataclass
+from typing import List, Optional
+
+from pytots import Converter
+
+
+def make_models(count: int, fields: int, seed: int = 0) -> list[type]:
+    """生成 count 个 dataclass，每个模型的字段随机引用编号更小的模型"""
+    rng = random.Random(seed)
+    models: list[type] = []
+    for i in range(count):
+        spec = []
+        for j in range(fields):
+            if models and rng.random() < 0.5:
+                ref = rng.choice(models)
+                tp = rng.choice([ref, List[ref], Optional[ref], dict[str, ref]])
+            else:
+                tp = rng.choice([int, str, float, bool, List[int], Optional[str]])
+            spec.append((f"f{j}", tp))
+        models.append(make_dataclass(f"Model{i}", spec))
+    return models
+
+
+def bench_loop(models: list[type]) -> tuple[float, str]:
+    converter = Converter()
+    start = time.perf_counter()
+    for model in models:
+        converter.convert_to_ts(model)
+    return time.perf_counter() - start, converter.get_output_ts_str(None)
+
+
+def bench_many(models: list[type], workers: int) -> tuple[float, str, float]:
+    converter = Converter()
+    start = time.perf_counter()
+    results = converter.convert_many(models, workers=workers)
+    elapsed = time.perf_counter() - start
+    slowest = max(r.elapsed for r in results)
+    return elapsed, converter.get_output_ts_str(None), slowest
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=2000)
+    parser.add_argument("--fields", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    models = make_models(args.models, args.fields)
+    baseline, expected = bench_loop(models)
+    print(f"models: {args.models}, fields: {args.fields}, GIL: {'enabled' if gil else 'disabled'}")
+    print(f"{'mode':>12} {'total (ms)':>12} {'speedup':>9} {'slowest root (ms)':>18} {'same':>6}")
+    print(f"{'loop':>12} {baseline * 1000:>12.1f} {1.0:>9.2f} {'-':>18} {'-':>6}")
+    for workers in args.workers:
+        elapsed, output, slowest = bench_many(models, workers)
+        print(
+            f"{f'{workers} threads':>12} {elapsed * 1000:>12.1f} {baseline / elapsed:>9.2f} "
+            f"{slowest * 1000:>18.2f} {str(output == expected):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
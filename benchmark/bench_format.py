@@ -0,0 +1,129 @@
+"""
+格式化基准
+
+在几类输入上测量格式化器的吞吐量（MB/s），对比逐字符的参考实现 `ReferenceTypeScriptFormatter`
+与 `TypeScriptFormatter`（一次性 `format` 及以 64KB 分段 `feed` 的增量格式化），并校验输出逐字节相同：
+
+- realistic: 用 `bench_package` 生成的合成包转换出的未格式化输出
+- long_strings: 很长的字符串字面量，带转义的引号和模板字符串
+- nested_braces: 深层嵌套的对象类型
+- comments: 声明之间穿插包含括号、引号的块注释和行注释
+
+各类输入重复拼接到指定大小。输出是否一致的更全面的检查见 `benchmark.fuzz_format`。
+
+运行：
+    python -m benchmark.bench_format [--size-mb 1 4] [--repeat 3] [--workloads realistic comments] [--no-reference]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark.bench_package import PACKAGE, write_package
+from pytots import Converter
+from pytots.formart import ReferenceTypeScriptFormatter, TypeScriptFormatter
+from pytots.scanner import scan_package
+
+# 增量格式化时每次 feed 的长度
+CHUNK = 64 * 1024
+
+
+def sample_output(modules: int = 20, classes: int = 20) -> str:
+    """转换合成包，返回未格式化的输出"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_package(Path(tmp), modules, classes, 0)
+        sys.path.insert(0, tmp)
+        try:
+            converter = Converter()
+            for tp in scan_package([PACKAGE]):
+                converter.convert_to_ts(tp)
+            return converter.get_output_ts_str()
+        finally:
+            sys.path.remove(tmp)
+            for name in [m for m in sys.modules if m.startswith(PACKAGE)]:
+                del sys.modules[name]
+
+
+def long_strings() -> str:
+    text = "lorem ipsum; { dolor } // sit amet /* " * 250
+    return (
+        f"type Message = '{text}\\'{text}';\n"
+        f'type Quoted = "{text}\\"{text}";\n'
+        f"type Template = `${{prefix}}{text}`;\n"
+    )
+
+
+def nested_braces(depth: int = 200) -> str:
+    code = "number"
+    for i in range(depth):
+        code = f"{{ level{i}: {code}; tags: Array<string>; }}"
+    return f"type Deep = {code};\n"
+
+
+def comments() -> str:
+    return "".join(
+        f"/** 第 {i} 个模型 {{ {i} }} 'quote' */\n"
+        f"type Model{i} = {{\n  // 主键 ; {{ \"x\n  id: number; /* 行内 */\n  name?: string;\n}}\n"
+        for i in range(200)
+    )
+
+
+WORKLOADS = {
+    "realistic": sample_output,
+    "long_strings": long_strings,
+    "nested_braces": nested_braces,
+    "comments": comments,
+}
+
+
+def best_of(repeat: int, func, *args) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def stream(code: str) -> str:
+    formatter = TypeScriptFormatter()
+    chunks = [formatter.feed(code[i:i + CHUNK]) for i in range(0, len(code), CHUNK)]
+    return "".join(chunks) + formatter.finish()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--no-reference", action="store_true", help="不运行参考实现（很慢），只测量 TypeScriptFormatter")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'workload':>14} {'size (MB)':>10} {'reference':>10} {'format':>10} {'feed':>10} "
+        f"{'speedup':>8} {'same':>6}   (MB/s)"
+    )
+    for workload in args.workloads:
+        sample = WORKLOADS[workload]()
+        for size in args.size_mb:
+            code = sample * max(1, int(size * 2**20 / len(sample)))
+            mb = len(code) / 2**20
+            new_time, output = best_of(args.repeat, lambda c: TypeScriptFormatter().format(c), code)
+            feed_time, streamed = best_of(args.repeat, stream, code)
+            same = streamed == output
+            if args.no_reference:
+                reference, speedup = "-", "-"
+            else:
+                ref_time, expected = best_of(args.repeat, lambda c: ReferenceTypeScriptFormatter().format(c), code)
+                reference, speedup = f"{mb / ref_time:.2f}", f"{ref_time / new_time:.1f}"
+                same = same and output == expected
+            print(
+                f"{workload:>14} {mb:>10.1f} {reference:>10} {mb / new_time:>10.2f} {mb / feed_time:>10.2f} "
+                f"{speedup:>8} {str(same):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
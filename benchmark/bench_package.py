@@ -0,0 +1,103 @@
+"""
+整包多进程转换基准
+
+在临时目录中生成一个合成的包：每个模块定义若干 dataclass，字段随机引用本模块或之前模块中的类型；
+可选地在模块导入时执行一段计算，模拟真实项目中较重的模块级初始化。
+对比 `convert_package` 在 1 个与 N 个工作进程下的耗时，并校验输出一致。
+
+各模块互相导入，每个工作进程都需要导入所转换模块依赖的模块。`--preload` 时在父进程中预先导入整个包，
+工作进程通过 fork 继承，只承担转换工作。
+
+运行：
+    python -m benchmark.bench_package [--modules 300] [--classes 20] [--import-cost 5] [--workers 1 2 4 8] [--preload]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pytots.parallel import convert_package, render_declarations
+
+PACKAGE = "pytots_bench_pkg"
+
+
+def write_package(root: Path, modules: int, classes: int, import_cost_ms: float, seed: int = 0) -> None:
+    """生成合成包"""
+    rng = random.Random(seed)
+    package = root / PACKAGE
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    defined: list[tuple[int, str]] = []
+    for m in range(modules):
+        lines = [
+            "import time",
+            "from dataclasses import dataclass",
+            "from typing import Dict, List, Optional",
+            "",
+            f"_end = time.perf_counter() + {import_cost_ms / 1000!r}",
+            "while time.perf_counter() < _end:",
+            "    pass",
+            "",
+        ]
+        imports: set[tuple[int, str]] = set()
+        local: list[str] = []
+        for c in range(classes):
+            name = f"M{m}C{c}"
+            lines += ["", "@dataclass", f"class {name}:"]
+            for f in range(6):
+                if (local or defined) and rng.random() < 0.4:
+                    if local and (not defined or rng.random() < 0.5):
+                        ref = rng.choice(local)
+                    else:
+                        mod, ref = rng.choice(defined)
+                        imports.add((mod, ref))
+                    tp = rng.choice([ref, f"List[{ref}]", f"Optional[{ref}]", f"Dict[str, {ref}]"])
+                else:
+                    tp = rng.choice(["int", "str", "float", "bool", "List[int]", "Optional[str]"])
+                lines.append(f"    f{f}: {tp}")
+            local.append(name)
+        header = [f"from .mod{mod} import {ref}" for mod, ref in sorted(imports)]
+        (package / f"mod{m}.py").write_text("\n".join(header + lines) + "\n", encoding="utf-8")
+        defined.extend((m, name) for name in local)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=300)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--import-cost", type=float, default=5.0, help="每个模块导入时的额外耗时（毫秒）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--preload", action="store_true", help="在父进程中预先导入整个包")
+    args = parser.parse_args(argv)
+    preload = [f"{PACKAGE}.mod{m}" for m in range(args.modules)] if args.preload else []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_package(Path(tmp), args.modules, args.classes, args.import_cost)
+        sys.path.insert(0, tmp)
+        print(
+            f"modules: {args.modules}, classes/module: {args.classes}, "
+            f"import cost: {args.import_cost}ms, preload: {args.preload}"
+        )
+        print(f"{'workers':>8} {'total (s)':>10} {'speedup':>9} {'declarations':>13} {'same':>6}")
+        baseline = expected = None
+        for workers in args.workers:
+            # 每轮都清除已导入的合成模块，使各轮都包含导入耗时
+            for name in [m for m in sys.modules if m.startswith(PACKAGE)]:
+                del sys.modules[name]
+            start = time.perf_counter()
+            records = convert_package([PACKAGE], workers=workers, preload=preload)
+            elapsed = time.perf_counter() - start
+            output = render_declarations(records, None)
+            if baseline is None:
+                baseline, expected = elapsed, output
+            print(
+                f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>9.2f} "
+                f"{len(records):>13} {str(output == expected):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
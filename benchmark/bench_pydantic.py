@@ -0,0 +1,68 @@
+"""
+pydantic 模型转换基准
+
+用 `benchmark.corpus.pydantic_models` 生成的模型族（继承若干基类、字段随机引用之前的模型）对比
+`PydanticPlugin` 按字段注解转换与按 core schema 转换（`{"core_schema": True}`），并校验两者的输出一致：
+
+- cold: 每次运行重新生成模型，包括首次解析模型的 core schema
+- warm: 同一组模型在新会话中再次转换，core schema 的解析结果已缓存
+
+运行：
+    python -m benchmark.bench_pydantic [--models 1500] [--repeat 3] [--seed 0]
+"""
+
+import argparse
+import time
+
+from benchmark.corpus import pydantic_models
+from pytots import Converter
+from pytots.plugin.plus import PydanticPlugin
+
+MODES = {
+    "annotations": {},
+    "core_schema": {"core_schema": True},
+}
+
+
+def convert(models: list[type], options: dict) -> tuple[float, str]:
+    converter = Converter(plugins=())
+    converter.plugins = [PydanticPlugin(options)]
+    start = time.perf_counter()
+    for model in models:
+        converter.convert_to_ts(model)
+    return time.perf_counter() - start, converter.get_output_ts_str(None)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scale = args.models / 500
+    cold = {mode: float("inf") for mode in MODES}
+    warm = dict(cold)
+    outputs = {}
+    for _ in range(args.repeat):
+        for mode, options in MODES.items():
+            models = pydantic_models(scale, args.seed).roots
+            elapsed, _ = convert(models, options)
+            cold[mode] = min(cold[mode], elapsed)
+            elapsed, outputs[mode] = convert(models, options)
+            warm[mode] = min(warm[mode], elapsed)
+
+    print(f"{len(models)} 个模型，取 {args.repeat} 次中最快的一次")
+    print(f"{'mode':>12} {'cold (ms)':>10} {'warm (ms)':>10}")
+    for mode in MODES:
+        print(f"{mode:>12} {cold[mode] * 1000:>10.1f} {warm[mode] * 1000:>10.1f}")
+    print(
+        f"{'speedup':>12} {cold['annotations'] / cold['core_schema']:>10.2f} "
+        f"{warm['annotations'] / warm['core_schema']:>10.2f}"
+    )
+    same = outputs["annotations"] == outputs["core_schema"]
+    print(f"{'✅' if same else '❌'} 两种方式的输出{'一致' if same else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
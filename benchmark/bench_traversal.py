@@ -0,0 +1,73 @@
+"""
+类型表达式遍历基准
+
+构造 `list[dict[str, list[dict[str, ...]]]]` 形式的深层嵌套表达式，测量 `convert_to_ts` 的吞吐量。
+每层嵌套包含两个复合类型节点，深度 1000 即 2000 层类型参数，超过默认的递归深度限制。
+
+运行：
+    python -m benchmark.bench_traversal [--depths 10 100 1000 5000] [--repeat 5]
+"""
+
+import argparse
+import sys
+import time
+
+from pytots import convert_to_ts, reset_store
+
+
+def nested_chain(depth: int):
+    """构造深度为 depth 的 `list[dict[str, ...]]` 嵌套表达式"""
+    tp = int
+    for _ in range(depth):
+        tp = list[dict[str, tp]]
+    return tp
+
+
+def bench(depth: int, repeat: int) -> dict:
+    """
+    cold: 每次构造新的表达式对象，缓存无法命中
+    warm: 重复转换同一个表达式对象，命中转换缓存
+    """
+    nodes = depth * 3 + 1
+    cold = []
+    for _ in range(repeat):
+        tp = nested_chain(depth)
+        reset_store()
+        start = time.perf_counter()
+        convert_to_ts(tp)
+        cold.append(time.perf_counter() - start)
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert_to_ts(tp)
+        warm.append(time.perf_counter() - start)
+
+    best = min(cold)
+    return {
+        "depth": depth,
+        "nodes": nodes,
+        "cold_s": best,
+        "nodes_per_s": nodes / best,
+        "warm_s": min(warm),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"recursion limit: {sys.getrecursionlimit()}")
+    print(f"{'depth':>8} {'nodes':>8} {'cold (ms)':>12} {'nodes/s':>12} {'warm (ms)':>12}")
+    for depth in args.depths:
+        r = bench(depth, args.repeat)
+        print(
+            f"{r['depth']:>8} {r['nodes']:>8} {r['cold_s'] * 1000:>12.2f} "
+            f"{r['nodes_per_s']:>12.0f} {r['warm_s'] * 1000:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
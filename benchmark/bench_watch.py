@@ -0,0 +1,54 @@
+"""
+监视模式增量更新基准
+
+使用 `bench_package` 生成的合成包，完整转换一次后修改其中一个模块，
+测量 `Watcher.poll` 重新加载、重新转换并写出文件的耗时，并与完整转换对比。
+
+运行：
+    python -m benchmark.bench_watch [--modules 100] [--classes 20] [--edits 5] [--format]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark.bench_package import PACKAGE, write_package
+from pytots.watch import Watcher
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=100)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=5, help="依次修改的模块数")
+    parser.add_argument("--format", action="store_true", help="格式化输出")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_package(Path(tmp), args.modules, args.classes, 0)
+        sys.path.insert(0, tmp)
+        watcher = Watcher([PACKAGE], os.path.join(tmp, "out.d.ts"), None, args.format)
+        start = time.perf_counter()
+        watcher.build()
+        print(f"models: {args.modules * args.classes}, full build: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        print(f"{'module':>10} {'reloaded':>9} {'poll (ms)':>10}")
+        for i in range(args.edits):
+            # 从包的末尾往前修改，越靠前的模块被引用得越多
+            m = args.modules - 1 - i * max(1, args.modules // args.edits)
+            path = Path(tmp) / PACKAGE / f"mod{m}.py"
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"\nEDIT_{i} = {i}\n")
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            start = time.perf_counter()
+            reloaded = watcher.poll()
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{'mod' + str(m):>10} {len(reloaded):>9} {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
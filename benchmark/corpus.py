@@ -0,0 +1,198 @@
+"""
+合成模型语料
+
+每个生成器按 `scale`（1 为默认规模）动态构造一组类型，覆盖转换中开销各不相同的场景：
+超宽的 TypedDict、深层嵌套的容器、`QueryResult[T]` 形式的泛型继承链、很大的枚举和 Literal、
+相互递归的 dataclass，以及 pydantic / SQLModel 的模型族（pydantic 模型族另按 core schema 转换一次）。
+生成的类型只依赖随机种子，同一规模下每次运行的语料相同，结果可以互相比较。
+
+pydantic 和 SQLModel 是可选依赖，未安装时对应的语料不可用（见 `available`）。
+"""
+
+import enum
+import importlib.util
+import random
+import sys
+import types
+from dataclasses import make_dataclass
+from typing import Callable, Dict, Generic, List, Literal, NamedTuple, Optional, TypedDict, TypeVar
+
+from pytots.plugin import Plugin
+
+
+class Corpus(NamedTuple):
+    """一份语料：待转换的根类型，以及转换时需要的插件（为 None 时使用内置插件）"""
+
+    name: str
+    roots: list
+    plugins: list[Plugin] | None = None
+
+
+def _size(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+def wide_typeddict(scale: float = 1.0) -> Corpus:
+    """一个有 10000 个字段的 TypedDict，字段类型在若干基本类型和容器之间轮换"""
+    kinds = [int, str, float, bool, Optional[str], List[int], Dict[str, float]]
+    fields = {f"field_{i}": kinds[i % len(kinds)] for i in range(_size(10000, scale))}
+    return Corpus("wide_typeddict", [TypedDict("WideRecord", fields)])
+
+
+def deep_nesting(scale: float = 1.0) -> Corpus:
+    """`list[dict[str, Optional[...]]]` 形式的深层嵌套表达式，以及逐层包裹上一个模型的 dataclass 链"""
+    tp = int
+    for _ in range(_size(500, scale)):
+        tp = list[dict[str, Optional[tp]]]
+    models: list[type] = []
+    for i in range(_size(200, scale)):
+        inner = models[-1] if models else str
+        models.append(make_dataclass(f"Level{i}", [("value", List[Optional[inner]]), ("depth", int)]))
+    # 只转换最外层的模型，嵌套的声明由转换过程逐层生成
+    return Corpus("deep_nesting", [tp, models[-1]])
+
+
+def generic_chain(scale: float = 1.0) -> Corpus:
+    """
+    泛型基类 `QueryResult[T]` 的继承链：每一层以新的条目类型参数化上一层，
+    `QueryResult0[T]` ← `QueryResult1(QueryResult0[Item1])[T]` ← ...
+    """
+    T = TypeVar("T")
+    roots: list = []
+    base = make_dataclass("QueryResult0", [("data", List[T]), ("total", int)], bases=(Generic[T],))
+    for i in range(1, _size(150, scale) + 1):
+        item = TypedDict(f"Item{i}", {"id": int, "name": str, "tags": List[str]})
+        base = make_dataclass(
+            f"QueryResult{i}",
+            [(f"extra{i}", Optional[T]), (f"page{i}", int)],
+            bases=(base[item], Generic[T]),
+        )
+        roots.append(base[item])
+    return Corpus("generic_chain", roots)
+
+
+def large_enums(scale: float = 1.0) -> Corpus:
+    """成员很多的字符串 / 整数枚举，以及很长的 Literal"""
+    count = _size(2000, scale)
+    roots: list = [
+        enum.Enum("Status", {f"STATUS_{i}": f"status-{i}" for i in range(count)}),
+        enum.IntEnum("Code", {f"CODE_{i}": i for i in range(count)}),
+        Literal[tuple(f"value-{i}" for i in range(count))],
+    ]
+    record = make_dataclass(
+        "Tagged",
+        [(f"tag{i}", Literal[tuple(f"t{i}-{j}" for j in range(20))]) for i in range(_size(200, scale))],
+    )
+    return Corpus("large_enums", [*roots, record])
+
+
+def recursive_dataclasses(scale: float = 1.0, seed: int = 0, group: int = 10) -> Corpus:
+    """
+    相互递归的 dataclass：每 group 个模型为一组，字段以字符串前向引用同组的任意模型（包括自身）
+    或之前各组的模型，需要通过延迟解析的前向引用打破循环。
+    声明之间经由插件递归转换，环只出现在组内，按组的顺序转换时递归深度不随模型数增长
+    """
+    rng = random.Random(seed)
+    count = _size(500, scale)
+    names = [f"Node{i}" for i in range(count)]
+    # 前向引用在模型所在模块的命名空间中解析，每次生成一个独立的模块
+    module = types.ModuleType(f"{__name__}._recursive_{count}_{seed}")
+    module.__dict__.update(List=List, Optional=Optional, Dict=Dict)
+    sys.modules[module.__name__] = module
+    for i, name in enumerate(names):
+        end = min(count, (i // group + 1) * group)
+        spec = []
+        for j in range(6):
+            ref = names[rng.randrange(end)]
+            tp = rng.choice([ref, f"List[{ref}]", f"Optional[{ref}]", f"Dict[str, {ref}]", "int", "str"])
+            spec.append((f"f{j}", tp))
+        setattr(module, name, make_dataclass(name, spec, namespace={"__module__": module.__name__}))
+    return Corpus("recursive_dataclasses", [getattr(module, name) for name in names])
+
+
+def pydantic_models(scale: float = 1.0, seed: int = 0) -> Corpus:
+    """继承自若干个基类、字段随机引用之前模型的 pydantic 模型族"""
+    from pydantic import BaseModel, Field, create_model
+
+    from pytots.plugin.plus import PydanticPlugin
+
+    rng = random.Random(seed)
+    bases = [
+        create_model("Timestamped", created_at=(str, ...), updated_at=(Optional[str], None)),
+        create_model("Owned", owner_id=(int, ...)),
+    ]
+    models: list[type] = []
+    for i in range(_size(500, scale)):
+        fields: dict = {}
+        for j in range(8):
+            if models and rng.random() < 0.4:
+                ref = rng.choice(models)
+                tp = rng.choice([ref, List[ref], Optional[ref], Dict[str, ref]])
+            else:
+                tp = rng.choice([int, str, float, bool, List[str], Optional[int]])
+            fields[f"f{j}"] = (tp, Field(default=None, description=f"field {j}")) if rng.random() < 0.3 else (tp, ...)
+        models.append(create_model(f"PModel{i}", __base__=rng.choice([BaseModel, *bases]), **fields))
+    return Corpus("pydantic_models", models, [PydanticPlugin()])
+
+
+def pydantic_core_schema(scale: float = 1.0, seed: int = 0) -> Corpus:
+    """与 pydantic_models 相同的模型族，按模型的 core schema 转换（`PydanticPlugin({"core_schema": True})`）"""
+    from pytots.plugin.plus import PydanticPlugin
+
+    corpus = pydantic_models(scale, seed)
+    return Corpus("pydantic_core_schema", corpus.roots, [PydanticPlugin({"core_schema": True})])
+
+
+def sqlmodel_models(scale: float = 1.0, seed: int = 0) -> Corpus:
+    """带主键、外键和索引字段的 SQLModel 表模型族"""
+    from sqlmodel import Field, SQLModel
+
+    from pytots.plugin.plus import PydanticPlugin, SqlModelPlugin
+
+    rng = random.Random(seed)
+    models: list[type] = []
+    # 表名带上规模和种子，同一进程中多次生成时不会在 SQLModel 的元数据中重复注册
+    suffix = f"{int(scale * 1000)}_{seed}_{random.getrandbits(32)}"
+    for i in range(_size(200, scale)):
+        annotations: dict = {"id": Optional[int]}
+        namespace: dict = {"id": Field(default=None, primary_key=True), "__tablename__": f"t{i}_{suffix}"}
+        for j in range(6):
+            name = f"c{j}"
+            if models and rng.random() < 0.3:
+                annotations[name] = Optional[int]
+                namespace[name] = Field(default=None, foreign_key=f"{rng.choice(models).__tablename__}.id")
+            else:
+                annotations[name] = rng.choice([str, int, float, bool, Optional[str]])
+                namespace[name] = Field(index=rng.random() < 0.2)
+        namespace["__annotations__"] = annotations
+        models.append(type(SQLModel)(f"Table{i}", (SQLModel,), namespace, table=True))
+    return Corpus("sqlmodel_models", models, [SqlModelPlugin(), PydanticPlugin()])
+
+
+# 语料名 → 生成器
+CORPORA: dict[str, Callable[..., Corpus]] = {
+    "wide_typeddict": wide_typeddict,
+    "deep_nesting": deep_nesting,
+    "generic_chain": generic_chain,
+    "large_enums": large_enums,
+    "recursive_dataclasses": recursive_dataclasses,
+    "pydantic_models": pydantic_models,
+    "pydantic_core_schema": pydantic_core_schema,
+    "sqlmodel_models": sqlmodel_models,
+}
+
+# 语料依赖的可选包
+REQUIRES = {
+    "pydantic_models": "pydantic",
+    "pydantic_core_schema": "pydantic",
+    "sqlmodel_models": "sqlmodel",
+}
+
+
+def available() -> list[str]:
+    """当前环境中可以生成的语料名"""
+    return [
+        name
+        for name in CORPORA
+        if name not in REQUIRES or importlib.util.find_spec(REQUIRES[name]) is not None
+    ]
@@ -0,0 +1,214 @@
+"""
+格式化器差分模糊测试
+
+随机生成代码，对比待测的格式化器与逐字符的参考实现 `ReferenceTypeScriptFormatter` 的输出，
+包括一次性 `format` 和以随机长度分段 `feed` 后 `finish` 的增量输出。发现不一致时把输入缩减到
+仍然不一致的最小片段再报告，便于直接写成回归用例。
+
+输入有三类：
+- soup: 标点、括号、引号、注释符号和空白随机拼接，覆盖未闭合、错位等各种边界情况
+- structured: 按 TypeScript 声明的结构生成的代码，类型中嵌套对象、联合、泛型、字符串和注释
+- mutated: 对 structured 的结果做随机删除、复制和插入，得到接近真实但结构被破坏的代码
+
+优化格式化器时，用 `--candidate 模块:类名` 指定新的实现，它需要与 `TypeScriptFormatter` 一样
+提供无参构造以及 `format`、`feed` 和 `finish` 方法。
+
+运行：
+    python -m benchmark.fuzz_format [--iterations 20000] [--seed 0] [--candidate pytots.formart:TypeScriptFormatter]
+"""
+
+import argparse
+import importlib
+import random
+import sys
+import time
+from typing import Callable, NamedTuple
+
+from pytots.formart import ReferenceTypeScriptFormatter, TypeScriptFormatter
+
+# soup 输入的片段：格式化器特殊处理的每一种字符和多字符记号
+PIECES = list("a_1 \t\n{}();,=?:|&<>[]+-*%/'\"`\\") + ["//", "/*", "*/", "=>", "x y", "if", " ", "\r\n"]
+
+NAMES = ["id", "name", "items", "data_1", "名字", "$ref", "T", "U"]
+BASIC = ["number", "string", "boolean", "null", "undefined", "any", "never", "unknown"]
+COMMENTS = ["/* c */", "/** doc { } */", "// line ; {\n", "/* 'quote */", "//\n"]
+STRINGS = ["'a'", "'it\\'s'", '"x;y"', "`t ${a}`", "'{'", "'//'", "'/*'", "''"]
+
+
+class Mismatch(NamedTuple):
+    """不一致的用例：缩减后的输入、方式（format 或 feed 的分段长度）及两边的输出"""
+
+    code: str
+    mode: str
+    expected: str
+    actual: str
+
+
+def soup(rng: random.Random) -> str:
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 80)))
+
+
+def _type(rng: random.Random, depth: int) -> str:
+    kind = rng.randrange(8 if depth < 4 else 3)
+    if kind == 0:
+        return rng.choice(BASIC)
+    if kind == 1:
+        return rng.choice(STRINGS)
+    if kind == 2:
+        return rng.choice(NAMES[-2:]) + rng.choice(["", "[]"])
+    if kind == 3:
+        return " | ".join(_type(rng, depth + 1) for _ in range(rng.randint(2, 4)))
+    if kind == 4:
+        args = ", ".join(_type(rng, depth + 1) for _ in range(rng.randint(1, 2)))
+        return f"{rng.choice(['Array', 'Record', 'Promise', 'Map'])}<{args}>"
+    if kind == 5:
+        return "{ " + _members(rng, depth + 1) + " }"
+    if kind == 6:
+        params = ", ".join(f"{rng.choice(NAMES)}: {_type(rng, depth + 1)}" for _ in range(rng.randint(0, 2)))
+        return f"({params}) => {_type(rng, depth + 1)}"
+    return f"[{', '.join(_type(rng, depth + 1) for _ in range(rng.randint(1, 3)))}]"
+
+
+def _members(rng: random.Random, depth: int) -> str:
+    members = []
+    for _ in range(rng.randint(0, 4)):
+        if rng.random() < 0.15:
+            members.append(rng.choice(COMMENTS))
+        optional = "?" if rng.random() < 0.3 else ""
+        members.append(f"{rng.choice(NAMES)}{optional}: {_type(rng, depth)};")
+    return rng.choice(["\n  ", " ", ""]).join(members)
+
+
+def structured(rng: random.Random) -> str:
+    declarations = []
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.randrange(5)
+        name = rng.choice(["User", "Page", "Color", "f"])
+        if kind == 0:
+            declarations.append(f"type {name}<T> = {_type(rng, 0)};")
+        elif kind == 1:
+            declarations.append(f"interface {name} extends Base {{\n  {_members(rng, 0)}\n}}")
+        elif kind == 2:
+            members = ",\n  ".join(f"{n.upper()} = {rng.choice(STRINGS[:3] + ['1', '-2'])}" for n in NAMES[:rng.randint(0, 4)])
+            declarations.append(f"enum {name} {{\n  {members},\n}}")
+        elif kind == 3:
+            params = ", ".join(f"{n}{rng.choice(['', '?'])}: {_type(rng, 1)}" for n in NAMES[:rng.randint(0, 3)])
+            declarations.append(f"declare function {name}({params}): {_type(rng, 1)};")
+        else:
+            declarations.append(rng.choice(COMMENTS))
+    code = rng.choice(["\n  ", "\n", " "]).join(declarations)
+    if rng.random() < 0.3:
+        code = f"declare namespace NS {{\n  {code}\n}}"
+    return code
+
+
+def mutated(rng: random.Random) -> str:
+    code = structured(rng)
+    for _ in range(rng.randint(1, 4)):
+        i, j = sorted(rng.randrange(len(code) + 1) for _ in range(2))
+        op = rng.randrange(3)
+        if op == 0:
+            code = code[:i] + code[j:]
+        elif op == 1:
+            code = code[:j] + code[i:j] + code[j:]
+        else:
+            code = code[:i] + rng.choice(PIECES) + code[i:]
+    return code
+
+
+GENERATORS: dict[str, Callable[[random.Random], str]] = {
+    "soup": soup,
+    "structured": structured,
+    "mutated": mutated,
+}
+
+
+def _feed(formatter, code: str, size: int) -> str:
+    chunks = [formatter.feed(code[i:i + size]) for i in range(0, len(code), size)]
+    return "".join(chunks) + formatter.finish()
+
+
+def check(candidate: Callable, code: str, sizes: tuple[int, ...] = ()) -> Mismatch | None:
+    """对比一段输入在 format 和按 sizes 分段 feed 时的输出，返回第一个不一致"""
+    expected = ReferenceTypeScriptFormatter().format(code)
+    actual = candidate().format(code)
+    if actual != expected:
+        return Mismatch(code, "format", expected, actual)
+    for size in sizes:
+        actual = _feed(candidate(), code, size)
+        if actual != expected:
+            return Mismatch(code, f"feed({size})", expected, actual)
+    return None
+
+
+def shrink(candidate: Callable, mismatch: Mismatch) -> Mismatch:
+    """逐步删除输入中的片段（从大到小），直到删除任何一个字符都不再不一致"""
+    sizes = (int(mismatch.mode[5:-1]),) if mismatch.mode.startswith("feed") else ()
+    code = mismatch.code
+    step = max(1, len(code) // 2)
+    while True:
+        i = 0
+        while i < len(code):
+            trial = code[:i] + code[i + step:]
+            if check(candidate, trial, sizes) is not None:
+                code = trial
+            else:
+                i += step
+        if step == 1:
+            break
+        step = max(1, step // 2)
+    return check(candidate, code, sizes) or mismatch
+
+
+def fuzz(
+    candidate: Callable = TypeScriptFormatter,
+    iterations: int = 20000,
+    seed: int = 0,
+    generators: list[str] | None = None,
+    max_failures: int = 5,
+) -> list[Mismatch]:
+    """运行模糊测试，返回（缩减后的）不一致用例，最多 max_failures 个"""
+    rng = random.Random(seed)
+    names = generators or list(GENERATORS)
+    failures: list[Mismatch] = []
+    for _ in range(iterations):
+        code = GENERATORS[rng.choice(names)](rng)
+        mismatch = check(candidate, code, (rng.randint(1, 8), rng.randint(9, 64)))
+        if mismatch is not None:
+            failures.append(shrink(candidate, mismatch))
+            if len(failures) >= max_failures:
+                break
+    return failures
+
+
+def load(spec: str) -> Callable:
+    """按 `模块:类名` 导入格式化器"""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS))
+    parser.add_argument("--candidate", default="pytots.formart:TypeScriptFormatter", help="待测的格式化器，模块:类名")
+    parser.add_argument("--max-failures", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    candidate = load(args.candidate)
+    start = time.perf_counter()
+    failures = fuzz(candidate, args.iterations, args.seed, args.generators, args.max_failures)
+    elapsed = time.perf_counter() - start
+    for mismatch in failures:
+        print(f"❌ {mismatch.mode}: {mismatch.code!r}")
+        print(f"   expected: {mismatch.expected!r}")
+        print(f"   actual:   {mismatch.actual!r}")
+    if failures:
+        return 1
+    print(f"✅ {args.candidate} 与参考实现在 {args.iterations} 个输入上一致（{elapsed:.1f}s）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+转换吞吐量基准套件
+
+对 `benchmark.corpus` 中的每份语料分别测量（均取多次运行中最快的一次）：
+
+- convert: 新会话中对全部根类型调用 `convert_to_ts`
+- output: `get_output_ts_str` 未格式化的输出
+- output_format: `get_output_ts_str(format=True)`，每次运行前清空格式化缓存和 IR 片段的缓存
+- formatter: `TypeScriptFormatter().format` 格式化未格式化的输出
+
+结果写为 JSON，`compare` 与保存的基线逐项对比，耗时增加超过阈值时以非零状态码退出，可直接用于 CI。
+
+运行：
+    python -m benchmark.suite run [--scale 1] [--repeat 3] [--corpus wide_typeddict ...] [-o results.json] [--baseline baseline.json]
+    python -m benchmark.suite compare baseline.json results.json [--threshold 0.1] [--min-ms 1]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+from benchmark.corpus import CORPORA, Corpus, available
+from pytots import Converter
+from pytots.formart import TypeScriptFormatter
+
+# 结果文件的格式版本，格式不兼容时 compare 拒绝比较
+RESULT_VERSION = 1
+
+# 参与回归判断的耗时指标（秒）
+METRICS = ("convert_s", "output_s", "output_format_s", "formatter_s")
+
+# 两边都短于该值（毫秒）的指标只受计时噪声影响，不判定为回退
+MIN_MS = 1.0
+
+
+def new_converter(corpus: Corpus) -> Converter:
+    """为语料创建新会话，复用语料中的插件实例（不重复注册）"""
+    if corpus.plugins is None:
+        return Converter()
+    converter = Converter(plugins=())
+    converter.plugins = list(corpus.plugins)
+    return converter
+
+
+def best_of(repeat: int, func) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_corpus(corpus: Corpus, repeat: int) -> dict:
+    """测量一份语料，返回各指标的耗时及输出规模"""
+
+    def convert() -> Converter:
+        converter = new_converter(corpus)
+        for root in corpus.roots:
+            converter.convert_to_ts(root)
+        return converter
+
+    convert_s, converter = best_of(repeat, convert)
+    output_s, output = best_of(repeat, lambda: converter.get_output_ts_str(None))
+
+    def output_format() -> str:
+        converter.format_cache.clear()
+        return converter.get_output_ts_str(None, True)
+
+    output_format_s, _ = best_of(repeat, output_format)
+    formatter_s, _ = best_of(repeat, lambda: TypeScriptFormatter().format(output))
+    return {
+        "roots": len(corpus.roots),
+        "declarations": len(converter.store.declaration_index),
+        "output_chars": len(output),
+        "convert_s": convert_s,
+        "output_s": output_s,
+        "output_format_s": output_format_s,
+        "formatter_s": formatter_s,
+        "formatter_mb_s": len(output) / 2**20 / formatter_s,
+    }
+
+
+def run(names: list[str], scale: float, repeat: int) -> dict:
+    """运行基准，返回可写为 JSON 的结果"""
+    try:
+        pytots_version = version("pytots")
+    except PackageNotFoundError:
+        pytots_version = None
+    results = {}
+    for name in names:
+        corpus = CORPORA[name](scale)
+        results[name] = result = bench_corpus(corpus, repeat)
+        print(
+            f"{name:>22} {result['declarations']:>8} {result['convert_s'] * 1000:>12.1f} "
+            f"{result['output_s'] * 1000:>10.1f} {result['output_format_s'] * 1000:>12.1f} "
+            f"{result['formatter_s'] * 1000:>14.1f}"
+        )
+    return {
+        "version": RESULT_VERSION,
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "pytots": pytots_version,
+            "scale": scale,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float = MIN_MS) -> list[str]:
+    """
+    逐项对比两份结果，打印对比表，返回耗时增加超过 threshold（相对比例）的指标，两边都短于 min_ms 的指标除外。
+    两边的规模不同或语料的输出规模不同时只打印警告，这样的数据不可比
+    """
+    for data in (baseline, current):
+        if data.get("version") != RESULT_VERSION:
+            raise ValueError(f"不支持的结果格式版本：{data.get('version')!r}")
+    if baseline["meta"]["scale"] != current["meta"]["scale"]:
+        print(f"⚠️ 规模不同：基线 {baseline['meta']['scale']}，当前 {current['meta']['scale']}")
+
+    regressions = []
+    print(f"{'corpus':>22} {'metric':>16} {'baseline (ms)':>14} {'current (ms)':>13} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:>22} {'(new)':>16}")
+            continue
+        if base["output_chars"] != result["output_chars"]:
+            print(f"⚠️ {name}: 输出规模不同（{base['output_chars']} → {result['output_chars']}）")
+        for metric in METRICS:
+            change = result[metric] / base[metric] - 1
+            significant = max(result[metric], base[metric]) * 1000 >= min_ms
+            flag = ""
+            if significant and change > threshold:
+                regressions.append(f"{name}.{metric}")
+                flag = " ❌"
+            elif significant and change < -threshold:
+                flag = " ✅"
+            print(
+                f"{name:>22} {metric:>16} {base[metric] * 1000:>14.1f} "
+                f"{result[metric] * 1000:>13.1f} {change:>+8.1%}{flag}"
+            )
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _report(regressions: list[str], threshold: float) -> int:
+    if regressions:
+        print(f"❌ {len(regressions)} 项耗时增加超过 {threshold:.0%}：{', '.join(regressions)}")
+        return 1
+    print(f"✅ 没有超过 {threshold:.0%} 的性能回退")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="运行基准")
+    run_parser.add_argument("--corpus", nargs="+", choices=list(CORPORA), help="默认运行当前环境中可用的全部语料")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="语料规模的倍数")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("-o", "--output", help="结果 JSON 的路径")
+    run_parser.add_argument("--baseline", help="运行后与该基线对比")
+    run_parser.add_argument("--threshold", type=float, default=0.1, help="判定为回退的耗时增加比例")
+
+    compare_parser = commands.add_parser("compare", help="对比两份结果")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="判定为回退的耗时增加比例")
+    compare_parser.add_argument("--min-ms", type=float, default=MIN_MS, help="两边都短于该值的指标不参与判断")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare(_load(args.baseline), _load(args.current), args.threshold, args.min_ms)
+        return _report(regressions, args.threshold)
+
+    names = args.corpus or available()
+    print(f"{'corpus':>22} {'decls':>8} {'convert (ms)':>12} {'output (ms)':>10} {'format (ms)':>12} {'formatter (ms)':>14}")
+    data = run(names, args.scale, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已写入 {args.output}")
+    if args.baseline:
+        return _report(compare(_load(args.baseline), data, args.threshold), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
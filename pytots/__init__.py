@@ -5,11 +5,17 @@ __version__ = "0.3.5"
 # 导入主要功能
 from .main import (
     convert_to_ts,
+    convert_many,
     get_output_ts_str,
+    iter_output_ts,
     output_ts_file,
-    reset_store
+    output_ts_shards,
+    reset_store,
+    cache_info,
 )
 
+from .converter import Converter
+
 from .clf import (
     replaceable_type_map,
 )
@@ -19,9 +25,14 @@ from .plugin import Plugin, use_plugin, override_plugin
 # 导出主要功能
 __all__ = [
     "convert_to_ts",
+    "convert_many",
     "get_output_ts_str", 
+    "iter_output_ts",
     "output_ts_file",
+    "output_ts_shards",
     "reset_store",
+    "cache_info",
+    "Converter",
     "Plugin",
     "use_plugin",
     "override_plugin",
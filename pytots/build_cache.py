@@ -0,0 +1,181 @@
+"""
+增量构建缓存
+
+把每个模块的转换结果（`pytots.parallel.ModuleRecords`）保存在磁盘上，再次构建时源码未变化的模块直接复用，
+既不重新转换，也不需要导入。缓存完全由内容寻址：
+
+- `deps/<模块键>.json`：模块键由模块名、模块源码的哈希和转换配置（pytots 版本、Python 版本、插件、
+  可替换类型映射、include / exclude）求得，内容为该模块的声明所依赖的其他模块（引用的声明及各类的基类所在的模块）。
+- `records/<结果键>.json`：结果键在模块键的基础上加入各依赖模块源码的哈希，以及依赖模块是否也在本次
+  转换之列（在列时其公开类型只记录引用），内容为模块的转换结果。
+
+不同分支上同一模块的不同版本对应不同的文件，可以共存，因此缓存目录可以在分支之间共享；
+写入时先写临时文件再原子替换，多个构建进程同时写入同一个目录也是安全的。
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+from typing import Any, Container, Iterable, NamedTuple
+
+import pytots
+from pytots.output import write_file
+
+# 缓存格式的版本，格式变化时递增，使旧的缓存失效
+CACHE_FORMAT = 2
+
+
+class BuildReport(NamedTuple):
+    """一次构建中复用和重新转换的模块"""
+
+    reused: list[str]
+    rebuilt: list[str]
+
+    def __str__(self) -> str:
+        return f"♻️ 复用 {len(self.reused)} 个模块, 🔨 重新转换 {len(self.rebuilt)} 个模块"
+
+
+def _plugin_signature(plugin: Any) -> str:
+    cls = type(plugin)
+    return repr(
+        (
+            f"{cls.__module__}.{cls.__qualname__}",
+            plugin.name,
+            plugin.type_prefix,
+            getattr(plugin, "options", None),
+        )
+    )
+
+
+def config_signature(converter: Any, include: Iterable[str], exclude: Iterable[str]) -> str:
+    """会影响转换结果的配置的摘要"""
+    replaceable = sorted(
+        (f"{getattr(k, '__module__', '')}.{getattr(k, '__qualname__', repr(k))}", v)
+        for k, v in converter.replaceable_types_map.items()
+    )
+    return repr(
+        (
+            CACHE_FORMAT,
+            pytots.__version__,
+            sys.version_info[:2],
+            [_plugin_signature(p) for p in converter.plugins],
+            replaceable,
+            tuple(include),
+            tuple(exclude),
+        )
+    )
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class BuildCache:
+    """
+    磁盘上的增量构建缓存，传给 `pytots.parallel.convert_package` 的 `cache` 参数使用。
+    每次构建后 `report` 为本次复用和重新转换的模块
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = os.fspath(directory)
+        self.report = BuildReport([], [])
+        self._hashes: dict[tuple, str] = {}  # (源码路径, 修改时间, 大小) -> 源码哈希
+        self._lock = threading.Lock()
+
+    def source_hash(self, module: str) -> str:
+        """模块源码的哈希，不导入模块；没有源码文件的模块（内置模块等）返回固定值"""
+        try:
+            spec = importlib.util.find_spec(module)
+        except (ImportError, ValueError):
+            return "missing"
+        if spec is None:
+            return "missing"
+        origin = spec.origin
+        if not origin or not spec.has_location or not os.path.isfile(origin):
+            return "builtin"
+        stat = os.stat(origin)
+        stamp = (origin, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if (cached := self._hashes.get(stamp)) is not None:
+                return cached
+        with open(origin, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self._lock:
+            self._hashes[stamp] = digest
+        return digest
+
+    def _module_key(self, module: str, signature: str) -> str:
+        return _digest(module, self.source_hash(module), signature)
+
+    def _records_key(self, module_key: str, dependencies: Iterable[str], modules: Container[str]) -> str:
+        return _digest(
+            module_key,
+            *(f"{dep}={self.source_hash(dep)}:{dep in modules}" for dep in sorted(dependencies)),
+        )
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, kind, key[:2], f"{key}.json")
+
+    def _read(self, kind: str, key: str) -> Any:
+        try:
+            with open(self._path(kind, key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, kind: str, key: str, data: Any) -> None:
+        write_file(self._path(kind, key), json.dumps(data, ensure_ascii=False), if_changed=True)
+
+    def load(self, module: str, signature: str, modules: Container[str]):
+        """
+        读取模块的转换结果，模块或其依赖的源码有变化时返回 None
+        Args:
+            module: 模块名
+            signature: 转换配置的摘要，见 `config_signature`
+            modules: 本次待转换的全部模块
+        """
+        from pytots.parallel import DeclarationRecord, ModuleRecords
+
+        module_key = self._module_key(module, signature)
+        dependencies = self._read("deps", module_key)
+        if dependencies is None:
+            return None
+        data = self._read("records", self._records_key(module_key, dependencies, modules))
+        if data is None:
+            return None
+        return ModuleRecords(
+            data["module"],
+            tuple(data["refs"]),
+            [DeclarationRecord(*r[:5], tuple(r[5])) for r in data["records"]],
+            tuple(data["modules"]),
+        )
+
+    def save(self, result, signature: str, modules: Container[str]) -> None:
+        """保存模块的转换结果"""
+        module_key = self._module_key(result.module, signature)
+        dependencies = sorted(result.modules)
+        self._write("deps", module_key, dependencies)
+        self._write(
+            "records",
+            self._records_key(module_key, dependencies, modules),
+            {
+                "module": result.module,
+                "refs": list(result.refs),
+                "records": [list(r) for r in result.records],
+                "modules": dependencies,
+            },
+        )
+
+
+__all__ = [
+    "BuildCache",
+    "BuildReport",
+    "config_signature",
+]
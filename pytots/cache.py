@@ -0,0 +1,204 @@
+"""
+转换结果缓存
+
+`map_base_type` 的结果只依赖类型表达式本身以及当前会话的插件、可替换类型映射和已转换的存储，
+因此在这些状态不变时可以直接复用。每个转换会话拥有独立的缓存，`reset_store`、`replaceable_type_map`、
+`use_plugin` 和 `override_plugin` 会自动使对应会话的缓存失效。
+
+`FormatCache` 缓存每个声明格式化后的文本，重复输出时只需格式化新增或变化的声明。
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, NamedTuple, TypeVar
+
+
+class CacheInfo(NamedTuple):
+    """缓存统计信息"""
+
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+
+_ALL_CACHES: "weakref.WeakSet[ConversionCache]" = weakref.WeakSet()
+
+
+class ConversionCache:
+    """
+    带 LRU 淘汰的转换结果缓存。
+
+    - 复合类型的键由 origin 和各参数对象的 `id` 组成：一方面避免逐层求哈希，
+      另一方面 `Union[int, str] == Union[str, int]`，按类型表达式相等性作为键会混淆参数顺序不同的联合类型。
+    - 含有未绑定 `TypeVar` 的表达式不会被缓存，它们的结果依赖泛型参数替换的上下文。
+    - 条目同时记录求值过程中引用的声明，命中时由调用方重放，保证依赖关系完整。
+    - 读写均在锁内进行，可被多个线程共享。
+    """
+
+    def __init__(self, maxsize: int | None = 4096) -> None:
+        """
+        Args:
+            maxsize: 最大缓存条目数，为 None 时不限制，为 0 时禁用缓存
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Any, tuple[Any, dict, tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+        _ALL_CACHES.add(self)
+
+    def make_key(self, python_type: Any) -> Any:
+        """生成缓存键，不可缓存时返回 None"""
+        if self.maxsize == 0 or type(python_type) is tuple:
+            return None
+        if isinstance(python_type, TypeVar):
+            return None
+        try:
+            if getattr(python_type, "__parameters__", None):
+                return None
+            args = getattr(python_type, "__args__", None)
+            if type(args) is not tuple or not args:
+                hash(python_type)
+                return python_type
+            # 复合类型：由类别、origin、修饰信息和参数对象的标识确定，避免对深层嵌套的表达式逐层求哈希
+            metadata = getattr(python_type, "__metadata__", ())
+            return (
+                type(python_type),
+                python_type.__origin__,
+                *map(id, metadata),
+                None,
+                *map(id, args),
+            )
+        except Exception:
+            return None
+
+    def lookup(self, key: Any) -> tuple[dict, tuple] | None:
+        """读取缓存，返回 `(结果, 引用的声明)`，未命中时返回 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+        return entry[1], entry[2]
+
+    def get(self, key: Any) -> dict | None:
+        """读取缓存，未命中时返回 None"""
+        entry = self.lookup(key)
+        return None if entry is None else entry[0]
+
+    def put(self, key: Any, python_type: Any, value: dict, refs: tuple = ()) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            # 同时保存类型表达式本身，保证键中引用的参数对象在条目存活期间不会被回收
+            self._data[key] = (python_type, value, refs)
+            self._data.move_to_end(key)
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize: int | None) -> None:
+        """调整缓存容量"""
+        with self._lock:
+            self.maxsize = maxsize
+            if maxsize is not None:
+                while len(self._data) > maxsize:
+                    self._data.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """使所有缓存条目失效，保留统计信息"""
+        with self._lock:
+            self._data.clear()
+
+    def clear(self) -> None:
+        """清空缓存及统计信息"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        """获取缓存统计信息"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class FormatCache:
+    """
+    声明的格式化结果缓存：键为 (缩进层级, 前缀, 声明的代码)，值为该声明单独格式化后的文本。
+
+    格式化的结果只由代码本身决定，不需要失效；代码变化的声明自然对应新的键。
+    `sweep` 移除上一次 `sweep` 之后没有被用到的条目（如已被修改或移除的声明），
+    每次完整输出后调用，缓存的大小与输出的大小相当。读写均在锁内进行，可被多个线程共享。
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._data: dict[tuple[int, str, str], str] = {}
+        self._used: set[tuple[int, str, str]] = set()  # 上一次 sweep 之后用到的键
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[int, str, str]) -> str | None:
+        """读取缓存，未命中时返回 None"""
+        with self._lock:
+            body = self._data.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._used.add(key)
+        return body
+
+    def put(self, key: tuple[int, str, str], body: str) -> None:
+        """写入缓存"""
+        with self._lock:
+            self._data[key] = body
+            self._used.add(key)
+
+    def sweep(self) -> None:
+        """移除上一次 sweep 之后没有被用到的条目"""
+        with self._lock:
+            if len(self._used) != len(self._data):
+                self._data = {key: self._data[key] for key in self._used}
+            self._used = set()
+
+    def clear(self) -> None:
+        """清空缓存及统计信息"""
+        with self._lock:
+            self._data.clear()
+            self._used.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        """获取缓存统计信息"""
+        return CacheInfo(self.hits, self.misses, None, len(self._data))
+
+    def __contains__(self, key: tuple[int, str, str]) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def invalidate_all_caches() -> None:
+    """使所有会话的转换缓存失效，用于修改全局的类型处理器之后"""
+    for cache in list(_ALL_CACHES):
+        cache.invalidate()
+
+
+CONVERSION_CACHE = ConversionCache()  # 默认会话的转换缓存
+
+
+__all__ = [
+    "CacheInfo",
+    "ConversionCache",
+    "FormatCache",
+    "CONVERSION_CACHE",
+    "invalidate_all_caches",
+]
@@ -5,6 +5,8 @@ import decimal
 import uuid
 import datetime
 
+from .cache import CONVERSION_CACHE
+
 # 单一类型映射表
 SINGLE_TYPES_MAP = {
     int: "number",
@@ -88,6 +90,19 @@ REPLACEABLE_TYPES_MAP = {
     None: "undefined | null",
 }
 
+# 可替换类型映射的初始值，新建转换会话时以其副本作为会话的映射
+REPLACEABLE_TYPES_DEFAULTS = dict(REPLACEABLE_TYPES_MAP)
+
+
+def set_replaceable_type(types_map: dict, type_, value: str) -> bool:
+    """
+    修改指定可替换类型映射表中的映射，类型不可替换时返回 False
+    """
+    if type_ in types_map:
+        types_map[type_] = value
+        return True
+    return False
+
 
 # 可替换类型提供替换的函数接口
 def replaceable_type_map(
@@ -102,8 +117,8 @@ def replaceable_type_map(
     Returns:
         TypeScript 类型字符串
     """
-    if type_ in REPLACEABLE_TYPES_MAP:
-        REPLACEABLE_TYPES_MAP[type_] = value
+    if set_replaceable_type(REPLACEABLE_TYPES_MAP, type_, value):
+        CONVERSION_CACHE.invalidate()
         return True
     else:
         return False
@@ -124,5 +139,7 @@ __all__ = [
     "OPTIONAL_TYPES_COLLECTION",
     "LITERAL_TYPES_COLLECTION",
     "REPLACEABLE_TYPES_MAP",
+    "REPLACEABLE_TYPES_DEFAULTS",
+    "set_replaceable_type",
     "replaceable_type_map",
 ]
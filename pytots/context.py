@@ -0,0 +1,118 @@
+"""
+转换上下文
+
+一次 `convert_to_ts` 调用对应一个 `ConversionContext`，贯穿 `map_base_type`、处理函数和插件，
+保存所属的转换会话、转换栈（用于自引用检测）、类型变量替换表、引用的声明、推迟生成的声明和处理函数。
+插件内部再次调用 `convert_to_ts` 时会沿用当前激活的上下文。
+
+生成声明（如插件转换类的字段）期间遇到的其他需要声明的类型不会立即递归转换，而是记入 `pending`，
+由最外层的声明以显式栈依次生成，类的嵌套深度不受递归深度限制。
+
+上下文只在一个线程中使用，激活状态保存在 `ContextVar` 中，多个线程可以同时转换同一个会话中的类型。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from .converter import Converter
+
+
+ProcessFunc = Callable[[Any, "ConversionContext"], Any]
+
+_ACTIVE_CONTEXT: ContextVar[Optional["ConversionContext"]] = ContextVar(
+    "pytots_conversion_context", default=None
+)
+
+
+class ConversionContext:
+    """转换上下文"""
+
+    __slots__ = (
+        "converter",
+        "stack",
+        "seen",
+        "typevar_map",
+        "refs",
+        "pending",
+        "queued",
+        "process_newType",
+        "process_typeVar",
+        "process_enum",
+        "process_missing",
+    )
+
+    def __init__(
+        self,
+        converter: Optional["Converter"] = None,
+        process_newType: ProcessFunc | None = None,
+        process_typeVar: ProcessFunc | None = None,
+        process_enum: ProcessFunc | None = None,
+        process_missing: ProcessFunc | None = None,
+    ) -> None:
+        if converter is None:
+            from .converter import DEFAULT_CONVERTER
+
+            converter = DEFAULT_CONVERTER
+        self.converter = converter  # 所属的转换会话，提供存储、插件、可替换类型映射和缓存
+        self.stack: list[Any] = []  # 正在转换的类型，栈顶为当前类型
+        self.seen: set[int] = set()  # 栈中类型的 id，用于 O(1) 的自引用检测
+        self.typevar_map: dict[Any, str] = {}  # 类型变量 -> 替换后的类型，由 `generic_feild_fill` 按字段设置
+        self.refs: list[Any] = []  # 当前正在生成的声明（或顶层类型）引用的声明，按出现顺序记录
+        self.pending: list[Any] | None = None  # 当前正在生成的声明推迟生成的声明，不在生成声明时为 None
+        self.queued: dict[int, Any] = {}  # 类型的 id -> 已推迟、尚未开始生成的声明
+        self.process_newType = process_newType
+        self.process_typeVar = process_typeVar
+        self.process_enum = process_enum
+        self.process_missing = process_missing
+
+    def push(self, python_type: Any) -> None:
+        """类型入栈"""
+        self.stack.append(python_type)
+        self.seen.add(id(python_type))
+
+    def pop(self) -> Any:
+        """类型出栈"""
+        python_type = self.stack.pop()
+        self.seen.discard(id(python_type))
+        return python_type
+
+    def reference(self, python_type: Any) -> None:
+        """记录对已声明类型的引用"""
+        self.refs.append(python_type)
+
+    def replay(self, refs: Iterable[Any]) -> None:
+        """
+        记录命中缓存的结果引用的声明。其中已推迟、尚未开始生成的声明改为在当前声明之后生成，
+        与转换该结果时遇到这些声明的顺序相同
+        """
+        self.refs.extend(refs)
+        if self.queued:
+            for python_type in refs:
+                entry = self.queued.get(id(python_type))
+                if entry is not None:
+                    self.pending.append(entry)  # type: ignore[union-attr]
+
+    def __contains__(self, python_type: Any) -> bool:
+        """按标识判断类型是否正在转换中"""
+        return id(python_type) in self.seen
+
+    @contextmanager
+    def activate(self) -> Iterator["ConversionContext"]:
+        """将该上下文设为当前激活的上下文"""
+        token = _ACTIVE_CONTEXT.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE_CONTEXT.reset(token)
+
+    @staticmethod
+    def current() -> Optional["ConversionContext"]:
+        """获取当前激活的上下文，不在转换过程中时返回 None"""
+        return _ACTIVE_CONTEXT.get()
+
+
+__all__ = [
+    "ConversionContext",
+]
@@ -0,0 +1,314 @@
+"""
+转换会话
+
+`Converter` 持有一次独立输出所需的全部状态：已转换的存储、插件列表、可替换类型映射和转换缓存。
+不同会话之间互不影响，可以在同一进程中（包括多个线程中）同时生成多份 TypeScript 定义。
+`pytots.convert_to_ts` 等模块级函数是默认会话 `DEFAULT_CONVERTER` 的简单封装。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+from pytots.type_map import map_base_type
+from pytots.processer import new_context
+from pytots.store import DEFAULT_STORE, Store
+from pytots.render import iter_render_ts, render_ts
+from pytots.output import write_file
+from pytots.shard import module_key, output_shards
+from pytots.cache import CONVERSION_CACHE, CacheInfo, ConversionCache, FormatCache
+from pytots.context import ConversionContext
+from pytots.clf import REPLACEABLE_TYPES_MAP, REPLACEABLE_TYPES_DEFAULTS, set_replaceable_type
+from pytots.plugin import PLUGINS, Plugin, PluginIndex, use_plugin, register_plugins, replace_plugins
+from pytots.plugin.inner import DataclassPlugin, TypedDictPlugin
+
+
+class RootResult(NamedTuple):
+    """批量转换中单个根类型的结果"""
+
+    type: Any  # 根类型
+    code: str  # 根类型的 TypeScript 表示
+    elapsed: float  # 转换耗时（秒），包含其依赖中由该根类型首先转换的部分
+
+
+class Converter:
+    """
+    转换会话
+
+    Example:
+        >>> converter = Converter()
+        >>> converter.convert_to_ts(User)
+        'User'
+        >>> converter.output_ts_file("types/user.d.ts")
+    """
+
+    def __init__(
+        self,
+        plugins: Iterable[Plugin] | None = None,
+        replaceable_types_map: dict | None = None,
+        cache_size: int | None = 4096,
+        *,
+        store: Store | None = None,
+        cache: ConversionCache | None = None,
+    ) -> None:
+        """
+        Args:
+            plugins: 插件，为 None 时使用内置的 dataclass 和 TypedDict 插件
+            replaceable_types_map: 可替换类型映射，为 None 时复制默认映射
+            cache_size: 转换缓存容量，为 None 时不限制，为 0 时禁用缓存
+            store: 已转换的存储，为 None 时新建
+            cache: 转换缓存，为 None 时按 `cache_size` 新建
+        """
+        self.store = store if store is not None else Store()
+        self.cache = cache if cache is not None else ConversionCache(cache_size)
+        # 声明的格式化结果，重复输出时只格式化新增或变化的声明
+        self.format_cache = FormatCache()
+        self.replaceable_types_map = (
+            replaceable_types_map
+            if replaceable_types_map is not None
+            else dict(REPLACEABLE_TYPES_DEFAULTS)
+        )
+        if plugins is None:
+            self.plugins: list[Plugin] = [DataclassPlugin(), TypedDictPlugin()]
+        else:
+            self.plugins = []
+            register_plugins(self.plugins, plugins)
+        self._plugin_index: PluginIndex | None = None
+
+    def clone(self) -> "Converter":
+        """创建插件、可替换类型映射和缓存容量与该会话相同，但存储和缓存独立的新会话"""
+        converter = Converter(
+            plugins=(),
+            replaceable_types_map=dict(self.replaceable_types_map),
+            cache_size=self.cache.maxsize,
+        )
+        converter.plugins = list(self.plugins)
+        # 插件相同，共用分派索引及其缓存
+        converter._plugin_index = self._plugin_index
+        return converter
+
+    def plugin_index(self) -> PluginIndex:
+        """当前插件列表的分派索引，插件列表变化（包括直接修改 `plugins`）后自动重建"""
+        index = self._plugin_index
+        if index is None or index.plugins != tuple(self.plugins):
+            index = self._plugin_index = PluginIndex(self.plugins)
+        return index
+
+    def new_context(self) -> ConversionContext:
+        """创建属于该会话的转换上下文"""
+        return new_context(self)
+
+    def convert_to_ts(self, obj) -> str:
+        """
+        将 Python 对象转换为 TypeScript 定义，转换结果累积在该会话中。
+        """
+        if (context := ConversionContext.current()) is not None and context.converter is self:
+            # 在插件中调用时沿用当前的转换上下文
+            return map_base_type(obj, context)["code"]
+        with self.new_context().activate() as context:
+            return map_base_type(obj, context)["code"]
+
+    def convert_many(self, types: Iterable, workers: int | None = None) -> list[RootResult]:
+        """
+        在线程池中批量转换多个根类型，结果累积在该会话中。
+
+        - 各线程共享会话的存储和缓存，被多个根类型引用的类型只会被转换一次。
+        - 转换完成后按根类型的顺序和依赖关系重排声明，输出与按顺序逐个调用 `convert_to_ts` 一致，
+          不受线程调度的影响。
+        - 不依赖 GIL 保证正确性，在自由线程（free-threaded）构建的 CPython 上可以并行执行。
+
+        Args:
+            types: 根类型
+            workers: 线程数，为 None 时由 `ThreadPoolExecutor` 决定，为 1 时在当前线程中依次转换
+        Returns:
+            按输入顺序排列的各根类型的结果和耗时
+        """
+        store = self.store
+        declared = list(store.declaration_index)
+        outputs = self._convert_roots(types, workers)
+
+        visited = set(declared)
+        order = declared
+        for _, refs in outputs:
+            order.extend(store.dependency_order(refs, visited))
+        store.reorder(order)
+        return [result for result, _ in outputs]
+
+    def _convert_roots(self, types: Iterable, workers: int | None) -> list[tuple[RootResult, list]]:
+        """转换各根类型，返回各自的结果和引用的声明（按输入顺序）"""
+        roots = list(types)
+
+        def run(root) -> tuple[RootResult, list]:
+            start = time.perf_counter()
+            with self.new_context().activate() as context:
+                code = map_base_type(root, context)["code"]
+            return RootResult(root, code, time.perf_counter() - start), context.refs
+
+        if workers == 1 or len(roots) <= 1:
+            return [run(root) for root in roots]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run, roots))
+
+    def _declarations(self, nodes: bool) -> tuple:
+        """渲染的 NewType、枚举和其余分类的声明，nodes 为 True 时有 IR 节点的声明使用节点"""
+        store = self.store
+        if not nodes:
+            return (
+                store.processed_newtype.values(),
+                store.processed_enum.values(),
+                {category: codes.values() for category, codes in store.processed_missing.items()},
+            )
+        return (
+            store.declarations(store.processed_newtype),
+            store.declarations(store.processed_enum),
+            {category: store.declarations(codes) for category, codes in store.processed_missing.items()},
+        )
+
+    def get_output_ts_str(
+        self,
+        module_name: str | None = "PytsDemo",
+        format: bool = False,
+        workers: int | None = 1,
+    ) -> str:
+        """
+        返回该会话中已转换的 TypeScript 定义字符串。
+        Args:
+            module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
+            format: 是否格式化输出，默认值为 False。各声明格式化后的文本缓存在会话中，
+                重复调用时只格式化新增或变化的声明
+            workers: 格式化的进程数，默认为 1，为 None 时使用 CPU 核数；输出很大时在进程池中并行格式化各声明，
+                见 `pytots.render.format_declarations`
+        """
+        output = render_ts(
+            *self._declarations(format),
+            module_name,
+            format,
+            self.format_cache,
+            workers,
+        )
+        if format:
+            self.format_cache.sweep()
+        return output
+
+    def iter_output_ts(
+        self,
+        module_name: str | None = "PytsDemo",
+        format: bool = False,
+        workers: int | None = 1,
+    ) -> Iterator[str]:
+        """
+        逐个声明地产出 `get_output_ts_str` 的结果（格式化时逐个声明格式化），拼接后与其相同。
+        迭代期间不能继续在该会话中转换。迭代完成后与 `get_output_ts_str` 一样清理格式化缓存，
+        未迭代完的输出不清理。参数见 `get_output_ts_str`
+        """
+        chunks = iter_render_ts(
+            *self._declarations(format),
+            module_name,
+            format,
+            self.format_cache,
+            workers,
+        )
+        return self._sweep_after(chunks) if format else chunks
+
+    def _sweep_after(self, chunks: Iterator[str]) -> Iterator[str]:
+        """产出 chunks，迭代完成后清理格式化缓存中本次输出没有用到的条目"""
+        yield from chunks
+        self.format_cache.sweep()
+
+    def output_ts_file(
+        self,
+        file_path: str,
+        module_name: str | None = "PytsDemo",
+        format: bool = True,
+        if_changed: bool = False,
+        stream: bool = False,
+        workers: int | None = 1,
+    ) -> bool:
+        """
+        将该会话中已转换的 TypeScript 定义输出到文件。
+        Args:
+            file_path: 输出文件路径
+            module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
+            format: 是否格式化输出，默认值为 True
+            if_changed: 为 True 时内容未变化则不写入文件，否则原子地替换文件，见 `pytots.output.write_file`
+            stream: 为 True 时通过 `iter_output_ts` 逐个声明地写入，不在内存中生成完整的输出
+            workers: 格式化的进程数，见 `get_output_ts_str`
+        Returns:
+            文件内容是否发生了变化
+        """
+        if stream:
+            content = self.iter_output_ts(module_name, format, workers)
+        else:
+            content = self.get_output_ts_str(module_name, format, workers)
+        return write_file(file_path, content, if_changed)
+
+    def output_ts_shards(
+        self,
+        directory: str,
+        key: Callable[[Any], str] = module_key,
+        format: bool = True,
+        index: str | None = "index.ts",
+        workers: int | None = None,
+    ) -> dict[str, bool]:
+        """
+        将该会话中已转换的声明按 Python 模块（或 key 返回的分组）分别写入 directory 下的 `.ts` 文件，
+        跨文件的引用生成 `import type`，并生成索引文件。内容未变化的文件不会被重写。
+        Args:
+            directory: 输出目录
+            key: 声明的类型 -> 分组名（即分片相对 directory 的路径，不含扩展名），默认为所在的 Python 模块
+            format: 是否格式化输出，默认值为 True
+            index: 索引文件名，为 None 时不生成索引文件
+            workers: 写文件的线程数
+        Returns:
+            文件路径 -> 内容是否发生了变化
+        """
+        changed = output_shards(directory, self.store, key, format, index, workers, self.format_cache)
+        if format:
+            self.format_cache.sweep()
+        return changed
+
+    def reset_store(self) -> None:
+        """清除该会话中所有已转换的 TypeScript 定义"""
+        self.store.clear()
+        self.cache.invalidate()
+
+    def use_plugin(self, *plugins: Plugin) -> None:
+        """为该会话注册插件"""
+        register_plugins(self.plugins, plugins)
+        self.cache.invalidate()
+
+    def override_plugin(self, *plugins: Plugin) -> None:
+        """覆盖该会话中已有的插件，替换时以插件名作为唯一标识"""
+        if replace_plugins(self.plugins, plugins):
+            self.cache.invalidate()
+
+    def replaceable_type_map(self, type_, value: str) -> bool:
+        """修改该会话的可替换类型映射，类型不可替换时返回 False"""
+        if set_replaceable_type(self.replaceable_types_map, type_, value):
+            self.cache.invalidate()
+            return True
+        return False
+
+    def cache_info(self) -> CacheInfo:
+        """获取该会话转换缓存的统计信息"""
+        return self.cache.info()
+
+
+use_plugin(DataclassPlugin())
+use_plugin(TypedDictPlugin())
+
+# 默认会话，与模块级的存储、插件列表、可替换类型映射和缓存共用同一份状态
+DEFAULT_CONVERTER = Converter(
+    plugins=(),
+    replaceable_types_map=REPLACEABLE_TYPES_MAP,
+    store=DEFAULT_STORE,
+    cache=CONVERSION_CACHE,
+)
+DEFAULT_CONVERTER.plugins = PLUGINS
+
+
+__all__ = [
+    "Converter",
+    "RootResult",
+    "DEFAULT_CONVERTER",
+]
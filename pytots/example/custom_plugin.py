@@ -22,7 +22,7 @@ class MyTicketAdmin(MyTicket[MyAdmin]):
     
 from pytots import Plugin
 from pytots.plugin.tools import generic_feild_fill,assemble_interface_type
-from typing import get_type_hints
+from pytots.hints import get_type_hints
 from pytots.plugin.inner import DataclassPlugin
 
 
@@ -5,9 +5,16 @@ TypeScript 格式化输出模块
 支持与 pytots 转换器集成，提供自动格式化的 TypeScript 输出。
 """
 
+import re
 
 
-class TypeScriptFormatter:
+
+class ReferenceTypeScriptFormatter:
+    """
+    逐字符处理的参考实现。`TypeScriptFormatter` 的输出与其逐字节相同，
+    保留它用于对照测试和基准比较
+    """
+
     def __init__(self, indent_size=4):
         self.indent_char = " "
         self.indent_size = indent_size
@@ -29,12 +36,50 @@ class TypeScriptFormatter:
         # 上一个写入的有效字符（非空格），用于判断上下文（如正则 vs 除号）
         self.last_token = '' 
 
+        # 增量格式化时尚未处理的输入（需要等待下一个字符才能确定如何处理）
+        self.pending = ''
+
     def format(self, code: str) -> str:
         self.result = []
+        self._run(code, final=True)
+        return "".join(self.result)
+
+    def feed(self, code: str) -> str:
+        """
+        增量格式化：追加输入并返回已经确定的输出。
+        依次 feed 各段代码后调用 `finish`，拼接所有返回值的结果与一次性 `format` 整段代码相同
+        """
+        code = self.pending + code
+        i = self._run(code, final=False)
+        self.pending = code[i:]
+        # 换行时会回退末尾的空白，保留最后一个非空白片段及其后的空白，其余的已不会再变化
+        k = len(self.result)
+        while k and not self.result[k - 1].strip():
+            k -= 1
+        if k <= 1:
+            return ""
+        output = "".join(self.result[:k - 1])
+        del self.result[:k - 1]
+        return output
+
+    def finish(self) -> str:
+        """结束增量格式化，返回剩余的输出"""
+        self._run(self.pending, final=True)
+        self.pending = ''
+        output = "".join(self.result)
+        self.result = []
+        return output
+
+    def _run(self, code: str, final: bool) -> int:
+        """
+        处理 code 并写入 self.result，返回处理到的位置。
+        final 为 False 时最后一个字符留待后续输入，保证向前查看的下一个字符总是真实的
+        """
         i = 0
         n = len(code)
+        stop = n if final else n - 1
         
-        while i < n:
+        while i < stop:
             char = code[i]
             next_char = code[i+1] if i + 1 < n else ''
             
@@ -212,7 +257,7 @@ class TypeScriptFormatter:
             self._emit(char)
             i += 1
         
-        return "".join(self.result)
+        return i
 
     # --- 辅助方法 ---
 
@@ -257,6 +302,296 @@ class TypeScriptFormatter:
         c = self.result[-1]
         return c.isalnum() or c == '_'
 
+# 词法单元：行注释（含结尾的换行）、块注释、字符串、以单个空格分隔的普通字符序列，其余为单个标点或操作符。
+# 单元之前的空白并入该单元（作为其前导空白），只有输入末尾的空白单独成为一个单元。
+# 未闭合的块注释和字符串一直延续到输入的末尾
+_TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<word>[^\s{}();,'"`=?:+\-*%/]+(?:[ ][^\s{}();,'"`=?:+\-*%/]+)*)
+        | (?P<op>[=?:+\-*%])
+        | (?P<semi>;)
+        | (?P<open>\{)
+        | (?P<close>\})
+        | (?P<comma>,)
+        | (?P<lparen>\()
+        | (?P<rparen>\))
+        | (?P<line>//[^\n]*\n?)
+        | (?P<block>/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)
+        | (?P<open_block>/\*[\s\S]*)
+        | (?P<string>
+            '[^'\\]*(?:\\[\s\S][^'\\]*)*'
+            | "[^"\\]*(?:\\[\s\S][^"\\]*)*"
+            | `[^`\\]*(?:\\[\s\S][^`\\]*)*`
+        )
+        | (?P<open_string>['"`][\s\S]*)
+        | (?P<other>\S)
+    )
+    | (?P<space>\s+)
+    """,
+    re.VERBOSE,
+)
+
+
+class TypeScriptFormatter:
+    """
+    TypeScript 代码格式化器。
+
+    用预编译的正则表达式切分词法单元，按单元（而不是逐个字符）处理，输出与逐字符处理的
+    `ReferenceTypeScriptFormatter` 逐字节相同。
+
+    为了与参考实现一致，输出分为已确定的文本 `_out` 和末尾的空白 `_tail`：换行时末尾的空白会被回退，
+    末尾最后一段空白（`_tail_last`，可能是空字符串形式的零缩进）还决定是否需要补空格。
+    """
+
+    def __init__(self, indent_size=4):
+        self.indent_char = " "
+        self.indent_size = indent_size
+
+        # 核心状态
+        self.indent_level = 0
+        self.paren_level = 0        # 追踪 () 深度，用于 for 循环保护
+        self.wants_newline = False  # 标记是否需要换行
+        self.pending = ''           # 增量格式化时尚未处理的输入（可能还不完整的最后一个词法单元）
+
+        self._out = []              # 已确定的输出
+        self._tail = ''             # 末尾的空白
+        self._tail_last = None      # 末尾最后一段空白，没有时为 None
+        self._last = ''             # 最后一个非空白字符
+        self._started = False       # 是否已有输出
+        self._space = False         # 输入中是否有尚未处理的空白
+        self._unclosed = False      # 是否遇到了未闭合的字符串或块注释
+
+    def format(self, code: str) -> str:
+        self._out = []
+        self._tail, self._tail_last = '', None
+        self._started = False
+        self._run(code, final=True)
+        return "".join(self._out) + self._tail
+
+    def feed(self, code: str) -> str:
+        """
+        增量格式化：追加输入并返回已经确定的输出。
+        依次 feed 各段代码后调用 `finish`，拼接所有返回值的结果与一次性 `format` 整段代码相同
+        """
+        code = self.pending + code
+        self.pending = code[self._run(code, final=False):]
+        output = "".join(self._out)
+        self._out = []
+        return output
+
+    def finish(self) -> str:
+        """结束增量格式化，返回剩余的输出"""
+        self._run(self.pending, final=True)
+        self.pending = ''
+        output = "".join(self._out) + self._tail
+        self._out = []
+        self._tail, self._tail_last = '', None
+        return output
+
+    def boundary(self) -> str | None:
+        """
+        增量格式化停在两个声明之间（上一个声明以 ; 或 } 结束，其后只有空白）时，返回下一个声明之前的
+        换行和缩进（还没有任何输出时为空字符串），否则返回 None。
+        此时下一个声明可以用 `format_declaration` 单独格式化，写出后调用 `skip` 同步状态
+        """
+        if self.pending.strip() or self.paren_level or self._tail_last is not None:
+            return None
+        if not self._started:
+            return "" if not self.wants_newline and not self.indent_level else None
+        if not self.wants_newline:
+            return None
+        return "\n" + self.indent_char * self.indent_size * self.indent_level
+
+    def skip(self, formatted: str) -> None:
+        """跳过在 `boundary` 处单独格式化并已写出的声明 formatted，之后可以继续 feed"""
+        self.pending = ''
+        self._last, self._started, self._space = formatted[-1], True, False
+        self.wants_newline = True
+
+    def format_declaration(self, code: str, indent_level: int = 0) -> str | None:
+        """
+        单独格式化一个声明，返回其在缩进层级 indent_level 处格式化后的文本（不含之前的换行和缩进）。
+
+        声明以普通字符开始，并以 ; 或 } 结束在原来的层级（括号、字符串和注释都已闭合）时，
+        在整段输出中它的格式化结果与上下文无关；否则返回 None，需要与上下文一起格式化
+        """
+        m = _TOKEN.match(code)
+        if m is None or m.lastgroup != "word" or m.start("word"):
+            return None
+        output = self._fragment(code, indent_level, 0, False)
+        return output if output is not None and self.wants_newline else None
+
+    def format_inline(self, code: str, indent_level: int = 0, paren_level: int = 0, space: bool = True) -> str | None:
+        """
+        单独格式化一行中的一段代码，如紧跟在 `: ` 或 `= ` 之后的类型表达式（space 为其前面是否有空白）。
+        这段代码结束在原来的层级且不需要换行时，返回其格式化后的文本，否则返回 None
+        """
+        output = self._fragment(code, indent_level, paren_level, space)
+        return output if output is not None and not self.wants_newline else None
+
+    def _fragment(self, code: str, indent_level: int, paren_level: int, space: bool) -> str | None:
+        """从一行的中间（上一个字符为标点）开始格式化 code，没有回到原来的层级时返回 None"""
+        self._out = []
+        self._tail, self._tail_last = '', None
+        self._last, self._started, self._space = ';', True, space
+        self._unclosed = self.wants_newline = False
+        self.indent_level, self.paren_level = indent_level, paren_level
+        self._run(code, final=True)
+        if (
+            self._unclosed
+            or self._tail_last is not None
+            or self.indent_level != indent_level
+            or self.paren_level != paren_level
+        ):
+            return None
+        return "".join(self._out)
+
+    def _run(self, code: str, final: bool) -> int:
+        """
+        处理 code，返回处理到的位置。
+        final 为 False 时延续到末尾的词法单元留待后续输入，保证每个单元及其后的一个字符都是完整的。
+        状态在循环中保存在局部变量里，结束时写回
+        """
+        out = self._out
+        append = out.append
+        tail, tail_last = self._tail, self._tail_last
+        last, started, space = self._last, self._started, self._space
+        wants_newline = self.wants_newline
+        indent, paren = self.indent_level, self.paren_level
+        unit = self.indent_char * self.indent_size
+        n = stop = len(code)
+
+        for m in _TOKEN.finditer(code):
+            kind = m.lastgroup
+            end = m.end()
+            if end >= n and not final:
+                stop = m.start()
+                break
+            text = m.group(kind)
+            if len(text) != end - m.start():
+                space = True  # 前导空白
+
+            if kind == "op" and not paren:
+                # 操作符：不是 ==、=>、++ 等双字符操作符时，确保两边有空格，后置空格由下一个单元决定
+                next_char = code[end] if end < n else ''
+                double = next_char == text or next_char == '=' or (text == '=' and next_char == '>')
+                if not double and ((tail_last != ' ') if tail_last is not None else started):
+                    tail += ' '
+                    tail_last = ' '
+                if tail_last is not None:
+                    append(tail)
+                    tail, tail_last = '', None
+                append(text)
+                last, started, space = text, True, not double
+
+            elif kind == "word" or kind == "other" or kind == "op":
+                # 普通字符（包括括号内的操作符、不构成注释的 /）：需要时先换行或补一个空格
+                if wants_newline:
+                    tail = tail_last = unit * indent
+                    tail = '\n' + tail
+                    wants_newline = False
+                elif space:
+                    tail += ' '
+                    tail_last = ' '
+                if tail_last is not None:
+                    append(tail)
+                    tail, tail_last = '', None
+                append(text)
+                last, started, space = text[-1], True, False
+
+            elif kind == "semi":
+                if tail_last is not None:
+                    append(tail)
+                    tail, tail_last = '', None
+                append(';')
+                last, started, space = ';', True, False
+                if paren == 0:
+                    wants_newline = True
+                else:
+                    tail = tail_last = ' '  # for 循环内分号后加空格
+
+            elif kind == "open" or kind == "close":
+                if kind == "open":
+                    # { 前面补一个空格，开启新层级
+                    if tail_last is not None:
+                        if tail_last != ' ' and tail_last != '\n':
+                            tail += ' '
+                            tail_last = ' '
+                    elif started:
+                        tail = tail_last = ' '
+                else:
+                    # } 回退缩进并独占一行
+                    indent = max(0, indent - 1)
+                    tail = tail_last = unit * indent
+                    tail = '\n' + tail
+                if tail_last is not None:
+                    append(tail)
+                    tail, tail_last = '', None
+                append(text)
+                last, started, space = text, True, False
+                if kind == "open":
+                    indent += 1
+                wants_newline = True
+
+            elif kind == "comma" or kind == "lparen" or kind == "rparen":
+                if kind == "lparen" and tail_last is None and started and (last.isalnum() or last == '_'):
+                    tail = tail_last = ' '  # if( -> if (
+                if tail_last is not None:
+                    append(tail)
+                    tail, tail_last = '', None
+                append(text)
+                last, started, space = text, True, False
+                if kind == "comma":
+                    tail = tail_last = ' '  # 逗号后强制加空格
+                elif kind == "lparen":
+                    paren += 1
+                else:
+                    paren = max(0, paren - 1)
+
+            elif kind == "space":
+                space = True
+
+            else:
+                # 字符串和注释：原样输出，末尾的空白可能在换行时被回退
+                if kind == "line" or kind == "block" or kind == "open_block":
+                    if kind != "line" and wants_newline:
+                        tail = tail_last = unit * indent
+                        tail = '\n' + tail
+                        wants_newline = False
+                    elif tail_last is not None:
+                        if tail_last != ' ' and tail_last != '\n':
+                            tail += ' '
+                            tail_last = ' '
+                    elif started:
+                        tail = tail_last = ' '
+                    if kind == "line" and text[-1] == '\n':
+                        text = text[:-1]
+                        wants_newline = True  # 注释结束必须换行
+                    elif kind == "block":
+                        wants_newline = True  # 块注释结束后通常换行
+                if kind == "open_block" or kind == "open_string" or (kind == "line" and text == m.group(kind)):
+                    self._unclosed = True  # 延续到输入末尾的字符串和注释
+                stripped = text.rstrip()
+                if stripped:
+                    if tail_last is not None:
+                        append(tail)
+                    append(stripped)
+                    last = stripped[-1]
+                    tail = text[len(stripped):]
+                    tail_last = tail[-1] if tail else None
+                else:
+                    tail += text
+                    tail_last = text[-1]
+                started, space = True, False
+
+        self._tail, self._tail_last = tail, tail_last
+        self._last, self._started, self._space = last, started, space
+        self.wants_newline = wants_newline
+        self.indent_level, self.paren_level = indent, paren
+        return stop
+
+
 # --- 运行测试 ---
 if __name__ == "__main__":
     # 极度混乱的代码：包含嵌套对象、数组、函数、For循环、乱七八糟的缩进
@@ -0,0 +1,139 @@
+"""
+类型注解解析缓存
+
+`typing.get_type_hints` 每次调用都会重新 `compile` 和 `eval` 字符串形式的注解（PEP 563 /
+`from __future__ import annotations`）并遍历 MRO。这里的 `get_type_hints` 结果与其相同，但：
+
+- 按类或函数缓存解析结果（弱引用为键，类或函数被回收后条目随之删除）。类或函数重新定义时是新的对象，
+  不会命中旧的条目；已有对象的 `__annotations__` 被替换或增删时，条目也会失效；
+- 类的字符串注解按模块缓存编译后的代码，同一模块中相同的注解（如 "Optional[str]"）只编译一次。
+
+注解中还有嵌套的前向引用（如 `List["Node"]`）或 `Annotated`、`Required`、`NotRequired` 等包装时，交给 `typing.get_type_hints` 解析，
+结果同样会被缓存。内置插件都通过它读取注解，自定义插件也可以直接使用。
+"""
+
+import sys
+import threading
+import typing
+from types import CodeType
+from typing import Any, ForwardRef, get_args, get_origin
+from weakref import WeakKeyDictionary
+
+# 对象 -> (各类的注解字典及其长度, 解析结果)
+_HINTS: "WeakKeyDictionary[Any, tuple[tuple, dict[str, Any]]]" = WeakKeyDictionary()
+
+# 模块名 -> {注解字符串: 编译后的代码}
+_COMPILED: dict[str, dict[str, CodeType]] = {}
+
+_LOCK = threading.Lock()
+
+# `typing.get_type_hints` 会去掉的注解包装（Python 3.11 起有 Required、NotRequired，3.13 起有 ReadOnly）
+_EXTRAS = tuple(
+    getattr(typing, name) for name in ("Annotated", "Required", "NotRequired", "ReadOnly") if hasattr(typing, name)
+)
+
+
+def get_type_hints(obj: Any) -> dict[str, Any]:
+    """
+    与 `typing.get_type_hints(obj)` 相同，结果按对象缓存。返回新的字典，调用方可以修改
+    """
+    annotations = _annotations(obj)
+    try:
+        with _LOCK:
+            entry = _HINTS.get(obj)
+    except TypeError:  # 不能弱引用的对象不缓存
+        return typing.get_type_hints(obj)
+    if entry is not None and _same(entry[0], annotations):
+        return dict(entry[1])
+
+    hints = _resolve_class(obj) if isinstance(obj, type) else None
+    if hints is None:
+        hints = typing.get_type_hints(obj)
+    with _LOCK:
+        _HINTS[obj] = (annotations, hints)
+    return dict(hints)
+
+
+def clear_type_hints_cache() -> None:
+    """清空解析结果和编译后的注解"""
+    with _LOCK:
+        _HINTS.clear()
+        _COMPILED.clear()
+
+
+def _annotations(obj: Any) -> tuple:
+    """决定解析结果的注解字典：类为 MRO 中各类自身的注解，其余对象为其 `__annotations__`"""
+    if isinstance(obj, type):
+        dicts = (vars(base).get("__annotations__") for base in obj.__mro__)
+    else:
+        dicts = (getattr(obj, "__annotations__", None),)
+    return tuple((ann, len(ann)) for ann in dicts if isinstance(ann, dict) and ann)
+
+
+def _same(cached: tuple, current: tuple) -> bool:
+    return len(cached) == len(current) and all(
+        a is b and m == n for (a, m), (b, n) in zip(cached, current)
+    )
+
+
+def _compile(module: str, source: str) -> CodeType:
+    compiled = _COMPILED.get(module)
+    if compiled is None:
+        compiled = _COMPILED.setdefault(module, {})
+    code = compiled.get(source)
+    if code is None:
+        code = compiled[source] = compile(source, "<annotation>", "eval")
+    return code
+
+
+def _resolve_class(cls: type) -> dict[str, Any] | None:
+    """
+    按 `typing.get_type_hints` 的规则解析类的注解：沿 MRO 从基类到子类合并，字符串注解以类的属性为全局、
+    模块的全局变量为局部变量求值。需要 `typing` 进一步处理的注解返回 None
+    """
+    hints: dict[str, Any] = {}
+    for base in reversed(cls.__mro__):
+        ann = vars(base).get("__annotations__")
+        if not isinstance(ann, dict) or not ann:
+            continue
+        module = sys.modules.get(base.__module__)
+        module_globals = getattr(module, "__dict__", {})
+        class_locals = None
+        for name, value in ann.items():
+            if value is None:
+                value = type(None)
+            elif isinstance(value, str):
+                if class_locals is None:
+                    class_locals = dict(vars(base))
+                try:
+                    value = eval(_compile(base.__module__, value), class_locals, module_globals)
+                except Exception:
+                    return None
+            if not _plain(value):
+                return None
+            hints[name] = value
+    return hints
+
+
+def _plain(tp: Any) -> bool:
+    """类型中没有前向引用、字符串和 `Annotated`、`Required` 等包装，即 `typing.get_type_hints` 不会再做任何处理"""
+    stack = [tp]
+    while stack:
+        tp = stack.pop()
+        if tp is None or isinstance(tp, (str, ForwardRef)):
+            return False
+        if isinstance(tp, (list, tuple)):  # Callable 的参数列表
+            stack.extend(tp)
+            continue
+        origin = get_origin(tp)
+        if origin in _EXTRAS:
+            return False
+        if origin is not typing.Literal:  # Literal 的参数是值而不是类型
+            stack.extend(get_args(tp))
+    return True
+
+
+__all__ = [
+    "get_type_hints",
+    "clear_type_hints_cache",
+]
@@ -0,0 +1,646 @@
+"""
+TypeScript 声明的中间表示（IR）
+
+转换器和插件可以返回这里的声明节点，而不是拼接好的 TypeScript 代码：
+
+- `str(node)` 为紧凑输出，与以前直接拼接的代码相同，存储、缓存和未格式化的输出都使用它；
+- `format_declaration(node, indent_level)` 直接按结构输出格式化后的代码，结果与用
+  `TypeScriptFormatter` 格式化紧凑输出逐字节相同，但不需要重新切分整段代码。
+
+`map_base_type` 的结果中带有类型表达式的节点（`result_node`）：列表、元组为 `Array` / `Tuple`，
+联合、可选类型为 `Union`，`Literal[...]` 为 `Literal`，字典、集合和已声明的名称为 `Reference`，
+内置插件和函数签名的字段类型都使用这些节点，其他后端（如生成 JSON Schema 或文档）可以直接遍历。
+插件或自定义处理器返回的代码（`Raw`）及声明的开头按词法单元直接输出；只有含有注释、未闭合的字符串等
+需要结合上下文处理的代码时，整个声明才交给格式化器。打印不保存任何跨会话的状态。
+
+Example:
+    >>> node = Interface("User", [Field("id", Reference("number")), Field("name", Union([Reference("string"), Reference("undefined")]), True)])
+    >>> str(node)
+    'type User = {\\n  id: number;\\n  name?: string | undefined;\\n}'
+    >>> print(format_declaration(node))
+    type User = {
+        id : number;
+        name ? : string | undefined;
+    }
+"""
+
+import re
+from typing import Any, Iterable, NamedTuple
+
+from pytots.formart import _TOKEN
+
+# 格式化时每一层缩进的空白，与 `TypeScriptFormatter` 的默认值一致
+INDENT = " " * 4
+
+
+class Node:
+    """IR 节点的基类"""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __hash__(self) -> int:
+        return hash((type(self), *(getattr(self, name) for name in self.__slots__)))
+
+
+# ---------------------------------------------------------------- 类型表达式
+
+
+class TypeNode(Node):
+    """类型表达式，创建后不应再修改（紧凑输出在第一次 `str()` 时缓存）"""
+
+    __slots__ = ("_code",)
+
+    def __str__(self) -> str:
+        try:
+            return self._code
+        except AttributeError:
+            self._code = code = self._compact()
+            return code
+
+    def _compact(self) -> str:
+        """紧凑输出"""
+        raise NotImplementedError
+
+    def _print(self, indent_level: int, paren_level: int) -> "_Piece | None":
+        """格式化输出（不含前导空白），无法直接输出时返回 None"""
+        return _piece(str(self), indent_level, paren_level)
+
+
+class Raw(TypeNode):
+    """已经是 TypeScript 代码的类型表达式，如 `map_base_type` 的结果"""
+
+    __slots__ = ("code",)
+
+    def __init__(self, code: str) -> None:
+        self.code = code
+
+    def __str__(self) -> str:
+        return self.code
+
+
+class Reference(TypeNode):
+    """类型引用，可以带类型参数：`Name` 或 `Name<A, B>`"""
+
+    __slots__ = ("name", "args")
+
+    def __init__(self, name: str, args: Iterable[TypeNode] = ()) -> None:
+        self.name = name
+        self.args = tuple(args)
+
+    def _compact(self) -> str:
+        if not self.args:
+            return self.name
+        return f"{self.name}<{', '.join(map(str, self.args))}>"
+
+    def _print(self, indent_level: int, paren_level: int) -> "_Piece | None":
+        if not _PLAIN.fullmatch(self.name):
+            return None
+        if not self.args:
+            return _Piece(self.name, False, False)
+        args = _join(self.args, _COMMA, indent_level, paren_level)
+        return None if args is None else _Piece(f"{self.name}<{args.text}>", False, False)
+
+
+class Array(TypeNode):
+    """数组：`Array<T>`，shorthand 为 True 时为 `T[]`"""
+
+    __slots__ = ("element", "shorthand")
+
+    def __init__(self, element: TypeNode, shorthand: bool = False) -> None:
+        self.element = element
+        self.shorthand = shorthand
+
+    def _compact(self) -> str:
+        if self.shorthand:
+            return f"{self.element}[]"
+        return f"Array<{self.element}>"
+
+    def _print(self, indent_level: int, paren_level: int) -> "_Piece | None":
+        element = self.element._print(indent_level, paren_level)
+        if element is None:
+            return None
+        if self.shorthand:
+            return _Piece(f"{element.text}[]", element.string_start, False)
+        return _Piece(f"Array<{element.text}>", False, False)
+
+
+class Tuple(TypeNode):
+    """定长元组：`[A, B]`"""
+
+    __slots__ = ("elements",)
+
+    def __init__(self, elements: Iterable[TypeNode]) -> None:
+        self.elements = tuple(elements)
+
+    def _compact(self) -> str:
+        return f"[{', '.join(map(str, self.elements))}]"
+
+    def _print(self, indent_level: int, paren_level: int) -> "_Piece | None":
+        if not self.elements:
+            return _Piece("[]", False, False)
+        elements = _join(self.elements, _COMMA, indent_level, paren_level)
+        return None if elements is None else _Piece(f"[{elements.text}]", False, False)
+
+
+class Union(TypeNode):
+    """联合类型：`A | B`"""
+
+    __slots__ = ("members",)
+
+    def __init__(self, members: Iterable[TypeNode]) -> None:
+        self.members = tuple(members)
+
+    def _compact(self) -> str:
+        return " | ".join(map(str, self.members))
+
+    def _print(self, indent_level: int, paren_level: int) -> "_Piece | None":
+        return _join(self.members, _BAR, indent_level, paren_level) if self.members else None
+
+
+class Literal(TypeNode):
+    """字面量类型，与 `Literal[...]` 的映射相同：字符串加单引号，布尔值为小写"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def _compact(self) -> str:
+        if isinstance(self.value, str):
+            return f"'{self.value}'"
+        if isinstance(self.value, bool):
+            return str(self.value).lower()
+        return str(self.value)
+
+
+# ---------------------------------------------------------------- 声明
+
+
+class Field(Node):
+    """对象类型的字段：`name: T;` 或 `name?: T;`"""
+
+    __slots__ = ("name", "type", "optional")
+
+    def __init__(self, name: str, type: TypeNode, optional: bool = False) -> None:
+        self.name = name
+        self.type = type
+        self.optional = optional
+
+    def __str__(self) -> str:
+        return f"{self.name}{'?' if self.optional else ''}: {self.type};"
+
+
+class Parameter(Node):
+    """函数参数：`name: T` 或 `name?: T`"""
+
+    __slots__ = ("name", "type", "optional")
+
+    def __init__(self, name: str, type: TypeNode, optional: bool = False) -> None:
+        self.name = name
+        self.type = type
+        self.optional = optional
+
+    def __str__(self) -> str:
+        return f"{self.name}{'?' if self.optional else ''}: {self.type}"
+
+
+class EnumMember(Node):
+    """枚举成员：字符串的值加单引号，其余的值直接输出"""
+
+    __slots__ = ("name", "value")
+
+    def __init__(self, name: str, value: Any) -> None:
+        self.name = name
+        self.value = value
+
+    def __str__(self) -> str:
+        return f"{self.name} = {self._value()}"
+
+    def _value(self) -> str:
+        return f"'{self.value}'" if isinstance(self.value, str) else f"{self.value}"
+
+
+class DeclarationNode(Node):
+    """顶层声明，创建后不应再修改（紧凑输出在第一次 `str()` 时缓存）"""
+
+    __slots__ = ("_code",)
+
+    name: str
+
+    def __str__(self) -> str:
+        try:
+            return self._code
+        except AttributeError:
+            self._code = code = self._compact()
+            return code
+
+    def _compact(self) -> str:
+        """紧凑输出"""
+        raise NotImplementedError
+
+    def _format(self, indent_level: int, prefix: str) -> str | None:
+        """格式化输出，无法直接输出时返回 None"""
+        raise NotImplementedError
+
+
+class TypeAlias(DeclarationNode):
+    """类型别名：`type Name<P> = T;`"""
+
+    __slots__ = ("name", "type", "type_params")
+
+    def __init__(self, name: str, type: TypeNode, type_params: Iterable[str] = ()) -> None:
+        self.name = name
+        self.type = type
+        self.type_params = tuple(type_params)
+
+    def _head(self) -> str:
+        params = f"<{', '.join(self.type_params)}>" if self.type_params else ""
+        return f"type {self.name}{params}"
+
+    def _compact(self) -> str:
+        return f"{self._head()} = {self.type};"
+
+    def _format(self, indent_level: int, prefix: str) -> str | None:
+        head = _print_head(prefix + self._head(), indent_level)
+        type_ = _print_type(self.type, indent_level, 0)
+        if head is None or type_ is None:
+            return None
+        return f"{head} ={type_};"
+
+
+class Interface(DeclarationNode):
+    """
+    对象类型，由插件的 `type_prefix` 决定输出形式：
+    `type Name<P> = {...}&A & B;` 或 `interface Name extends A, B<P> {...}`
+    """
+
+    __slots__ = ("name", "fields", "type_params", "extends", "keyword")
+
+    def __init__(
+        self,
+        name: str,
+        fields: Iterable[Field],
+        type_params: Iterable[str] = (),
+        extends: Iterable[str] = (),
+        keyword: str = "type",
+    ) -> None:
+        self.name = name
+        self.fields = tuple(fields)
+        self.type_params = tuple(type_params)
+        self.extends = tuple(extends)
+        self.keyword = keyword
+
+    def _head(self) -> str:
+        params = f"<{', '.join(self.type_params)}>" if self.type_params else ""
+        if self.keyword == "interface":
+            extends = f" extends {', '.join(self.extends)}" if self.extends else ""
+            return f"interface {self.name}{extends}{params}"
+        return f"type {self.name}{params}"
+
+    def _compact(self) -> str:
+        fields = "\n  ".join(map(str, self.fields))
+        if self.keyword == "interface":
+            return f"{self._head()} {{\n  {fields}\n}}"
+        extends = f" &{' & '.join(self.extends)};" if self.extends else ""
+        return f"{self._head()} = {{\n  {fields}\n}}{extends}"
+
+    def _format(self, indent_level: int, prefix: str) -> str | None:
+        head = _print_head(prefix + self._head(), indent_level)
+        if head is None:
+            return None
+        indent = "\n" + INDENT * indent_level
+        field_indent = indent + INDENT
+        lines = [head + (" {" if self.keyword == "interface" else " = {")]
+        for field in self.fields:
+            type_ = _print_type(field.type, indent_level + 1, 0)
+            if type_ is None or not _is_word(field.name):
+                return None
+            lines.append(f"{field_indent}{field.name}{' ? :' if field.optional else ' :'}{type_};")
+        lines.append(f"{indent}}}")
+        if self.extends and self.keyword != "interface":
+            extends = _print_head(f"&{' & '.join(self.extends)}", indent_level)
+            if extends is None:
+                return None
+            lines.append(f"{indent}{extends};")
+        return "".join(lines)
+
+
+class Enum(DeclarationNode):
+    """枚举：`enum Name { A = 'a', B = 1, }`"""
+
+    __slots__ = ("name", "members")
+
+    def __init__(self, name: str, members: Iterable[EnumMember]) -> None:
+        self.name = name
+        self.members = tuple(members)
+
+    def _compact(self) -> str:
+        members = ",\n  ".join(map(str, self.members))
+        return f"enum {self.name} {{\n  {members},\n}}"
+
+    def _format(self, indent_level: int, prefix: str) -> str | None:
+        head = _print_head(f"{prefix}enum {self.name}", indent_level)
+        if head is None or not self.members:
+            return None
+        members = []
+        for member in self.members:
+            value = _print_code(member._value(), indent_level + 1, 0)
+            if value is None or not _is_word(member.name):
+                return None
+            members.append(f"{member.name} ={value},")
+        indent = "\n" + INDENT * indent_level
+        return f"{head} {{{indent}{INDENT}{'  '.join(members)}{indent}}}"
+
+
+class FunctionDecl(DeclarationNode):
+    """函数签名：`function name(a: A, b?: B): R;`"""
+
+    __slots__ = ("name", "params", "returns")
+
+    def __init__(self, name: str, params: Iterable[Parameter], returns: TypeNode) -> None:
+        self.name = name
+        self.params = tuple(params)
+        self.returns = returns
+
+    def _compact(self) -> str:
+        return f"function {self.name}({', '.join(map(str, self.params))}): {self.returns};"
+
+    def _format(self, indent_level: int, prefix: str) -> str | None:
+        head = _print_head(f"{prefix}function {self.name}", indent_level)
+        returns = _print_type(self.returns, indent_level, 0)
+        if head is None or returns is None or not (self.name[-1:].isalnum() or self.name[-1:] == "_"):
+            return None
+        params = []
+        for param in self.params:
+            type_ = _print_type(param.type, indent_level, 1)
+            if type_ is None or not _is_word(param.name):
+                return None
+            params.append(f"{param.name}{'?:' if param.optional else ':'}{type_}")
+        return f"{head} ({',  '.join(params)}) :{returns};"
+
+
+# ---------------------------------------------------------------- 输出
+
+
+def format_declaration(node: "DeclarationNode | str", indent_level: int = 0, prefix: str = "") -> str | None:
+    """
+    直接输出声明格式化后的代码，与 `TypeScriptFormatter().format_declaration(prefix + str(node), indent_level)`
+    的结果相同；声明中有需要结合上下文格式化的片段（如未闭合的括号或字符串）时返回 None。
+    结构化的节点按结构输出，代码（如插件返回的字符串）和不能按结构输出的节点按紧凑输出的词法单元输出
+    Args:
+        node: 声明或声明的代码
+        indent_level: 声明所在的缩进层级，在命名空间中为 1
+        prefix: 声明之前的修饰，如 "declare " 或 "export "
+    """
+    if isinstance(node, DeclarationNode):
+        output = node._format(indent_level, prefix)
+        if output is not None:
+            return output
+    return _print_declaration(prefix + str(node), indent_level)
+
+
+# 格式化器原样输出的片段：以单个空格分隔的普通字符序列，以及不含转义的单引号字符串
+_WORD = r"[^\s{}();,'\"`=?:+\-*%/]+"
+_PLAIN = re.compile(f"{_WORD}(?: {_WORD})*")
+_WORD_CHAR = re.compile(_WORD)
+_STRING = re.compile(r"'[^'\\]*'")
+
+# 分隔符：(其后为普通字符时, 其后为字符串时) 的格式化结果。逗号后总是补一个空格，
+# 输入中原有的空格在普通字符之前再保留一个；字符串之前的空格不保留
+_COMMA = (",  ", ", ")
+_BAR = (" | ", " |")
+
+
+class _Piece(NamedTuple):
+    """类型表达式格式化后的文本（不含前导空白），及其是否以字符串开始、结束"""
+
+    text: str
+    string_start: bool
+    string_end: bool
+
+
+def _join(nodes: Iterable[TypeNode], separator: tuple[str, str], indent_level: int, paren_level: int) -> _Piece | None:
+    """以 separator 分隔输出各节点"""
+    texts: list[str] = []
+    first = last = None
+    for node in nodes:
+        piece = node._print(indent_level, paren_level)
+        if piece is None:
+            return None
+        if first is None:
+            first = piece
+        else:
+            texts.append(separator[piece.string_start])
+        texts.append(piece.text)
+        last = piece
+    if first is None or last is None:
+        return None
+    return _Piece("".join(texts), first.string_start, last.string_end)
+
+
+def _piece(code: str, indent_level: int, paren_level: int) -> _Piece | None:
+    """
+    代码形式的类型表达式：原样输出的片段直接返回；以普通字符或字符串开始和结束的其余代码按词法单元输出，
+    以其他字符开始或结束时返回 None（与前后的片段一起才能确定格式）
+    """
+    if _PLAIN.fullmatch(code):
+        return _Piece(code, False, False)
+    if _STRING.fullmatch(code):
+        return _Piece(code, True, True)
+    m = _TOKEN.match(code)
+    if m is None or m.lastgroup not in ("word", "string") or m.start(m.lastgroup):
+        return None
+    string_end = code[-1] == "'" or code[-1] == '"' or code[-1] == "`"
+    if not string_end and not _WORD_CHAR.fullmatch(code[-1]):
+        return None
+    text = _print_inline(code, indent_level, paren_level)
+    if text is None:
+        return None
+    string_start = m.lastgroup == "string"
+    return _Piece(text if string_start else text[1:], string_start, string_end)
+
+
+def _print_type(node: TypeNode, indent_level: int, paren_level: int) -> str | None:
+    """紧跟在 `: ` 或 `= ` 之后的类型表达式格式化后的文本，结构化的节点直接输出"""
+    code = str(node)
+    if _is_word(code):  # 最常见的情况：没有逗号和字符串，原样输出
+        return " " + code
+    try:
+        piece = node._print(indent_level, paren_level)
+    except RecursionError:  # 嵌套很深的类型表达式按紧凑输出的词法单元输出
+        piece = None
+    if piece is None:
+        return _print_inline(code, indent_level, paren_level)
+    return piece.text if piece.string_start else " " + piece.text
+
+
+def _print_code(code: str, indent_level: int, paren_level: int) -> str | None:
+    """紧跟在 `: ` 或 `= ` 之后的代码（如枚举值）格式化后的文本"""
+    piece = _piece(code, indent_level, paren_level)
+    if piece is None:
+        return _print_inline(code, indent_level, paren_level)
+    return piece.text if piece.string_start else " " + piece.text
+
+
+def _print_head(code: str, indent_level: int) -> str | None:
+    """
+    声明开头（关键字、名称、类型参数和继承的类型）格式化后的文本。
+    只由普通字符序列和逗号组成时直接输出，否则按词法单元输出
+    """
+    parts = code.split(",")
+    texts = [parts[0]]
+    if not _PLAIN.fullmatch(parts[0]):
+        return _print_inline(code, indent_level, 0, space=False)
+    for part in parts[1:]:
+        spaced = part[:1] == " "
+        if not _PLAIN.fullmatch(part[1:] if spaced else part):
+            return _print_inline(code, indent_level, 0, space=False)
+        texts.append((",  " + part[1:]) if spaced else (", " + part))
+    return "".join(texts)
+
+
+def _print_inline(code: str, indent_level: int, paren_level: int, space: bool = True) -> str | None:
+    """
+    一行中的一段代码（如 `Raw` 的类型表达式，space 为其前面是否有空白）格式化后的文本，
+    与 `TypeScriptFormatter.format_inline` 相同；需要换行才能结束时返回 None
+    """
+    printed = _print_tokens(code, indent_level, paren_level, space)
+    return printed[0] if printed is not None and not printed[1] else None
+
+
+def _print_declaration(code: str, indent_level: int) -> str | None:
+    """
+    以普通字符开始、以 ; 或 } 结束的声明代码格式化后的文本，与 `TypeScriptFormatter.format_declaration` 相同
+    """
+    m = _TOKEN.match(code)
+    if m is None or m.lastgroup != "word" or m.start("word"):
+        return None
+    printed = _print_tokens(code, indent_level, 0, False)
+    return printed[0] if printed is not None and printed[1] else None
+
+
+def _print_tokens(code: str, indent_level: int, paren_level: int, space: bool) -> tuple[str, bool] | None:
+    """
+    从一行的中间（上一个字符为标点）按词法单元输出 code，规则与 `TypeScriptFormatter` 相同，
+    返回 (格式化后的文本, 之后是否需要换行)。代码中有未闭合的字符串或注释，
+    或者没有结束在原来的层级时返回 None，交给格式化器与上下文一起处理
+    """
+    out: list[str] = []
+    tail = ""  # 尚未写出的空白，换行时被替换
+    last = ";"  # 最后一个非空白字符
+    newline = False  # 下一个普通字符之前是否需要换行
+    indent, paren = indent_level, paren_level
+    for m in _TOKEN.finditer(code):
+        kind = m.lastgroup
+        text = m.group(kind)
+        if len(text) != m.end() - m.start():
+            space = True  # 前导空白
+        if kind == "space":
+            space = True
+        elif kind == "op" and not paren:
+            # 不是 ==、=>、++ 等双字符操作符时两边有空格，后置空格由下一个单元决定
+            next_char = code[m.end() : m.end() + 1]
+            double = next_char == text or next_char == "=" or (text == "=" and next_char == ">")
+            if not double and tail[-1:] != " ":
+                tail += " "
+            out.append(tail)
+            out.append(text)
+            tail, last, space = "", text, not double
+        elif kind == "word" or kind == "other" or kind == "op":
+            if newline:
+                tail = "\n" + INDENT * indent
+                newline = False
+            elif space:
+                tail += " "
+            out.append(tail)
+            out.append(text)
+            tail, last, space = "", text[-1], False
+        elif kind == "semi":
+            out.append(tail)
+            out.append(";")
+            last, space = ";", False
+            if paren:
+                tail = " "
+            else:
+                tail, newline = "", True
+        elif kind == "open":
+            if tail[-1:] != " " and tail[-1:] != "\n":
+                tail += " "
+            out.append(tail)
+            out.append("{")
+            tail, last, space, newline = "", "{", False, True
+            indent += 1
+        elif kind == "close":
+            indent = max(0, indent - 1)
+            out.append("\n" + INDENT * indent)
+            out.append("}")
+            tail, last, space, newline = "", "}", False, True
+        elif kind == "comma" or kind == "lparen" or kind == "rparen":
+            if kind == "lparen" and not tail and (last.isalnum() or last == "_"):
+                tail = " "  # if( -> if (
+            out.append(tail)
+            out.append(text)
+            tail, last, space = "", text, False
+            if kind == "comma":
+                tail = " "  # 逗号后加空格
+            elif kind == "lparen":
+                paren += 1
+            else:
+                paren = max(0, paren - 1)
+        elif kind == "string":
+            out.append(tail)
+            out.append(text)
+            tail, last, space = "", text[-1], False
+        elif kind == "block" or (kind == "line" and text[-1] == "\n"):
+            # 注释前补一个空格（块注释在需要换行时先换行），注释结束后换行，末尾的空白在换行时被替换
+            if kind == "block" and newline:
+                tail = "\n" + INDENT * indent
+            elif tail[-1:] != " " and tail[-1:] != "\n":
+                tail += " "
+            if kind == "line":
+                text = text[:-1]
+            stripped = text.rstrip()
+            out.append(tail)
+            out.append(stripped)
+            tail, last, space, newline = text[len(stripped) :], stripped[-1], False, True
+        else:  # 未闭合的字符串和注释
+            return None
+    if tail or indent != indent_level or paren != paren_level:
+        return None
+    return "".join(out), newline
+
+
+def _is_word(code: str) -> bool:
+    """名称或类型表达式是否为格式化时原样输出的普通字符序列，常见的标识符不需要匹配正则表达式"""
+    return code.isidentifier() or _PLAIN.fullmatch(code) is not None
+
+
+__all__ = [
+    "INDENT",
+    "Node",
+    "TypeNode",
+    "Raw",
+    "Reference",
+    "Array",
+    "Tuple",
+    "Union",
+    "Literal",
+    "Field",
+    "Parameter",
+    "EnumMember",
+    "DeclarationNode",
+    "TypeAlias",
+    "Interface",
+    "Enum",
+    "FunctionDecl",
+    "format_declaration",
+]
@@ -1,22 +1,10 @@
-from typing import Optional, Dict, Any
-from pytots.type_map import map_base_type
-from pytots.processer import (
-    process_newType,
-    process_typeVar,
-    process_enum,
-    process_missing,
-    STORE_PROCESSED_NEWTYPE,
-    STORE_PROCESSED_TYPEVAR,
-    STORE_PROCESSED_ENUM,
-    STORE_PROCESSED_MISSING,
-)
-from pytots.formart import TypeScriptFormatter
-
-from pytots.plugin import use_plugin
-from pytots.plugin.inner import DataclassPlugin, TypedDictPlugin
+from typing import Any, Callable, Iterator
 
-use_plugin(DataclassPlugin())
-use_plugin(TypedDictPlugin())
+from pytots.type_map import map_base_type
+from pytots.cache import CacheInfo
+from pytots.context import ConversionContext
+from pytots.converter import DEFAULT_CONVERTER, RootResult
+from pytots.shard import module_key
 
 
 
@@ -26,94 +14,113 @@ def convert_to_ts(obj) -> str:
 
     - `convert_to_ts` 可以自动识别引用的类型，并递归转换，确保所有类型都被正确处理。
     - `convert_to_ts`函数具有全局状态，每次调用会累积转换结果，如果需要重置状态，需调用`reset_store`函数
+    - 需要多份互不影响的输出时，使用 `pytots.Converter` 创建独立的转换会话
+    """
+    if (context := ConversionContext.current()) is not None:
+        # 在插件中调用时沿用当前的转换上下文（及其所属的会话）
+        return map_base_type(obj, context)['code']
+    return DEFAULT_CONVERTER.convert_to_ts(obj)
+
+
+def convert_many(types, workers: int | None = None) -> list[RootResult]:
+    """
+    在线程池中批量转换多个根类型，共享的依赖只转换一次，输出与逐个调用 `convert_to_ts` 一致。
+    Args:
+        types: 根类型
+        workers: 线程数，为 None 时由 `ThreadPoolExecutor` 决定
+    Returns:
+        按输入顺序排列的各根类型的结果（`type`、`code`）和转换耗时（`elapsed`，秒）
     """
-    processer = {
-        "process_newType": process_newType,
-        "process_typeVar": process_typeVar,
-        "process_enum": process_enum,
-        "process_missing": process_missing,
-    }
-    return map_base_type(obj, **processer)['code']
+    return DEFAULT_CONVERTER.convert_many(types, workers)
 
 
 def get_output_ts_str(
     module_name: str | None = "PytsDemo",
-    format:bool = False
+    format:bool = False,
+    workers: int | None = 1,
 ) -> str:
     """
     将 Python 对象转换为 TypeScript 定义并返回字符串。
     Args:
         module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
         format: 是否格式化输出，默认值为 False
+        workers: 格式化的进程数，默认为 1，为 None 时使用 CPU 核数，输出很大时并行格式化
     Returns:
         TypeScript 定义字符串
     """
+    return DEFAULT_CONVERTER.get_output_ts_str(module_name, format, workers)
 
-    result = [
-        *STORE_PROCESSED_NEWTYPE.values(),
-        # *STORE_PROCESSED_TYPEVAR.values(),
-        *STORE_PROCESSED_ENUM.values(),
-    ]
-
-    # 生成原始 TypeScript 代码
-    if module_name is None or type(module_name) != str or not module_name.strip():
-        # 使用非模块声明输出
-        for type_name in STORE_PROCESSED_MISSING.keys():
-            if type_name == "function":
-                result.extend(["declare "+c for c in STORE_PROCESSED_MISSING['function'].values()])
-            else:
-                result.extend(STORE_PROCESSED_MISSING[type_name].values())
-        ts_code = "\n  ".join(result)
-        
-    else:
-        # 使用模块声明输出
-        missing_types = [
-            content
-            for type_name in STORE_PROCESSED_MISSING.keys()
-            for content in STORE_PROCESSED_MISSING[type_name].values()
-        ]
-        # 首字母大写
-        module_name = module_name.capitalize()
-        ts_code = "declare namespace {} {{\n  {}\n}}".format(
-            module_name, "\n  ".join(result+missing_types)
-        )
-
-    # 应用格式化（如果提供了格式化选项）
-    if format:
-        formatter = TypeScriptFormatter()
-        ts_code = formatter.format(ts_code)
-
-    return ts_code
+
+def iter_output_ts(
+    module_name: str | None = "PytsDemo",
+    format: bool = False,
+    workers: int | None = 1,
+) -> Iterator[str]:
+    """
+    逐个声明地产出 TypeScript 定义，拼接后与 `get_output_ts_str` 的结果相同。
+    Args:
+        module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
+        format: 是否格式化输出，默认值为 False
+        workers: 格式化的进程数，见 `get_output_ts_str`
+    """
+    return DEFAULT_CONVERTER.iter_output_ts(module_name, format, workers)
 
 
 def output_ts_file(
     file_path: str,
     module_name: str | None = "PytsDemo",
     format:bool = True,
-) -> None:
+    if_changed: bool = False,
+    stream: bool = False,
+    workers: int | None = 1,
+) -> bool:
     """
     将 Python 对象转换为 TypeScript 定义并输出到文件。
     Args:
         file_path: 输出文件路径
         module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
         format: 是否格式化输出，默认值为 True
+        if_changed: 为 True 时内容未变化则不写入文件，否则原子地替换文件
+        stream: 为 True 时逐个声明地写入，不在内存中生成完整的输出
+        workers: 格式化的进程数，见 `get_output_ts_str`
+    Returns:
+        文件内容是否发生了变化
     """
+    return DEFAULT_CONVERTER.output_ts_file(file_path, module_name, format, if_changed, stream, workers)
 
-    import os
-    # 判断目录是否存储在,不存在则创建
-    if not os.path.exists(os.path.dirname(file_path)):
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
-    with open(file_path, "w", encoding="utf-8") as f:
-        result = get_output_ts_str(module_name, format)
-        f.write(result)
+
+def output_ts_shards(
+    directory: str,
+    key: Callable[[Any], str] = module_key,
+    format: bool = True,
+    index: str | None = "index.ts",
+    workers: int | None = None,
+) -> dict[str, bool]:
+    """
+    将已转换的声明按 Python 模块（或 key 返回的分组）分别写入 directory 下的 `.ts` 文件，
+    跨文件的引用生成 `import type`，并生成索引文件。内容未变化的文件不会被重写。
+    Args:
+        directory: 输出目录
+        key: 声明的类型 -> 分组名（即分片相对 directory 的路径，不含扩展名），默认为所在的 Python 模块
+        format: 是否格式化输出，默认值为 True
+        index: 索引文件名，为 None 时不生成索引文件
+        workers: 写文件的线程数
+    Returns:
+        文件路径 -> 内容是否发生了变化
+    """
+    return DEFAULT_CONVERTER.output_ts_shards(directory, key, format, index, workers)
 
 
 def reset_store() -> None:
     """
     清除所有已转换的 TypeScript 定义。
     """
-    STORE_PROCESSED_NEWTYPE.clear()
-    STORE_PROCESSED_TYPEVAR.clear()
-    STORE_PROCESSED_ENUM.clear()
-    STORE_PROCESSED_MISSING.clear()
+    DEFAULT_CONVERTER.reset_store()
+
+
+def cache_info() -> CacheInfo:
+    """
+    获取转换缓存的统计信息（命中数、未命中数、容量、当前条目数）。
+    通过 `pytots.cache.CONVERSION_CACHE.resize` 可调整缓存容量，为 0 时禁用缓存。
+    """
+    return DEFAULT_CONVERTER.cache_info()
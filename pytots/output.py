@@ -0,0 +1,118 @@
+"""
+文件输出
+
+`write_file` 为各输出入口（`output_ts_file`、`pytots.parallel.output_package`、监视模式、构建缓存）
+共用的写文件逻辑。`if_changed=True` 时先比较内容的哈希，内容相同则不写入，文件的修改时间保持不变，
+下游的 `tsc` / Vite 等不会因此重新构建；内容不同时写入同目录下的临时文件再原子地替换，
+读取方不会看到写了一半的文件。内容也可以是逐段产出的迭代器（如 `Converter.iter_output_ts`），
+此时边写边计算哈希，不需要在内存中拼接完整的输出。
+"""
+
+import hashlib
+import os
+import secrets
+import stat
+from typing import Iterable
+
+_BUFFER_SIZE = 1 << 16
+
+# 临时文件在 O_BINARY 可用的平台（Windows）上以二进制方式打开
+_TEMP_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+
+
+def _encode(content: str) -> bytes:
+    """按文本模式写入时的字节：换行符转换为平台的换行符"""
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    return content.encode("utf-8")
+
+
+def _same_content(file_path: str, size: int, digest: bytes) -> bool:
+    """文件的内容是否与给定的大小和哈希相同：先比较大小，再分块计算哈希"""
+    try:
+        if os.path.getsize(file_path) != size:
+            return False
+        existing = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_BUFFER_SIZE), b""):
+                existing.update(chunk)
+    except OSError:
+        return False
+    return existing.digest() == digest
+
+
+def _create_temp(file_path: str) -> tuple[int, str]:
+    """
+    在目标文件所在目录创建临时文件，返回 (文件描述符, 路径)。
+    以 0o666 创建，由内核按进程的 umask 设置权限，与直接 open 新建文件时相同
+    """
+    directory, name = os.path.split(file_path)
+    while True:
+        tmp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(tmp, _TEMP_FLAGS, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+def write_file(file_path: str, content: str | Iterable[str], if_changed: bool = False) -> bool:
+    """
+    以 UTF-8 写入文本文件，目录不存在时自动创建。
+    Args:
+        file_path: 文件路径
+        content: 文件内容，也可以是依次产出各段内容的可迭代对象，各段经缓冲写入，不会拼接成完整的字符串
+        if_changed: 为 True 时内容未变化则跳过写入，否则写入临时文件后原子替换；
+            为 False 时直接覆盖写入
+    Returns:
+        文件内容是否发生了变化（`if_changed=False` 时总是 True）
+    """
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    streaming = not isinstance(content, str)
+
+    if not if_changed:
+        with open(file_path, "w", encoding="utf-8", buffering=_BUFFER_SIZE) as f:
+            if streaming:
+                f.writelines(content)
+            else:
+                f.write(content)
+        return True
+
+    if streaming:
+        blocks: Iterable[bytes] = map(_encode, content)
+    else:
+        # 完整的内容已在内存中，先比较，相同时不必写入临时文件
+        data = _encode(content)
+        if _same_content(file_path, len(data), hashlib.sha256(data).digest()):
+            return False
+        blocks = (data,)
+
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)  # 替换已有文件时保留其权限
+    except OSError:
+        mode = None
+    fd, tmp = _create_temp(file_path)
+    try:
+        digest, size = hashlib.sha256(), 0
+        with os.fdopen(fd, "wb", buffering=_BUFFER_SIZE) as f:
+            for block in blocks:
+                f.write(block)
+                digest.update(block)
+                size += len(block)
+        if streaming and _same_content(file_path, size, digest.digest()):
+            os.unlink(tmp)
+            return False
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, file_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return True
+
+
+__all__ = [
+    "write_file",
+]
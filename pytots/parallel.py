@@ -0,0 +1,356 @@
+"""
+多进程转换整个包
+
+按模块把转换工作分给进程池：每个工作进程导入模块、转换模块中可转换的类型（由 `pytots.scanner` 发现），
+并以可序列化的声明记录（`DeclarationRecord`）返回结果。其他待转换模块的公开类型只记录引用，
+由其所在模块的工作进程负责转换，因此每个声明只会被转换一次（包外的公共依赖除外，它们由合并去重）。
+父进程合并记录、检查重名，按依赖关系重建与逐个转换一致的顺序，
+再渲染为与 `get_output_ts_str` 相同格式的输出。
+
+Example:
+    >>> from pytots.parallel import convert_package, render_declarations
+    >>> records = convert_package(["backend.models"], workers=8, preload=["pydantic", "sqlmodel"])
+    >>> ts = render_declarations(records, None, format=True)
+"""
+
+import importlib
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from types import ModuleType
+from typing import Any, Iterable, NamedTuple
+
+from pytots.build_cache import BuildCache, BuildReport, config_signature
+from pytots.converter import DEFAULT_CONVERTER, Converter
+from pytots.output import write_file
+from pytots.render import render_ts
+from pytots.scanner import Scanner
+from pytots.store import (
+    NEWTYPE_CATEGORY,
+    ENUM_CATEGORY,
+    MISSING_CATEGORY,
+    TYPEVAR_CATEGORY,
+    Store,
+    declaration_modules,
+    walk_dependencies,
+)
+
+# 声明所在的分区：NewType、类型变量、枚举（`processed_enum`），其余声明（`processed_missing`）按分类输出
+MISSING_SECTION = MISSING_CATEGORY
+
+
+class DeclarationRecord(NamedTuple):
+    """可在进程间传递的声明记录"""
+
+    key: str  # 声明的唯一标识："模块名.限定名"
+    section: str  # 所在分区：newtype、typevar、enum 或 missing
+    category: str  # 声明的分类，即 `Declaration.category`
+    name: str  # 声明名称
+    code: str  # TypeScript 代码
+    deps: tuple[str, ...]  # 引用的其他声明的 key
+
+
+class ModuleRecords(NamedTuple):
+    """单个模块的转换结果"""
+
+    module: str  # 模块名
+    refs: tuple[str, ...]  # 模块的公开类型依次引用的声明的 key
+    records: list[DeclarationRecord]  # 在该模块的会话中生成的声明
+    modules: tuple[str, ...] = ()  # 这些声明所依赖的其他模块
+
+
+def declaration_key(type_: Any) -> str:
+    """声明的唯一标识，由模块名和限定名组成"""
+    name = getattr(type_, "__qualname__", None) or getattr(type_, "__name__", None) or repr(type_)
+    return f"{getattr(type_, '__module__', None)}.{name}"
+
+
+def export_records(store: Store, refs: Iterable) -> list[DeclarationRecord]:
+    """按依赖顺序导出从 refs 出发可达的全部声明，由外部提供的声明只出现在依赖中"""
+    records = []
+    for type_ in store.dependency_order(refs):
+        declaration = store.declaration_index[type_]
+        records.append(
+            DeclarationRecord(
+                declaration_key(type_),
+                declaration.section,
+                declaration.category,
+                declaration.name,
+                declaration.code,
+                _keys(store, store.dependencies.get(type_, ())),
+            )
+        )
+    return records
+
+
+def _keys(store: Store, refs: Iterable) -> tuple[str, ...]:
+    """已声明或由外部提供的类型的 key，去除重复并保持顺序"""
+    keys = []
+    for ref in refs:
+        if store.get_declaration(ref) is not None or (store.external is not None and store.external(ref)):
+            keys.append(declaration_key(ref))
+    return tuple(dict.fromkeys(keys))
+
+
+def _dependency_modules(store: Store, refs: Iterable, current: str) -> tuple[str, ...]:
+    """从 refs 出发可达的声明（包括其基类）及外部引用所在的模块，不含当前模块"""
+    external = store.external or (lambda type_: False)
+    modules = []
+    for type_ in store.dependency_order(refs):
+        modules.extend(declaration_modules(type_))
+        modules.extend(getattr(d, "__module__", None) for d in store.dependencies.get(type_, ()) if external(d))
+    modules.extend(getattr(r, "__module__", None) for r in refs if external(r))
+    return tuple(sorted({m for m in modules if m and m != current}))
+
+
+class _ModuleRoots:
+    """判断类型是否为其他待转换模块的根类型，这些类型由所在模块的会话转换"""
+
+    def __init__(self, scanner: Scanner, modules: Iterable[str], current: str) -> None:
+        self.scanner = scanner
+        self.modules = set(modules)
+        self.current = current
+        self.roots: dict[str, set[int]] = {}
+
+    def __call__(self, type_: Any) -> bool:
+        module = getattr(type_, "__module__", None)
+        if module == self.current or module not in self.modules:
+            return False
+        if module not in self.roots:
+            loaded = sys.modules.get(module)
+            self.roots[module] = {id(t) for t in self.scanner.module_types(loaded)} if loaded else set()
+        return id(type_) in self.roots[module]
+
+
+_WORKER_CONVERTER: Converter | None = None  # 工作进程中提供配置的转换会话
+_WORKER_MODULES: tuple[str, ...] = ()  # 本次待转换的全部模块
+_WORKER_FILTERS: tuple[tuple[str, ...], tuple[str, ...]] = (("*",), ())  # 本次扫描的 include / exclude
+
+
+def _init_worker(
+    plugins: list,
+    replaceable_types_map: dict,
+    cache_size: int | None,
+    preload: tuple[str, ...],
+    modules: tuple[str, ...],
+    filters: tuple[tuple[str, ...], tuple[str, ...]],
+) -> None:
+    """工作进程初始化：导入需要预加载的模块，创建与父进程配置相同的转换会话"""
+    global _WORKER_CONVERTER, _WORKER_MODULES, _WORKER_FILTERS
+    for name in preload:
+        importlib.import_module(name)
+    converter = Converter(plugins=(), replaceable_types_map=dict(replaceable_types_map), cache_size=cache_size)
+    converter.plugins = list(plugins)
+    _WORKER_CONVERTER = converter
+    _WORKER_MODULES = modules
+    _WORKER_FILTERS = filters
+
+
+def convert_module(
+    name: str,
+    converter: Converter | None = None,
+    modules: Iterable[str] | None = None,
+    include: Iterable[str] | None = None,
+    exclude: Iterable[str] | None = None,
+) -> ModuleRecords:
+    """
+    导入并在独立的会话中转换模块中可转换的类型。
+    Args:
+        name: 模块名
+        converter: 提供插件和可替换类型映射的会话，转换在其副本中进行
+        modules: 本次待转换的全部模块，其中其他模块的根类型只记录引用
+        include: 需要转换的类型，见 `pytots.scanner.Scanner`
+        exclude: 需要排除的类型
+    """
+    converter = (converter or _WORKER_CONVERTER or DEFAULT_CONVERTER).clone()
+    scanner = Scanner(
+        converter.plugins,
+        _WORKER_FILTERS[0] if include is None else include,
+        _WORKER_FILTERS[1] if exclude is None else exclude,
+    )
+    store = converter.store
+    store.external = _ModuleRoots(scanner, _WORKER_MODULES if modules is None else modules, name)
+    module = importlib.import_module(name)
+    outputs = converter._convert_roots(scanner.module_types(module), workers=1)
+    refs = list(chain.from_iterable(refs for _, refs in outputs))
+    return ModuleRecords(
+        name, _keys(store, refs), export_records(store, refs), _dependency_modules(store, refs, name)
+    )
+
+
+def merge_records(batches: Iterable[ModuleRecords]) -> list[DeclarationRecord]:
+    """
+    合并各模块的转换结果：相同 key 的声明只保留第一次出现的，
+    不同 key 的声明重名时（类型变量除外）抛出 `ValueError`。
+    结果按模块顺序从各模块的引用出发后序遍历依赖，与在一个会话中依次转换各模块的公开类型时的顺序一致
+    """
+    merged: dict[str, DeclarationRecord] = {}
+    owners: dict[str, str] = {}
+    refs: list[str] = []
+    for batch in batches:
+        refs.extend(batch.refs)
+        for record in batch.records:
+            if record.key in merged:
+                continue
+            if record.section != TYPEVAR_CATEGORY:
+                owner = owners.setdefault(record.name, record.key)
+                if owner != record.key:
+                    raise ValueError(f"❌ 声明名称重复: {record.name} ({owner}, {record.key})")
+            merged[record.key] = record
+
+    dependencies = {key: record.deps for key, record in merged.items()}
+    order = walk_dependencies(refs, dependencies)
+    order.extend(walk_dependencies(merged, dependencies, set(order)))
+    return [merged[key] for key in order]
+
+
+def render_declarations(
+    records: Iterable[DeclarationRecord],
+    module_name: str | None = "PytsDemo",
+    format: bool = False,
+    workers: int | None = 1,
+) -> str:
+    """以 `get_output_ts_str` 的格式渲染声明记录，workers 为格式化的进程数"""
+    newtypes, enums = [], []
+    missing: dict[str, list[str]] = {}
+    for record in records:
+        if record.section == NEWTYPE_CATEGORY:
+            newtypes.append(record.code)
+        elif record.section == ENUM_CATEGORY:
+            enums.append(record.code)
+        elif record.section == MISSING_SECTION:
+            missing.setdefault(record.category, []).append(record.code)
+    return render_ts(newtypes, enums, missing, module_name, format, workers=workers)
+
+
+def _convert_modules(
+    pending: list[str],
+    modules: list[str],
+    workers: int | None,
+    converter: Converter,
+    preload: tuple[str, ...],
+    include: tuple[str, ...],
+    exclude: tuple[str, ...],
+) -> Iterable[ModuleRecords]:
+    """转换 pending 中的模块，modules 为本次待转换的全部模块"""
+    if workers == 1 or len(pending) <= 1:
+        return [convert_module(name, converter, modules, include, exclude) for name in pending]
+
+    context = (
+        multiprocessing.get_context("fork")
+        if "fork" in multiprocessing.get_all_start_methods()
+        else None
+    )
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        # 只传递会话的配置，不支持 fork 的平台上需要序列化这些参数
+        initargs=(
+            converter.plugins,
+            converter.replaceable_types_map,
+            converter.cache.maxsize,
+            preload,
+            tuple(modules),
+            (include, exclude),
+        ),
+    ) as pool:
+        return list(pool.map(convert_module, pending))
+
+
+def convert_package(
+    names: Iterable[str],
+    workers: int | None = None,
+    *,
+    converter: Converter | None = None,
+    preload: Iterable[str] = (),
+    include: Iterable[str] = ("*",),
+    exclude: Iterable[str] = (),
+    cache: BuildCache | None = None,
+) -> list[DeclarationRecord]:
+    """
+    在进程池中转换包（及其所有子模块）或模块中可转换的类型，返回合并后的声明记录。
+
+    支持 fork 的平台上，父进程先导入 `preload` 中的模块再创建工作进程，
+    工作进程直接继承已导入的模块；其他平台上由每个工作进程各自导入。
+
+    Args:
+        names: 包名或模块名
+        workers: 进程数，为 None 时使用 CPU 核数，为 1 时在当前进程中依次转换
+        converter: 提供插件和可替换类型映射的会话，默认为默认会话；工作进程使用其副本，不会修改该会话
+        preload: 创建工作进程前导入的模块，如 `pydantic`、`sqlmodel` 等较重的公共依赖
+        include: 需要转换的类型，匹配 "模块名.类型名"
+        exclude: 需要排除的类型或模块，匹配的模块不会被导入
+        cache: 增量构建缓存，模块及其依赖的源码未变化时直接复用缓存的结果，本次的统计见 `cache.report`
+    Returns:
+        按模块顺序、模块内按依赖顺序排列的声明记录，可交给 `render_declarations` 渲染
+    """
+    converter = converter or DEFAULT_CONVERTER
+    preload = tuple(preload)
+    for name in preload:
+        importlib.import_module(name)
+    include, exclude = tuple(include), tuple(exclude)
+    modules = list(Scanner(converter.plugins, include, exclude).iter_module_names(names))
+
+    results: dict[str, ModuleRecords] = {}
+    if cache is not None:
+        signature = config_signature(converter, include, exclude)
+        run = set(modules)
+        for name in modules:
+            if (hit := cache.load(name, signature, run)) is not None:
+                results[name] = hit
+    pending = [name for name in modules if name not in results]
+    reused = [name for name in modules if name in results]
+
+    for result in _convert_modules(pending, modules, workers, converter, preload, include, exclude):
+        results[result.module] = result
+        if cache is not None:
+            cache.save(result, signature, run)
+    if cache is not None:
+        cache.report = BuildReport(reused, pending)
+    return merge_records(results[name] for name in modules)
+
+
+def output_package(
+    names: Iterable[str],
+    file_path: str,
+    module_name: str | None = "PytsDemo",
+    format: bool = True,
+    *,
+    cache_dir: str | None = None,
+    if_changed: bool = False,
+    **options: Any,
+) -> BuildReport | None:
+    """
+    转换包并将结果输出到文件。
+    Args:
+        names: 包名或模块名
+        file_path: 输出文件路径
+        module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
+        format: 是否格式化输出，默认值为 True
+        cache_dir: 增量构建缓存的目录，为 None 时不使用缓存
+        if_changed: 为 True 时内容未变化则不写入文件，否则原子地替换文件，见 `pytots.output.write_file`
+        **options: 传给 `convert_package` 的其他参数
+    Returns:
+        使用缓存时返回复用和重新转换的模块
+    """
+    cache = BuildCache(cache_dir) if cache_dir is not None else options.pop("cache", None)
+    records = convert_package(names, cache=cache, **options)
+    # 声明记录只有代码，输出很大时与转换使用相同的进程数并行格式化
+    output = render_declarations(records, module_name, format, options.get("workers"))
+    write_file(file_path, output, if_changed)
+    return cache.report if cache is not None else None
+
+
+__all__ = [
+    "DeclarationRecord",
+    "ModuleRecords",
+    "declaration_key",
+    "export_records",
+    "convert_module",
+    "merge_records",
+    "render_declarations",
+    "convert_package",
+    "output_package",
+]
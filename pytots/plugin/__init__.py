@@ -1,7 +1,14 @@
 """插件模块"""
 
-from typing import Any,TypedDict
+from typing import Any, NamedTuple, Sequence, TypedDict
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from weakref import WeakKeyDictionary
+
+from ..cache import CONVERSION_CACHE
+from ..context import ConversionContext
+from ..ir import DeclarationNode
 
 class ClassGenericParams(TypedDict):
     """类泛型参数"""
@@ -9,6 +16,35 @@ class ClassGenericParams(TypedDict):
     define_codes: list[str]
 
 
+class PluginCall(NamedTuple):
+    """
+    一次插件调用的参数，传给插件的 `convert`。不可变，只属于本次调用，
+    同一个插件实例可以同时在多个线程或嵌套的转换中使用
+    """
+
+    context: ConversionContext | None  # 当前的转换上下文，转换字段时传给 `tools.fill_field`
+    generic_names: tuple[str, ...] = ()  # 泛型类的类型参数名，如 ("T",)
+    type_params: tuple[str, ...] = ()  # 类型参数的声明，如 ("T extends any",)
+    extends: tuple[str, ...] = ()  # 继承的泛型基类，如 ("QueryResult<Item>",)
+
+
+# 当前插件调用的 (泛型类参数, 继承类参数)。保存在 ContextVar 中，
+# 嵌套转换和多线程转换时各调用互不覆盖
+_PLUGIN_PARAMS: ContextVar[tuple[ClassGenericParams, list[str]]] = ContextVar(
+    "pytots_plugin_params", default=({"names": [], "define_codes": []}, [])
+)
+
+
+@contextmanager
+def plugin_params(class_generic_params: ClassGenericParams, class_extends_params: list[str]):
+    """在上下文中为插件注入泛型类参数和继承类参数"""
+    token = _PLUGIN_PARAMS.set((class_generic_params, class_extends_params))
+    try:
+        yield
+    finally:
+        _PLUGIN_PARAMS.reset(token)
+
+
 class Plugin(ABC):
     """插件基类"""
 
@@ -22,16 +58,82 @@ class Plugin(ABC):
     TYPES_MAP: dict[type | str, str] = {}
     
     
-    # 如果是泛型类且有类型参数，系统将自动处理并填充
-    class_generic_params: ClassGenericParams = {}
+    # 依赖的插件，注册时先于该插件注册
+    requires: list["Plugin"] = []
 
-    # 继承的类型参数
-    class_extends_params: list[str] = []
+    # 插件处理的基类（如 pydantic 的 BaseModel）。声明后只对 MRO 中包含其中之一的类调用 `is_supported`，
+    # 为空时对所有类型调用
+    bases: tuple[type, ...] = ()
 
-    @abstractmethod
-    def converter(self, python_type: Any, **extra) -> str:
-        """转换类型"""
-        ...
+    # 是否只实现了旧接口 `converter`，由 `__init_subclass__` 设置
+    _legacy: bool = True
+
+    @property
+    def class_generic_params(self) -> ClassGenericParams:
+        """如果是泛型类且有类型参数，系统将自动处理并填充"""
+        return _PLUGIN_PARAMS.get()[0]
+
+    @class_generic_params.setter
+    def class_generic_params(self, value: ClassGenericParams) -> None:
+        _PLUGIN_PARAMS.set((value, _PLUGIN_PARAMS.get()[1]))
+
+    @property
+    def class_extends_params(self) -> list[str]:
+        """继承的类型参数"""
+        return _PLUGIN_PARAMS.get()[1]
+
+    @class_extends_params.setter
+    def class_extends_params(self, value: list[str]) -> None:
+        _PLUGIN_PARAMS.set((_PLUGIN_PARAMS.get()[0], value))
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # 子类中最后（离子类最近）定义的是 `converter` 时按旧接口调用，见 `invoke`
+        for klass in cls.__mro__:
+            if "convert" in vars(klass) or "converter" in vars(klass):
+                cls._legacy = "convert" not in vars(klass) or klass is Plugin
+                break
+
+    def convert(self, python_type: Any, call: PluginCall) -> str | DeclarationNode:
+        """
+        转换类型，返回 TypeScript 代码或 `pytots.ir` 的声明节点（如 `tools.assemble_interface` 的结果）。
+        泛型参数和继承参数在 call 中传入，不读写插件实例的属性，插件可以重入。
+
+        默认实现为旧接口 `converter` 的适配：在本次调用中通过 `class_generic_params` 和
+        `class_extends_params` 属性提供 call 中的参数
+        """
+        generic_params: ClassGenericParams = {
+            "names": list(call.generic_names),
+            "define_codes": list(call.type_params),
+        }
+        with plugin_params(generic_params, list(call.extends)):
+            return self.converter(python_type, context=call.context)
+
+    def converter(self, python_type: Any, **extra) -> str | DeclarationNode:
+        """
+        旧接口：转换类型，泛型参数和继承参数从 `class_generic_params` 和 `class_extends_params` 属性中读取，
+        `extra` 中的 `context` 为当前的转换上下文，转换字段时传给 `generic_feild_fill`。
+        实现了 `convert` 的插件也可以通过它调用（如子类中 `super().converter(...)`）
+        """
+        if type(self).convert is Plugin.convert:
+            raise NotImplementedError(f"{self.__class__.__name__} 需要实现 convert 或 converter")
+        return self.convert(python_type, self.current_call(extra.get("context")))
+
+    def current_call(self, context: ConversionContext | None = None) -> PluginCall:
+        """由 `class_generic_params` 和 `class_extends_params` 属性中的参数创建调用参数"""
+        generic_params, extends = _PLUGIN_PARAMS.get()
+        return PluginCall(
+            context,
+            tuple(generic_params["names"]),
+            tuple(generic_params["define_codes"]),
+            tuple(extends),
+        )
+
+    def invoke(self, python_type: Any, call: PluginCall) -> str | DeclarationNode:
+        """按插件实现的接口调用插件：实现了 `convert` 时直接调用，只实现了旧接口时经过适配"""
+        if self._legacy:
+            return Plugin.convert(self, python_type, call)
+        return self.convert(python_type, call)
 
     @abstractmethod
     def is_supported(self, python_type: Any) -> bool:
@@ -46,33 +148,132 @@ class Plugin(ABC):
 PLUGINS: list[Plugin] = []  # 插件列表
 
 
-def use_plugin(*plugins: Plugin):
-    """注册插件"""
+def _plugin_label(plugin: Plugin) -> str:
+    return plugin.name if plugin.name and plugin.name != 'pytots-plugin' else plugin.__class__.__name__
+
+
+def register_plugins(target: list[Plugin], plugins, required: bool = False) -> None:
+    """
+    向插件列表中注册插件，插件依赖的插件（`requires`）先于插件本身注册。
+    插件名已注册时跳过（依赖的插件直接跳过，显式注册的给出提示），替换已注册的插件见 `replace_plugins`
+    """
 
     for plugin in plugins:
         if not isinstance(plugin, Plugin):
             raise TypeError(f"❌ {plugin.__class__.__name__}, 无法注册非Plugin类")
 
-        PLUGINS.append(plugin)
-        print(f"✅ {plugin.name if plugin.name and plugin.name != 'pytots-plugin' else plugin.__class__.__name__}")
+        if any(p.name == plugin.name for p in target):
+            if not required:
+                print(f"⚠️ 插件 {_plugin_label(plugin)} 已注册，跳过")
+            continue
+        register_plugins(target, plugin.requires, True)
+        target.append(plugin)
+        print(f"✅ {_plugin_label(plugin)}")
 
 
-def override_plugin(*plugins: Plugin):
+class PluginIndex:
     """
-    ### 覆盖已有的插件
-    替换时以插件名作为唯一标识
+    插件分派索引：按注册顺序找到处理某个类型的插件（与依次调用各插件的 `map_type` 和 `is_supported`
+    的结果相同），并按类型缓存结果。
+
+    声明了 `bases` 的插件按基类建立索引，只有在类型的 MRO 中找到其基类时才调用它的 `is_supported`。
+    缓存假定插件对同一类型的判断不会改变；插件列表变化后应创建新的索引（见 `Converter.plugin_index`）。
+
+    缓存以弱引用为键，类型被回收后条目随之删除（动态创建的类、重新加载的模块中的旧类不会一直留在缓存中）；
+    不能弱引用的键（如字符串形式的注解）存入容量为 `STRONG_CACHE_SIZE` 的字典，超出时淘汰最早的条目
     """
+
+    STRONG_CACHE_SIZE = 256
+
+    def __init__(self, plugins: Sequence[Plugin]) -> None:
+        self.plugins = tuple(plugins)
+        self._always: set[int] = set()  # 没有声明基类的插件的序号
+        self._by_base: dict[type, set[int]] = {}
+        for i, plugin in enumerate(self.plugins):
+            if not plugin.bases:
+                self._always.add(i)
+            for base in plugin.bases:
+                self._by_base.setdefault(base, set()).add(i)
+        self._cache: "WeakKeyDictionary[Any, str | Plugin | None]" = WeakKeyDictionary()
+        self._strong: dict[Any, "str | Plugin | None"] = {}
+
+    def resolve(self, python_type: Any) -> "str | Plugin | None":
+        """返回映射的 TypeScript 类型（`map_type` 的结果）、处理该类型的插件，或者没有插件处理时返回 None"""
+        try:
+            return self._cache[python_type]
+        except KeyError:
+            result = self._cache[python_type] = self._resolve(python_type)
+            return result
+        except TypeError:  # 不能弱引用或不可哈希
+            pass
+        strong = self._strong
+        try:
+            return strong[python_type]
+        except KeyError:
+            pass
+        except TypeError:  # 不可哈希的类型不缓存
+            return self._resolve(python_type)
+        result = self._resolve(python_type)
+        if len(strong) >= self.STRONG_CACHE_SIZE:
+            strong.pop(next(iter(strong)), None)
+        strong[python_type] = result
+        return result
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._cache.clear()
+        self._strong.clear()
+
+    def _resolve(self, python_type: Any) -> "str | Plugin | None":
+        candidates = self._always
+        if self._by_base and isinstance(python_type, type):
+            candidates = candidates.union(
+                *(self._by_base[cls] for cls in python_type.__mro__ if cls in self._by_base)
+            )
+        for i, plugin in enumerate(self.plugins):
+            if (mapped_type := plugin.map_type(python_type)) is not None:
+                return mapped_type
+            if i in candidates and plugin.is_supported(python_type):
+                return plugin
+        return None
+
+    def __len__(self) -> int:
+        return len(self._cache) + len(self._strong)
+
+
+def replace_plugins(target: list[Plugin], plugins) -> bool:
+    """
+    替换插件列表中同名的插件，有插件被替换时返回 True
+    """
+    replaced = False
     for plugin in plugins:
         if not isinstance(plugin, Plugin):
             raise TypeError(f"❌ {plugin.__class__.__name__}, 非Plugin类，无法覆盖")
 
-        # 从PLUGINS实例中替换掉相同name的插件
-        for i, p in enumerate(PLUGINS):
+        # 从插件列表中替换掉相同name的插件
+        for i, p in enumerate(target):
             if p.name == plugin.name:
-                PLUGINS[i] = plugin
+                target[i] = plugin
+                replaced = True
                 break
         else:
             print(f"⚠️ 覆盖失败,未找到插件 {plugin.__class__.__name__}")
 
-        print(f"🔄 {plugin.name if plugin.name and plugin.name != 'pytots-plugin' else plugin.__class__.__name__}")
+        print(f"🔄 {_plugin_label(plugin)}")
+    return replaced
+
+
+def use_plugin(*plugins: Plugin):
+    """为默认转换会话注册插件"""
+    register_plugins(PLUGINS, plugins)
+    CONVERSION_CACHE.invalidate()
+
+
+def override_plugin(*plugins: Plugin):
+    """
+    ### 覆盖默认转换会话中已有的插件
+    替换时以插件名作为唯一标识
+    """
+    if replace_plugins(PLUGINS, plugins):
+        CONVERSION_CACHE.invalidate()
 
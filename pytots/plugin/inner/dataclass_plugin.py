@@ -5,11 +5,12 @@ dataclass类处理插件
 import typing
 from dataclasses import is_dataclass
 import inspect
-from typing import get_type_hints
 
 
-from .. import Plugin
-from ..tools import generic_feild_fill,assemble_interface_type
+from .. import Plugin, PluginCall
+from ..tools import fill_field_nodes, assemble_interface
+from ...hints import get_type_hints
+from ...ir import Field, Interface
 
 class DataclassPluginOptions(typing.TypedDict):
     """
@@ -40,20 +41,18 @@ class DataclassPlugin(Plugin):
         return False
     
     
-    def converter(self, python_type: type, **extra) -> str:
+    def convert(self, python_type: type, call: PluginCall) -> Interface:
         """
         转换该类型为 TypeScript 类型
         """
         class_name = python_type.__name__
         
+        hints = get_type_hints(python_type)
         fields = []
-        for field, field_type in get_type_hints(python_type).items():
-            ts_type = generic_feild_fill(self,field_type)
-            if "undefined" in ts_type:
-                fields.append(f"{field}?: {ts_type};")
+        for field, ts_type in zip(hints, fill_field_nodes(call, hints.values())):
+            if "undefined" in str(ts_type):
+                fields.append(Field(field, ts_type, optional=True))
             else:
-                fields.append(f"{field}: {ts_type};")
-
-        fields_str = "\n  ".join(fields)
+                fields.append(Field(field, ts_type))
         
-        return assemble_interface_type(self, class_name, fields_str)
+        return assemble_interface(self, class_name, fields, call)
@@ -3,12 +3,13 @@ typedict类处理插件
 """
 import typing
 from typing import (
-    get_type_hints,
     get_origin
 )
 
-from .. import Plugin
-from ..tools import generic_feild_fill,assemble_interface_type
+from .. import Plugin, PluginCall
+from ..tools import fill_field_nodes, assemble_interface
+from ...hints import get_type_hints
+from ...ir import Field, Interface
 
 
 
@@ -25,6 +26,8 @@ class TypedDictPlugin(Plugin):
     """
     
     name = "typedict"
+    # TypedDict 在运行时是 dict 的子类
+    bases = (dict,)
     
     
     def __init__(self, options: TypedDictPluginOptions={}) -> None:
@@ -41,24 +44,22 @@ class TypedDictPlugin(Plugin):
         return False
     
     
-    def converter(self, python_type: type, **extra) -> str:
+    def convert(self, python_type: type, call: PluginCall) -> Interface:
         """
         转换该类型为 TypeScript 类型
         """
         class_name = python_type.__name__
+        hints = get_type_hints(python_type)
         fields = []
-        for field, field_type in get_type_hints(python_type).items():
-            ts_type = generic_feild_fill(self,field_type)
+        for (field, field_type), ts_type in zip(hints.items(), fill_field_nodes(call, hints.values())):
             # 检查是否为可选类型
             origin = get_origin(field_type)
             if origin is typing.Optional or (
                 hasattr(field_type, "__dict__")
                 and field_type.__dict__.get("_name") == "Optional"
             ):
-                fields.append(f"{field}?: {ts_type};")
+                fields.append(Field(field, ts_type, optional=True))
             else:
-                fields.append(f"{field}: {ts_type};")
+                fields.append(Field(field, ts_type))
 
-        fields_str = "\n  ".join(fields)
-
-        return assemble_interface_type(self, class_name, fields_str)
+        return assemble_interface(self, class_name, fields, call)
@@ -1,6 +1,8 @@
 from typing import Literal, TypedDict
-from .. import Plugin
-from ..tools import generic_feild_fill,assemble_interface_type
+from .. import Plugin, PluginCall
+from ..tools import fill_field_nodes, assemble_interface
+from ...ir import Field, Interface
+from .pydantic_schema import Fallback, ModelSchema, SchemaConverter, model_schema
 
 from pydantic import (
     BaseModel,
@@ -48,6 +50,7 @@ class PydanticPluginOptions(TypedDict):
     """Pydantic 插件选项"""
     exclude: bool    # 是否排除被标记为 exclude 的字段
     type_prefix: Literal["interface", "type"]
+    core_schema: bool    # 是否直接按模型的 core schema 转换字段（输出相同），见 `pydantic_schema`
 
 
 
@@ -55,6 +58,7 @@ class PydanticPlugin(Plugin):
     """Pydantic 插件"""
 
     name = "pydantic-plugin"
+    bases = (BaseModel,)
     TYPES_MAP = {
         EmailStr: "string",
         IPvAnyAddress: "string",
@@ -98,9 +102,15 @@ class PydanticPlugin(Plugin):
         self.options = options
         self.type_prefix = options.get("type_prefix", self.type_prefix)
         
-    def converter(self, python_type: type, **extra) -> str:
+    def convert(self, python_type: type, call: PluginCall) -> Interface:
         """类型转换"""
-        fields = []
+        # 继承泛型基类时字段中的类型变量需要替换，按注解转换
+        if self.options.get("core_schema", False) and call.context is not None and not call.extends:
+            schema = model_schema(python_type)
+            if schema is not None:
+                return self.convert_schema(python_type, schema, call)
+
+        names, field_types, required = [], [], []
         for field_name, field_info in python_type.model_fields.items():
             # 获取字段类型
             field_type = field_info.annotation
@@ -111,20 +121,51 @@ class PydanticPlugin(Plugin):
             # 检查是否排除被标记为 exclude 的字段
             if self.options.get("exclude", False) and field_info.exclude:
                 continue
-            
-
-            ts_type = generic_feild_fill(self,field_type)
 
+            names.append(field_name)
+            field_types.append(field_type)
+            required.append(field_info.is_required())
 
+        fields = []
+        for field_name, ts_type, is_required in zip(names, fill_field_nodes(call, field_types), required):
             # 检查是否为可选字段
-            if field_info.is_required():
-                fields.append(f"{field_name}: {ts_type};")
+            if is_required:
+                fields.append(Field(field_name, ts_type))
             else:
-                fields.append(f"{field_name}?: {ts_type};")
-
-        fields_str = "\n  ".join(fields)
+                fields.append(Field(field_name, ts_type, optional=True))
         class_name = python_type.__name__
-        return assemble_interface_type(self, class_name, fields_str)
+        return assemble_interface(self, class_name, fields, call)
+
+    def convert_schema(self, python_type: type, schema: ModelSchema, call: PluginCall) -> Interface:
+        """按 core schema 转换字段，无法直接转换的字段按注解转换"""
+        context = call.context
+        converter = SchemaConverter(context, schema.definitions)
+        exclude = self.options.get("exclude", False)
+        model_fields = None
+        fields = []
+        outer, context.typevar_map = context.typevar_map, {}
+        try:
+            for field in schema.fields:
+                # 检查是否排除被标记为 exclude 的字段
+                if exclude and field.exclude:
+                    continue
+                ts_type = None
+                if not field.annotated:  # 注解中有 core schema 无法还原的部分时直接按注解转换
+                    mark = len(context.refs)
+                    try:
+                        ts_type = converter.convert(field.schema)
+                    except Fallback:
+                        del context.refs[mark:]
+                if ts_type is None:
+                    if model_fields is None:
+                        model_fields = python_type.model_fields
+                    field_info = model_fields[field.name]
+                    field_type = field_info.annotation if field_info.annotation is not None else field_info
+                    ts_type = fill_field_nodes(call, (field_type,))[0]
+                fields.append(Field(field.name, ts_type, optional=not field.required))
+        finally:
+            context.typevar_map = outer
+        return assemble_interface(self, python_type.__name__, fields, call)
 
     def is_supported(self, type_: type) -> bool:
         """是否支持该类型"""
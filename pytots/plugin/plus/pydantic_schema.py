@@ -0,0 +1,296 @@
+"""
+按 pydantic v2 的 core schema 转换模型字段
+
+pydantic 在定义模型时已经把字段注解编译为 `__pydantic_core_schema__`：前向引用已解析，约束类型
+（如 `conint(gt=0)`）已归约为基础类型，默认值决定了字段是否可选，嵌套模型以 `definitions` 共享。
+`PydanticPlugin({"core_schema": True})` 直接遍历它生成字段类型，不再把每个注解交给 `map_base_type`。
+
+输出与按注解转换相同。core schema 中已没有原注解信息的字段仍按注解转换：注解中有 `NewType`
+（core schema 中为其基础类型）、自定义了 `__get_pydantic_core_schema__` 的类型（core schema 中为其校验时
+使用的类型），或 `None` 不在最后的联合类型（core schema 中 `None` 总是在最后）。
+core schema 不能区分的写法（如 `list` 与 `List[Any]`）以及校验器、泛型参数等无法直接转换的部分，
+该字段同样按注解转换。
+"""
+
+import datetime
+import threading
+import types
+import typing
+import uuid
+from decimal import Decimal
+from typing import Any, NamedTuple, NewType, get_args, get_origin
+from weakref import WeakKeyDictionary
+
+from pydantic import AnyUrl, BaseModel
+
+from ...context import ConversionContext
+from ... import ir
+from ...type_map import literal_node, map_base_type, result_node
+
+# core schema 中的基础类型 -> Python 类型，按 Python 类型映射，与按注解转换的结果（包括可替换类型映射）相同
+LEAF_TYPES: dict[str, Any] = {
+    "any": Any,
+    "none": type(None),
+    "bool": bool,
+    "int": int,
+    "float": float,
+    "decimal": Decimal,
+    "complex": complex,
+    "str": str,
+    "bytes": bytes,
+    "date": datetime.date,
+    "time": datetime.time,
+    "datetime": datetime.datetime,
+    "timedelta": datetime.timedelta,
+    "uuid": uuid.UUID,
+    "url": AnyUrl,
+    "multi-host-url": AnyUrl,
+}
+
+# 带有类的 schema，按类转换（由对应的插件生成声明）
+CLASS_SCHEMAS = ("model", "dataclass", "typed-dict", "enum")
+
+# 校验器包裹的 schema，类型为被包裹的 schema
+WRAPPER_SCHEMAS = ("function-before", "function-after", "function-wrap", "default")
+
+
+class SchemaField(NamedTuple):
+    """模型字段在 core schema 中的信息"""
+
+    name: str
+    schema: dict
+    required: bool  # 没有默认值
+    exclude: bool  # 序列化时排除
+    annotated: bool  # 注解中有 core schema 无法还原的部分，按注解转换
+
+
+class ModelSchema(NamedTuple):
+    """模型的 core schema：按 ref 索引的 definitions 和各字段"""
+
+    definitions: dict[str, dict]
+    fields: list[SchemaField]
+
+
+class Fallback(Exception):
+    """schema 无法直接转换，或与按注解转换的结果不同"""
+
+
+# 模型类 -> (core schema, 解析结果)，模型重建（`model_rebuild`）后 core schema 是新的对象，重新解析
+_MODELS: "WeakKeyDictionary[type, tuple[Any, ModelSchema | None]]" = WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+
+def model_schema(model: type) -> ModelSchema | None:
+    """解析模型的 core schema，结果按模型缓存。模型未完成构建、是 RootModel 或泛型模型时返回 None"""
+    if not model.__dict__.get("__pydantic_complete__", False):
+        return None
+    schema = model.__dict__.get("__pydantic_core_schema__")
+    with _LOCK:
+        entry = _MODELS.get(model)
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+    result = _parse_model(model, schema) if isinstance(schema, dict) else None
+    with _LOCK:
+        _MODELS[model] = (schema, result)
+    return result
+
+
+def _parse_model(model: type, schema: dict) -> ModelSchema | None:
+    if model.__pydantic_generic_metadata__["parameters"]:
+        return None  # 类型变量在 core schema 中为 any
+    definitions: dict[str, dict] = {}
+    while True:
+        kind = schema["type"]
+        if kind == "definitions":
+            for definition in schema["definitions"]:
+                definitions[definition["ref"]] = definition
+            schema = schema["schema"]
+        elif kind == "definition-ref":
+            schema = definitions[schema["schema_ref"]]
+        elif kind in WRAPPER_SCHEMAS:  # 模型校验器
+            schema = schema["schema"]
+        else:
+            break
+    if kind != "model" or schema["cls"] is not model or schema.get("root_model"):
+        return None
+    fields_schema = schema["schema"]
+    if fields_schema["type"] != "model-fields":
+        return None
+    model_fields = model.model_fields
+    fields = [
+        SchemaField(
+            name,
+            field["schema"],
+            field["schema"]["type"] != "default",
+            bool(field.get("serialization_exclude")),
+            name not in model_fields or _lossy(model_fields[name].annotation, model_fields[name].metadata),
+        )
+        for name, field in fields_schema["fields"].items()
+    ]
+    return ModelSchema(definitions, fields)
+
+
+# 模型自身的 `__get_pydantic_core_schema__`，按 `CLASS_SCHEMAS` 转换；其他类型定义了它时 core schema 由其决定
+_MODEL_CORE_SCHEMA = BaseModel.__get_pydantic_core_schema__.__func__
+_UNION_ORIGINS = (typing.Union, types.UnionType)
+# 没有自定义 core schema 的基础类型，不必检查
+_PLAIN_TYPES = frozenset(tp for tp in LEAF_TYPES.values() if not hasattr(tp, "__get_pydantic_core_schema__"))
+
+
+def _lossy(annotation: Any, metadata: list) -> bool:
+    """
+    字段的注解（及 `Annotated` 的元数据）中是否有 core schema 无法还原的部分：
+    `NewType`、自定义了 `__get_pydantic_core_schema__` 的类型，以及 `None` 不在最后的联合类型
+    """
+    stack = [annotation, *metadata]
+    while stack:
+        tp = stack.pop()
+        if isinstance(tp, type):
+            if tp in _PLAIN_TYPES:
+                continue
+        else:
+            if isinstance(tp, NewType):
+                return True
+            origin = get_origin(tp)
+            if origin is not None:
+                args = get_args(tp)
+                if origin in _UNION_ORIGINS and type(None) in args[:-1]:
+                    return True
+                stack.append(origin)
+                stack.extend(args)
+                continue
+            tp = type(tp)  # 元数据、字面量的值等实例按其类型检查
+        method = getattr(tp, "__get_pydantic_core_schema__", None)
+        if method is not None and getattr(method, "__func__", None) is not _MODEL_CORE_SCHEMA:
+            return True
+    return False
+
+
+class SchemaConverter:
+    """在转换上下文中把 core schema 转换为 TypeScript 类型表达式的 `pytots.ir` 节点"""
+
+    def __init__(self, context: ConversionContext, definitions: dict[str, dict]) -> None:
+        self.context = context
+        self.cache = context.converter.cache
+        self.definitions = definitions
+        self.leaves: dict[str, ir.TypeNode] = {}
+        self.expanding: set[str] = set()  # 正在展开的 ref，递归的非类 schema 无法直接转换
+
+    def convert(self, schema: dict) -> ir.TypeNode:
+        """转换 schema，无法直接转换时抛出 `Fallback`"""
+        kind = schema["type"]
+        node = self.leaves.get(kind)
+        if node is not None:
+            return node
+        handler = _HANDLERS.get(kind)
+        if handler is None:
+            raise Fallback
+        return handler(self, schema)
+
+    def map_type(self, python_type: Any) -> ir.TypeNode:
+        """与 `result_node(map_base_type(python_type))` 相同。类和基础类型的缓存键是其本身，命中会话的缓存时直接返回"""
+        hit = self.cache.lookup(python_type)
+        if hit is None:
+            return result_node(map_base_type(python_type, self.context))
+        result, refs = hit
+        self.context.replay(refs)  # 重放引用的声明
+        return result_node(result)
+
+    def convert_leaf(self, schema: dict) -> ir.TypeNode:
+        kind = schema["type"]
+        node = self.leaves[kind] = self.map_type(LEAF_TYPES[kind])
+        return node
+
+    def convert_class(self, schema: dict) -> ir.TypeNode:
+        return self.map_type(schema["cls"])
+
+    def convert_wrapped(self, schema: dict) -> ir.TypeNode:
+        return self.convert(schema["schema"])
+
+    def convert_nullable(self, schema: dict) -> ir.TypeNode:
+        return ir.Union((self.convert(schema["schema"]), self.convert(_NONE)))
+
+    def convert_union(self, schema: dict) -> ir.TypeNode:
+        return ir.Union(self.convert(c[0] if isinstance(c, tuple) else c) for c in schema["choices"])
+
+    def convert_literal(self, schema: dict) -> ir.TypeNode:
+        return literal_node(schema["expected"])
+
+    def convert_list(self, schema: dict) -> ir.TypeNode:
+        return ir.Array(self.items(schema))
+
+    def convert_set(self, schema: dict) -> ir.TypeNode:
+        return ir.Reference("Set", (self.items(schema),))
+
+    def convert_frozenset(self, schema: dict) -> ir.TypeNode:
+        return ir.Reference("ReadonlySet", (self.items(schema),))
+
+    def items(self, schema: dict) -> ir.TypeNode:
+        items = schema.get("items_schema")
+        if items is None or items["type"] == "any":
+            raise Fallback  # list 与 List[Any]
+        return self.convert(items)
+
+    def convert_dict(self, schema: dict) -> ir.TypeNode:
+        keys, values = schema.get("keys_schema"), schema.get("values_schema")
+        if keys is None or values is None or keys["type"] == values["type"] == "any":
+            raise Fallback  # dict 与 Dict[Any, Any]
+        return ir.Reference("Record", (self.convert(keys), self.convert(values)))
+
+    def convert_tuple(self, schema: dict) -> ir.TypeNode:
+        items = schema["items_schema"]
+        variadic = schema.get("variadic_item_index")
+        if variadic is None:
+            if not items:
+                raise Fallback  # Tuple[()]
+            return ir.Tuple(self.convert(item) for item in items)
+        if variadic == 0 and len(items) == 1:
+            return ir.Array(self.convert(items[0]), shorthand=True)
+        raise Fallback
+
+    def convert_ref(self, schema: dict) -> ir.TypeNode:
+        ref = schema["schema_ref"]
+        schema = self.definitions.get(ref)
+        if schema is None or ref in self.expanding:
+            raise Fallback
+        if schema["type"] in CLASS_SCHEMAS:
+            return self.convert(schema)
+        self.expanding.add(ref)
+        try:
+            return self.convert(schema)
+        finally:
+            self.expanding.discard(ref)
+
+    def convert_definitions(self, schema: dict) -> ir.TypeNode:
+        for definition in schema["definitions"]:
+            self.definitions.setdefault(definition["ref"], definition)
+        return self.convert(schema["schema"])
+
+
+_NONE = {"type": "none"}
+
+# schema 类型 -> 转换方法
+_HANDLERS = {
+    **dict.fromkeys(LEAF_TYPES, SchemaConverter.convert_leaf),
+    **dict.fromkeys(CLASS_SCHEMAS, SchemaConverter.convert_class),
+    **dict.fromkeys(WRAPPER_SCHEMAS, SchemaConverter.convert_wrapped),
+    "nullable": SchemaConverter.convert_nullable,
+    "union": SchemaConverter.convert_union,
+    "literal": SchemaConverter.convert_literal,
+    "list": SchemaConverter.convert_list,
+    "set": SchemaConverter.convert_set,
+    "frozenset": SchemaConverter.convert_frozenset,
+    "dict": SchemaConverter.convert_dict,
+    "tuple": SchemaConverter.convert_tuple,
+    "definition-ref": SchemaConverter.convert_ref,
+    "definitions": SchemaConverter.convert_definitions,
+}
+
+
+__all__ = [
+    "model_schema",
+    "ModelSchema",
+    "SchemaField",
+    "SchemaConverter",
+    "Fallback",
+]
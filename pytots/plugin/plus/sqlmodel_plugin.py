@@ -1,8 +1,9 @@
 from typing import Literal, TypedDict
 
-from .. import Plugin,use_plugin
+from .. import Plugin, PluginCall
 from ..plus.pydantic_plugin import PydanticPlugin
-from ..tools import generic_feild_fill,assemble_interface_type
+from ..tools import fill_field_nodes, assemble_interface
+from ...ir import Field, Interface
 
 from sqlmodel import (
     SQLModel,
@@ -37,6 +38,7 @@ class SqlModelPlugin(Plugin):
     """SQLModel 插件"""
 
     name = "sqlmodel-plugin"
+    bases = (SQLModel,)
     TYPES_MAP = {
         # SQLModel 特有类型
         AutoString: "string",
@@ -61,11 +63,12 @@ class SqlModelPlugin(Plugin):
     def __init__(self, options: SqlModelPluginOptions={}) -> None:
         self.options = options
         self.type_prefix = options.get("type_prefix", self.type_prefix)
-        use_plugin(PydanticPlugin(options))
+        # SQLModel 模型同时也是 Pydantic 模型，注册时先注册 Pydantic 插件
+        self.requires = [PydanticPlugin(options)]
 
-    def converter(self, python_type: type, **extra) -> str:
+    def convert(self, python_type: type, call: PluginCall) -> Interface:
         """类型转换"""
-        fields = []
+        names, field_types, required = [], [], []
         for field_name, field_info in python_type.model_fields.items():
             # 获取字段类型
             field_type = field_info.annotation
@@ -77,18 +80,21 @@ class SqlModelPlugin(Plugin):
             # 检查是否排除被标记为 exclude 的字段
             if self.options.get("exclude", False) and field_info.exclude:
                 continue
-            
-            ts_type = generic_feild_fill(self,field_type)
-            
+
+            names.append(field_name)
+            field_types.append(field_type)
+            required.append(field_info.is_required())
+
+        fields = []
+        for field_name, ts_type, is_required in zip(names, fill_field_nodes(call, field_types), required):
             # 检查是否为可选字段
-            if field_info.is_required():
-                fields.append(f"{field_name}: {ts_type};")
+            if is_required:
+                fields.append(Field(field_name, ts_type))
             else:
-                fields.append(f"{field_name}?: {ts_type};")
+                fields.append(Field(field_name, ts_type, optional=True))
         
         class_name = python_type.__name__
-        fields_str = "\n  ".join(fields)
-        return assemble_interface_type(self, class_name, fields_str)
+        return assemble_interface(self, class_name, fields, call)
 
 
     def is_supported(self, python_type: type) -> bool:
@@ -1,36 +1,119 @@
-from typing import TypeVar
-from . import Plugin
-
-
-def generic_feild_fill(plugin: Plugin, type_: type) -> str:
-    """泛型字段填充"""
-    from ..main import convert_to_ts
-    from pytots.store import TEMP_CONTEXT, STORE_GENERIC_INTERFACE
-
-    # 提取泛型参数
-    gp = (
-        [type_]
-        if isinstance(type_, TypeVar)
-        else type_.__parameters__
-        if hasattr(type_, "__parameters__")
-        else None
-    )
-    todo = {}
-    if plugin.class_extends_params and gp:
-        for param in plugin.class_extends_params:
-            if dvs := STORE_GENERIC_INTERFACE.get(param, None):
-                for g in gp:
-                    if dv := dvs.get(g, None):
-                        todo[g] = dv
-    if todo:
-        TEMP_CONTEXT["typevar"].clear()
-        TEMP_CONTEXT["typevar"] = todo
-    else:
-        TEMP_CONTEXT["typevar"].clear()
-    res = convert_to_ts(type_)
-    TEMP_CONTEXT["typevar"].clear()
-    return res
+from typing import Any, Iterable, TypeVar
+from . import Plugin, PluginCall
+from ..context import ConversionContext
+from ..ir import Field, Interface, TypeNode
+
+
+def generic_feild_fill(
+    plugin: Plugin,
+    type_: type,
+    context: ConversionContext | None = None,
+    **extra,
+) -> str:
+    """
+    泛型字段填充（旧接口，继承参数从插件的 `class_extends_params` 属性中读取），见 `fill_field`
+    Args:
+        plugin: 当前插件
+        type_: 字段类型
+        context: 转换上下文，即插件 `converter` 收到的 `context` 参数，为 None 时使用当前激活的上下文
+    """
+    return fill_field(plugin.current_call(context), type_)
+
+
+def fill_field(call: PluginCall, type_: type) -> str:
+    """
+    转换字段类型，字段中继承的泛型基类的类型变量替换为基类的类型参数。
+    转换一个类的全部字段时使用 `fill_fields`
+    Args:
+        call: 插件 `convert` 收到的调用参数
+        type_: 字段类型
+    """
+    return fill_fields(call, (type_,))[0]
+
+
+def fill_fields(call: PluginCall, types: Iterable[Any]) -> list[str]:
+    """
+    按顺序转换一个类的全部字段类型，结果与对每个字段调用 `fill_field` 相同。
+    上下文和继承的泛型基类的类型变量替换表只查找一次
+    Args:
+        call: 插件 `convert` 收到的调用参数
+        types: 字段类型
+    """
+    return [result["code"] for result in _map_fields(call, types)]
+
+
+def fill_field_nodes(call: PluginCall, types: Iterable[Any]) -> list[TypeNode]:
+    """
+    与 `fill_fields` 相同，但返回字段类型的 `pytots.ir` 节点（`str()` 为 `fill_fields` 的结果），
+    用于组装 `Field`：列表、联合类型等结构化的节点在格式化时直接输出
+    """
+    from ..type_map import result_node
 
+    return [result_node(result) for result in _map_fields(call, types)]
+
+
+def _map_fields(call: PluginCall, types: Iterable[Any]) -> list[dict]:
+    """按顺序转换字段类型，返回 `map_base_type` 的结果"""
+    from ..type_map import map_base_type
+    from ..processer import new_context
+
+    context = call.context
+    if context is None:
+        context = ConversionContext.current()
+    if context is None:
+        # 不在转换过程中调用时，在默认会话中新建上下文
+        with new_context().activate() as context:
+            return _map_fields(call._replace(context=context), types)
+
+    # 各基类的类型变量 -> 类型参数，多个基类中都有时后面的基类优先
+    substitutions = {}
+    generic_interface = context.converter.store.generic_interface
+    for param in call.extends:
+        for var, value in (generic_interface.get(param) or {}).items():
+            if value:
+                substitutions[var] = value
+
+    outer = context.typevar_map
+    results = []
+    try:
+        for type_ in types:
+            todo = {}
+            if substitutions:
+                # 字段中出现的类型变量
+                gp = (type_,) if isinstance(type_, TypeVar) else getattr(type_, "__parameters__", None)
+                for g in gp or ():
+                    if g in substitutions:
+                        todo[g] = substitutions[g]
+            # 类型变量的替换只对当前字段有效，结束后恢复外层字段的替换表
+            context.typevar_map = todo
+            results.append(map_base_type(type_, context))
+    finally:
+        context.typevar_map = outer
+    return results
+
+
+
+def assemble_interface(
+    plugin: Plugin,
+    class_name: str,
+    fields: list[Field],
+    call: PluginCall | None = None,
+) -> Interface:
+    """
+    组装interface和type类型的 IR 节点, 自动处理泛型参数和继承。
+    插件的 `converter` 直接返回该节点时，格式化输出不需要重新解析代码；`str()` 的结果与 `assemble_interface_type` 相同
+    Args:
+        call: 插件 `convert` 收到的调用参数，为 None 时从插件的 `class_generic_params` 等属性中读取（旧接口）
+    """
+    if call is None:
+        call = plugin.current_call()
+    return Interface(
+        class_name,
+        fields,
+        type_params=call.type_params,
+        extends=call.extends,
+        keyword="interface" if plugin.type_prefix == "interface" else "type",
+    )
 
 
 def assemble_interface_type(plugin: Plugin, class_name: str, fields_str: str) -> str:
@@ -7,7 +7,6 @@ import inspect
 import typing
 from typing import (
     Any,
-    get_type_hints,
     get_origin,
     get_args,
     Callable,
@@ -15,45 +14,49 @@ from typing import (
     ClassVar,
     TypedDict,
     NewType,
+    TYPE_CHECKING,
 )
 from dataclasses import is_dataclass
 from pytots.type_map import (
     map_base_type,
-    map_newType_type,
+    result_node,
     map_typeVar_type,
-    map_enum_type,
+    map_enum_declaration,
 )
-from pytots.plugin import PLUGINS
+from pytots import ir
+from pytots.context import ConversionContext
+from pytots.hints import get_type_hints
+from pytots.plugin import PluginCall
 from pytots.store import (
-    STORE_GENERIC_INTERFACE,
-    STORE_PROCESSED_GENERIC,
-    STORE_PROCESSED_TYPEVAR,
-    STORE_PROCESSED_NEWTYPE,
-    STORE_PROCESSED_ENUM,
-    STORE_PROCESSED_MISSING,
-    TEMP_CONTEXT,
+    NEWTYPE_CATEGORY,
+    TYPEVAR_CATEGORY,
+    ENUM_CATEGORY,
+    MISSING_CATEGORY,
+    DEFAULT_STORE,
+    Store,
 )
 
+if TYPE_CHECKING:
+    from pytots.converter import Converter
 
-def store_missing_type(type_, type_name, content: str):
+
+def store_missing_type(type_, type_name, content: str, store: Store = DEFAULT_STORE):
     """
     存储缺失的类型映射
     """
-    STORE_PROCESSED_MISSING[type_name] = STORE_PROCESSED_MISSING.get(type_name, {})
-    STORE_PROCESSED_MISSING[type_name][type_] = content
+    target = store.processed_missing.setdefault(type_name, {})
+    store.record_declaration(target, type_, type_name, content)
 
 
-def exist_missing_type(type_) -> bool:
+def exist_missing_type(type_, store: Store = DEFAULT_STORE) -> bool:
     """
     检查是否存在缺失的类型映射
     """
-    return any(
-        type_ in STORE_PROCESSED_MISSING[type_name]
-        for type_name in STORE_PROCESSED_MISSING.keys()
-    )
+    declaration = store.get_declaration(type_)
+    return declaration is not None and declaration.section == MISSING_CATEGORY
 
 
-def convert_newType_to_ts(new_type, **extra: "Extra") -> str:
+def convert_newType_to_ts(new_type, context: ConversionContext | None = None) -> str:
     """
     将 Python 中的 NewType 转换为 TypeScript 的类型别名。
 
@@ -66,11 +69,16 @@ def convert_newType_to_ts(new_type, **extra: "Extra") -> str:
     type UserId = number
     ```
     """
-    ts_base_type = map_newType_type(new_type, **extra)
-    return f"type {new_type.__name__} = {ts_base_type};"  # type: ignore
+    return str(convert_newType_to_ir(new_type, context))
+
 
+def convert_newType_to_ir(new_type, context: ConversionContext | None = None) -> ir.TypeAlias:
+    """将 NewType 转换为类型别名的 IR 节点，见 `convert_newType_to_ts`"""
+    base_type = result_node(map_base_type(new_type.__supertype__, context))  # type: ignore
+    return ir.TypeAlias(new_type.__name__, base_type)  # type: ignore
 
-def convert_typeVar_to_ts(new_type, **extra: "Extra") -> str:
+
+def convert_typeVar_to_ts(new_type, context: ConversionContext | None = None) -> str:
     """
     将 Python 中的 TypeVar 转换为 TypeScript 的类型变量。
     #### 示例:
@@ -83,7 +91,7 @@ def convert_typeVar_to_ts(new_type, **extra: "Extra") -> str:
     # type T = number | string   (废弃)
     ```
     """
-    ts_base_type = map_typeVar_type(new_type, **extra)
+    ts_base_type = map_typeVar_type(new_type, context)
     return f"{new_type.__name__} extends {ts_base_type}"
 
 
@@ -107,7 +115,7 @@ def convert_typeVar_to_ts(new_type, **extra: "Extra") -> str:
 #     return map_generic_type(generic_type, **extra)
 
 
-def convert_enum_to_ts(enum_type, **extra: "Extra") -> str:
+def convert_enum_to_ts(enum_type, context: ConversionContext | None = None) -> str:
     """
     将 Python 中的枚举类型转换为 TypeScript 的 enum 定义。
     #### 示例:
@@ -125,80 +133,176 @@ def convert_enum_to_ts(enum_type, **extra: "Extra") -> str:
       BLUE = 3
     }
     """
-    return map_enum_type(enum_type, **extra)
+    return str(convert_enum_to_ir(enum_type, context))
+
+
+def convert_enum_to_ir(enum_type, context: ConversionContext | None = None) -> ir.Enum:
+    """将枚举类型转换为 IR 节点，见 `convert_enum_to_ts`"""
+    return map_enum_declaration(enum_type, context)
 
 
 
-def convert_function_to_ts(func: Callable, **extra: "Extra") -> str:
+def convert_function_to_ts(func: Callable, context: ConversionContext | None = None) -> str:
     """
     将 Python 函数类型注解转换为 TypeScript 函数签名。
     """
+    return str(convert_function_to_ir(func, context))
+
+
+def convert_function_to_ir(func: Callable, context: ConversionContext | None = None) -> ir.FunctionDecl:
+    """将函数的类型注解转换为函数签名的 IR 节点，见 `convert_function_to_ts`"""
     type_hints = get_type_hints(func)
     parameters = []
     for param, param_type in type_hints.items():
         if param != "return":
-            param_result = map_base_type(param_type, **extra)
-            ts_type = param_result["code"] if isinstance(param_result, dict) and "code" in param_result else param_result
+            ts_type = result_node(map_base_type(param_type, context))
 
             if param_type is Any:
-                parameters.append(f"{param}: any")
+                parameters.append(ir.Parameter(param, ir.Reference("any")))
             elif param_type.__dict__.get("_name") == "Optional":
-                parameters.append(f"{param}?: {ts_type}")
+                parameters.append(ir.Parameter(param, ts_type, optional=True))
             else:
-                parameters.append(f"{param}: {ts_type}")
+                parameters.append(ir.Parameter(param, ts_type))
 
     return_type = type_hints.get("return", None)
     if return_type is not None:
-        return_result = map_base_type(return_type, **extra)
-        ts_return_type = return_result["code"] if isinstance(return_result, dict) and "code" in return_result else return_result
+        ts_return_type = result_node(map_base_type(return_type, context))
     else:
-        ts_return_type = "void"
+        ts_return_type = ir.Reference("void")
+
+    return ir.FunctionDecl(func.__name__, parameters, ts_return_type)
 
-    params_str = ", ".join(parameters)
-    return f"function {func.__name__}({params_str}): {ts_return_type};"
 
+class PendingDeclaration:
+    """推迟生成的声明，生成后记录其代码和引用的声明，推迟的声明全部记录后再记录该声明"""
 
-def process_newType(*stack: list[type], **processer) -> None:
-    cur = stack[-1]
-    if all(cur != x for x in STORE_PROCESSED_NEWTYPE.keys()):
-        STORE_PROCESSED_NEWTYPE[cur] = convert_newType_to_ts(cur, **processer)
+    __slots__ = ("type", "target", "category", "convert", "started", "code", "refs", "pending")
 
+    def __init__(self, type_, target: dict | None, category: str, convert: Callable) -> None:
+        self.type = type_
+        self.target = target
+        self.category = category
+        self.convert = convert
+        self.started = False
+        self.code: "str | ir.Node" = ""
+        self.refs: list[Any] = []
+        self.pending: list["PendingDeclaration"] = []
 
-def process_typeVar(*stack: list[type], **processer) -> None:
-    cur = stack[-1]
-    if all(cur != x for x in STORE_PROCESSED_TYPEVAR.keys()):
-        STORE_PROCESSED_TYPEVAR[cur] = convert_typeVar_to_ts(cur, **processer)
+
+def _declare(
+    cur,
+    context: ConversionContext,
+    target: dict | None,
+    category: str,
+    convert: Callable[[Any, ConversionContext], "str | ir.Node"],
+) -> bool:
+    """
+    转换并记录声明，target 为 None 时写入 `processed_missing` 中 category 对应的字典。
+    convert 可以返回代码，也可以返回 `pytots.ir` 的声明节点（记录其紧凑输出，格式化时直接输出节点）。
+
+    正在生成其他声明时只认领类型并推迟生成（见 `_declare_pending`），声明的写入顺序与递归生成时相同。
+    同一会话中的类型只会被一个线程转换一次，其余线程直接引用其名称；
+    转换期间引用的声明作为依赖一并记录。返回本次调用是否认领了该声明
+    """
+    store = context.converter.store
+    claimed = store.claim(cur)
+    if context.pending is not None:
+        if claimed:
+            entry = PendingDeclaration(cur, target, category, convert)
+            context.queued[id(cur)] = entry
+            context.pending.append(entry)
+        elif (entry := context.queued.get(id(cur))) is not None:
+            # 已推迟但尚未开始生成，改为在当前声明之后、当前声明记录之前生成，与递归生成时的顺序相同
+            context.pending.append(entry)
+    elif claimed:
+        _declare_pending(PendingDeclaration(cur, target, category, convert), context)
+    context.reference(cur)
+    return claimed
+
+
+def _declare_pending(first: PendingDeclaration, context: ConversionContext) -> None:
+    """
+    以显式栈生成声明及其推迟的声明：生成后先生成其推迟的声明，全部记录后再记录该声明。
+    第一个声明的类型已在转换栈中，其余声明生成期间压入转换栈
+    """
+    store = context.converter.store
+    outer_refs, outer_pending = context.refs, context.pending
+    work: list[tuple[bool, PendingDeclaration]] = [(False, first)]
+    claimed = [first]
+    try:
+        while work:
+            done, entry = work.pop()
+            if done:
+                code = entry.code
+                node = code if isinstance(code, ir.Node) else None
+                target = entry.target
+                if target is None:
+                    target = store.processed_missing.setdefault(entry.category, {})
+                store.record_declaration(target, entry.type, entry.category, str(code), entry.refs, node)
+                store.release(entry.type)
+                continue
+            if entry.started:
+                continue
+            entry.started = True
+            context.queued.pop(id(entry.type), None)
+            context.refs, context.pending = entry.refs, entry.pending
+            if entry is first:
+                entry.code = entry.convert(entry.type, context)
+            else:
+                context.push(entry.type)
+                try:
+                    entry.code = entry.convert(entry.type, context)
+                finally:
+                    context.pop()
+            claimed.extend(e for e in entry.pending if not e.started)
+            work.append((True, entry))
+            work.extend((False, e) for e in reversed(entry.pending))
+    finally:
+        context.refs, context.pending = outer_refs, outer_pending
+        context.queued.clear()
+        for entry in claimed:
+            store.release(entry.type)
+
+
+def process_newType(cur, context: ConversionContext) -> None:
+    store = context.converter.store
+    _declare(cur, context, store.processed_newtype, NEWTYPE_CATEGORY, convert_newType_to_ir)
+
+
+def process_typeVar(cur, context: ConversionContext) -> str:
+    store = context.converter.store
+    if _declare(cur, context, store.processed_typevar, TYPEVAR_CATEGORY, convert_typeVar_to_ts):
         return cur.__name__
     else:
-        if n:=TEMP_CONTEXT['typevar'].get(cur):
+        if n:=context.typevar_map.get(cur):
             return n
         return cur.__name__
 
 
-def process_enum(*stack: list[type], **processer) -> None:
-    cur = stack[-1]
-    if all(cur != x for x in STORE_PROCESSED_ENUM.keys()):
-        STORE_PROCESSED_ENUM[cur] = convert_enum_to_ts(cur, **processer)
+def process_enum(cur, context: ConversionContext) -> None:
+    store = context.converter.store
+    _declare(cur, context, store.processed_enum, ENUM_CATEGORY, convert_enum_to_ir)
 
 
-def process_missing(*stack: list[type], **processer) -> str | None:
-    cur = stack[-1]
-    if exist_missing_type(cur):
+def process_missing(cur, context: ConversionContext) -> str | None:
+    store = context.converter.store
+    if exist_missing_type(cur, store):
+        context.reference(cur)
         return cur.__name__
 
     # 处理枚举类型
 
     if inspect.isclass(cur) and issubclass(cur, enum.Enum):
-        store_missing_type(cur, "enum", convert_enum_to_ts(cur, **processer))
+        _declare(cur, context, None, ENUM_CATEGORY, convert_enum_to_ir)
         return cur.__name__
 
     if inspect.isfunction(cur):  # 处理函数
-        store_missing_type(cur, "function", convert_function_to_ts(cur, **processer))
+        _declare(cur, context, None, "function", convert_function_to_ir)
         return f"typeof {cur.__name__}"
 
     # 处理类方法
     if inspect.ismethod(cur):
-        store_missing_type(cur, "method", convert_function_to_ts(cur, **processer))
+        _declare(cur, context, None, "method", convert_function_to_ir)
         return f"typeof {cur.__name__}"
     
 
@@ -210,15 +314,13 @@ def process_missing(*stack: list[type], **processer) -> str | None:
     
     class_extends_params = []
 
-    extra = {**processer, "__stack": list(stack)}
- 
     def handle_generic_instance(cur):
         # 处理GenericType实例（如QueryResult[TicketType]） ===> QueryResult<TicketType>
-        origin_result = map_base_type(cur.__origin__, **extra)
+        origin_result = map_base_type(cur.__origin__, context)
         res = origin_result["code"]
         args = []
         for arg in get_args(cur):
-            arg_result = map_base_type(arg, **extra)
+            arg_result = map_base_type(arg, context)
             args.append(arg_result["code"])
         define_code = f"{res}<{', '.join(args)}>"
         return define_code,args
@@ -230,7 +332,7 @@ def process_missing(*stack: list[type], **processer) -> str | None:
         type_vars = [x.__parameters__ for x in origin.__orig_bases__ if hasattr(x, '__parameters__')]
         # 展平type_vars
         type_vars = [item for sublist in type_vars for item in sublist]
-        STORE_GENERIC_INTERFACE[define_code] = {k: v for k, v in zip(type_vars, args)}
+        store.generic_interface[define_code] = {k: v for k, v in zip(type_vars, args)}
         return define_code
         
     if inspect.isclass(cur) and issubclass(cur, typing.Generic):
@@ -240,11 +342,13 @@ def process_missing(*stack: list[type], **processer) -> str | None:
             # print(cur.__name__,'他有类型参数')
             names_list = []
             for r in cur.__parameters__:
-                r_result = map_base_type(r, **extra)
+                r_result = map_base_type(r, context)
                 names_list.append(r_result["code"])
             class_generic_params["names"] = names_list
             class_generic_params["define_codes"] = [
-                STORE_PROCESSED_TYPEVAR[r] for r in cur.__parameters__
+                # 其他线程可能正在生成该类型变量的声明
+                store.processed_typevar.get(r) or convert_typeVar_to_ts(r, context)
+                for r in cur.__parameters__
             ]
 
         else:
@@ -263,7 +367,7 @@ def process_missing(*stack: list[type], **processer) -> str | None:
                 type_vars = [x.__parameters__ for x in cur.__orig_bases__ if hasattr(x, '__parameters__')]
                 # 展平type_vars
                 type_vars = [item for sublist in type_vars for item in sublist]
-                STORE_GENERIC_INTERFACE[define_code] = {k: v for k, v in zip(type_vars, args)}
+                store.generic_interface[define_code] = {k: v for k, v in zip(type_vars, args)}
                 return define_code
             else:
                 # 处理泛型类继承
@@ -272,38 +376,42 @@ def process_missing(*stack: list[type], **processer) -> str | None:
 
                     class_extends_params = []
                     for arg in cur.__orig_bases__:
-                        arg_result = map_base_type(arg, **extra)
+                        arg_result = map_base_type(arg, context)
                         class_extends_params.append(arg_result["code"] if isinstance(arg_result, dict) and "code" in arg_result else arg_result)
-                    STORE_PROCESSED_TYPEVAR
-                    STORE_PROCESSED_GENERIC
+                    store.processed_typevar
+                    store.processed_generic
                     # return o + f"<{', '.join(a)}>"
                 else:
-                    result = map_base_type(cur, **extra)
+                    result = map_base_type(cur, context)
                     return result["code"] if isinstance(result, dict) and "code" in result else result
         
 
-    # 处理插件
-    for plugin in PLUGINS:
-        plugin.class_generic_params = class_generic_params    # 为插件注入泛型类参数
-        plugin.class_extends_params = class_extends_params    # 为插件注入继承类参数
-        if (mapped_type := plugin.map_type(cur)) is not None:
-            # store_missing_type(cur,'map_type',mapped_type)
-            return mapped_type
-        if plugin.is_supported(cur):
-            store_missing_type(cur, plugin.name, plugin.converter(cur, **processer))
-            return cur.__name__
-
+    # 处理插件：按类型缓存由哪个插件处理
+    plugin = context.converter.plugin_index().resolve(cur)
+    if plugin is None or isinstance(plugin, str):
+        # 映射类型或没有插件处理
+        return plugin
+
+    # 泛型类参数和继承类参数作为本次调用的参数传给插件
+    call = PluginCall(
+        context,
+        tuple(class_generic_params["names"]),
+        tuple(class_generic_params["define_codes"]),
+        tuple(class_extends_params),
+    )
 
+    def convert(cur, context):
+        return plugin.invoke(cur, call)
 
-        
-    return None
+    _declare(cur, context, None, plugin.name, convert)
+    return cur.__name__
 
 
-ProcessNewTypeFunc = Callable[[list[Any], "Processers"], None]
-ProcessTypeVarFunc = Callable[[list[Any], "Processers"], None]
-ProcessTypedDictFunc = Callable[[list[Any], "Processers"], None]
-ProcessEnumFunc = Callable[[list[Any], "Processers"], None]
-ProcessMissingFunc = Callable[[list[Any], "Processers"], str | None]
+ProcessNewTypeFunc = Callable[[Any, ConversionContext], None]
+ProcessTypeVarFunc = Callable[[Any, ConversionContext], str]
+ProcessTypedDictFunc = Callable[[Any, ConversionContext], None]
+ProcessEnumFunc = Callable[[Any, ConversionContext], None]
+ProcessMissingFunc = Callable[[Any, ConversionContext], str | None]
 
 
 class Processers(TypedDict):
@@ -316,7 +424,12 @@ class Processers(TypedDict):
     process_missing: ProcessMissingFunc
 
 
-class Extra(Processers):
-    """额外参数"""
-
-    __stack: list[Any]
+def new_context(converter: "Converter | None" = None) -> ConversionContext:
+    """以默认的处理函数为转换会话创建转换上下文，converter 为 None 时使用默认会话"""
+    return ConversionContext(
+        converter,
+        process_newType=process_newType,
+        process_typeVar=process_typeVar,
+        process_enum=process_enum,
+        process_missing=process_missing,
+    )
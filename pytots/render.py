@@ -0,0 +1,264 @@
+"""
+输出渲染
+
+将已转换的声明拼接为最终的 TypeScript 代码。会话（`Converter.get_output_ts_str`）和
+多进程合并后的声明记录（`pytots.parallel`）共用同一套渲染逻辑，保证两者输出一致。
+`iter_render_ts` 以流的形式逐个声明地产出相同的输出，用于写出很大的文件。
+格式化时逐个声明处理：`pytots.ir` 的声明节点和插件返回的代码都直接输出格式化后的代码，不需要经过格式化器；
+输出很大时可以在进程池中提前并行格式化各声明（节点和代码）。
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from typing import Iterable, Iterator, Mapping
+
+from pytots.cache import FormatCache
+from pytots.formart import TypeScriptFormatter
+from pytots.ir import DeclarationNode, format_declaration
+
+
+# 待格式化的代码总长度（字符数）超过该值时才使用进程池，否则进程的启动和通信开销大于收益
+PARALLEL_FORMAT_THRESHOLD = 1 << 20
+
+
+def _format_chunk(keys: list[tuple[int, str, "str | DeclarationNode"]]) -> list[str | None]:
+    """在工作进程中单独格式化一批声明，键为 (缩进层级, 前缀, 声明)"""
+    return [format_declaration(declaration, level, prefix) for level, prefix, declaration in keys]
+
+
+def _read_window(iterator: Iterator, level: int, cache: FormatCache | None) -> tuple[list, int]:
+    """
+    从 iterator 中读入声明，直到缓存中还没有的声明的代码总长度达到 `PARALLEL_FORMAT_THRESHOLD` 或读完，
+    返回 (窗口, 其中缓存中还没有的声明的代码总长度)
+    """
+    window, total = [], 0
+    for prefix, declaration in iterator:
+        window.append((prefix, declaration))
+        if cache is None or (level, prefix, str(declaration)) not in cache:
+            total += len(str(declaration))
+            if total >= PARALLEL_FORMAT_THRESHOLD:
+                break
+    return window, total
+
+
+def _submit(pool: ProcessPoolExecutor, window: list, level: int, cache: FormatCache | None, workers: int) -> tuple:
+    """把窗口中缓存里还没有的声明分为 workers 批提交到进程池，返回 (窗口, 各声明在结果中的位置, 各批的结果)"""
+    pending, slots = [], []
+    for prefix, declaration in window:
+        if cache is not None and (level, prefix, str(declaration)) in cache:
+            slots.append(None)
+        else:
+            slots.append(len(pending))
+            pending.append((level, prefix, declaration))
+    size = max(1, -(-len(pending) // workers))
+    futures = [pool.submit(_format_chunk, pending[i:i + size]) for i in range(0, len(pending), size)]
+    return window, slots, futures
+
+
+def _collect(submitted: tuple) -> Iterator[tuple]:
+    """按顺序产出窗口中的 (前缀, 声明, 工作进程格式化的结果)，缓存中已有的声明结果为 None"""
+    window, slots, futures = submitted
+    bodies = [body for future in futures for body in future.result()]
+    for (prefix, declaration), slot in zip(window, slots):
+        yield prefix, declaration, None if slot is None else bodies[slot]
+
+
+def _format_ahead(
+    declarations: Iterable[tuple[str, "str | DeclarationNode"]],
+    level: int,
+    cache: FormatCache | None,
+    workers: int,
+) -> Iterator[tuple]:
+    """
+    按顺序产出 (前缀, 声明, 格式化结果)，结果为假定声明在缩进层级 level 处单独格式化的代码。
+    缓存中还没有的声明总长度达到 `PARALLEL_FORMAT_THRESHOLD` 时，声明按该长度分为窗口，在进程池中提前格式化
+    （同时最多两个窗口），内存占用只与窗口的大小相关；否则结果都为 None，由调用方格式化
+    """
+    iterator = iter(declarations)
+    window, total = _read_window(iterator, level, cache)
+    if total < PARALLEL_FORMAT_THRESHOLD or total == 0:
+        for prefix, declaration in window:
+            yield prefix, declaration, None
+        return
+    submitted: deque[tuple] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while window:
+            submitted.append(_submit(pool, window, level, cache, workers))
+            window, _ = _read_window(iterator, level, cache)
+            if len(submitted) > 1:
+                # 下一个窗口在工作进程中格式化时，产出上一个窗口的结果
+                yield from _collect(submitted.popleft())
+        while submitted:
+            yield from _collect(submitted.popleft())
+
+
+def format_declarations(
+    declarations: Iterable[tuple[str, "str | DeclarationNode"]],
+    head: str = "",
+    tail: str = "",
+    cache: FormatCache | None = None,
+    workers: int | None = 1,
+) -> Iterator[str]:
+    """
+    逐段产出 head、各声明（以换行分隔）和 tail 拼接后格式化的结果，拼接后与整段格式化相同。
+
+    格式化器停在两个声明之间时，IR 节点和代码由 `pytots.ir.format_declaration` 直接输出，
+    需要结合上下文时（如未闭合的字符串或注释）才与上下文一起增量格式化。
+    Args:
+        declarations: (前缀, 声明) 序列，声明为代码或 `pytots.ir` 的声明节点，前缀如 "declare "
+        head: 第一个声明之前的代码
+        tail: 最后一个声明之后的代码
+        cache: 单独格式化的声明的缓存，命中时直接使用缓存的结果
+        workers: 格式化的进程数，默认为 1，为 None 时使用 CPU 核数。多于 1 个且待格式化的声明总长度超过
+            `PARALLEL_FORMAT_THRESHOLD` 时，各声明（包括 IR 节点）按窗口提前在进程池中并行格式化，仍逐个声明地产出
+    """
+    workers = workers or os.cpu_count() or 1
+    ahead_level = -1  # 提前格式化的声明所在的缩进层级
+    if workers > 1:
+        probe = TypeScriptFormatter()
+        probe.format(head)
+        ahead_level = probe.indent_level
+        entries = _format_ahead(declarations, ahead_level, cache, workers)
+    else:
+        entries = ((prefix, declaration, None) for prefix, declaration in declarations)
+
+    formatter = TypeScriptFormatter()
+    if output := formatter.feed(head):
+        yield output
+    separator = ""
+    for prefix, declaration, ahead in entries:
+        # 紧跟在单独格式化的声明之后时，分隔的空白不影响格式化结果，不必送入格式化器
+        if separator and (output := formatter.feed(separator)):
+            yield output
+        separator = "\n  "
+        if (lead := formatter.boundary()) is not None:
+            level = formatter.indent_level
+            key = (level, prefix, str(declaration))
+            if level == ahead_level and ahead is not None:
+                body = ahead  # 工作进程提前格式化的结果，缓存中没有
+                if cache is not None:
+                    cache.put(key, body)
+            else:
+                body = cache.get(key) if cache is not None else None
+            if body is None:
+                body = format_declaration(declaration, level, prefix)
+                if body is not None and cache is not None:
+                    cache.put(key, body)
+            if body is not None:
+                formatter.skip(body)
+                separator = ""
+                yield lead + body
+                continue
+        if output := formatter.feed(prefix + str(declaration)):
+            yield output
+    if output := formatter.feed(tail):
+        yield output
+    if output := formatter.finish():
+        yield output
+
+
+def iter_render_ts(
+    newtypes: Iterable["str | DeclarationNode"],
+    enums: Iterable["str | DeclarationNode"],
+    missing: Mapping[str, Iterable["str | DeclarationNode"]],
+    module_name: str | None = "PytsDemo",
+    format: bool = False,
+    cache: FormatCache | None = None,
+    workers: int | None = 1,
+) -> Iterator[str]:
+    """
+    逐个声明地产出 `render_ts` 的输出，拼接后与 `render_ts` 的结果相同。
+    格式化时逐个声明格式化（见 `format_declarations`），内存占用只与单个声明的大小相关。参数见 `render_ts`
+    """
+    if module_name is None or type(module_name) != str or not module_name.strip():
+        # 使用非模块声明输出
+        head, tail = "", ""
+        declarations = chain(
+            zip(repeat(""), newtypes),
+            zip(repeat(""), enums),
+            *(
+                zip(repeat("declare " if type_name == "function" else ""), codes)
+                for type_name, codes in missing.items()
+            ),
+        )
+    else:
+        # 使用模块声明输出，首字母大写
+        head, tail = f"declare namespace {module_name.capitalize()} {{\n  ", "\n}"
+        declarations = zip(repeat(""), chain(newtypes, enums, *missing.values()))
+
+    if format:
+        yield from format_declarations(declarations, head, tail, cache, workers)
+        return
+    if head:
+        yield head
+    separator = ""
+    for prefix, code in declarations:
+        if piece := separator + prefix + str(code):
+            yield piece
+        separator = "\n  "
+    if tail:
+        yield tail
+
+
+def render_ts(
+    newtypes: Iterable["str | DeclarationNode"],
+    enums: Iterable["str | DeclarationNode"],
+    missing: Mapping[str, Iterable["str | DeclarationNode"]],
+    module_name: str | None = "PytsDemo",
+    format: bool = False,
+    cache: FormatCache | None = None,
+    workers: int | None = 1,
+) -> str:
+    """
+    按 NewType、枚举、其余分类（按分类的首次出现顺序）的顺序拼接声明。
+    Args:
+        newtypes: NewType 声明（代码或 `pytots.ir` 的声明节点，下同）
+        enums: 枚举声明
+        missing: 分类 -> 该分类的声明，函数的分类为 "function"
+        module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
+        format: 是否格式化输出，默认值为 False
+        cache: 格式化时使用的声明格式化结果缓存，见 `pytots.cache.FormatCache`
+        workers: 格式化的进程数，见 `format_declarations`
+    """
+    if format:
+        return "".join(iter_render_ts(newtypes, enums, missing, module_name, format, cache, workers))
+
+    result = [
+        *map(str, newtypes),
+        *map(str, enums),
+    ]
+
+    # 生成原始 TypeScript 代码
+    if module_name is None or type(module_name) != str or not module_name.strip():
+        # 使用非模块声明输出
+        for type_name, codes in missing.items():
+            if type_name == "function":
+                result.extend(["declare "+str(c) for c in codes])
+            else:
+                result.extend(map(str, codes))
+        ts_code = "\n  ".join(result)
+
+    else:
+        # 使用模块声明输出
+        missing_types = [
+            str(content)
+            for codes in missing.values()
+            for content in codes
+        ]
+        # 首字母大写
+        module_name = module_name.capitalize()
+        ts_code = "declare namespace {} {{\n  {}\n}}".format(
+            module_name, "\n  ".join(result+missing_types)
+        )
+
+    return ts_code
+
+
+__all__ = [
+    "PARALLEL_FORMAT_THRESHOLD",
+    "format_declarations",
+    "iter_render_ts",
+    "render_ts",
+]
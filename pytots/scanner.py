@@ -0,0 +1,198 @@
+"""
+包扫描
+
+遍历包（及其子包）中的模块，收集可以转换的类型：NewType、枚举，以及任一已注册插件的
+`is_supported` 接受的类（dataclass、TypedDict、pydantic / SQLModel 模型等），无需手写根类型列表。
+
+- 模块在遍历到时才导入，子包只为查找子模块而导入其 `__init__`。
+- `include` / `exclude` 为 `fnmatch` 风格的通配符，匹配 "模块名.类型名"；
+  模块名本身匹配 `exclude` 时整个模块（子包则包括其所有子模块）都不会被导入。
+- 每个模块的发现结果按模块文件的修改时间和大小缓存，未修改的模块再次扫描时只需读取缓存。
+
+Example:
+    >>> from pytots.scanner import scan_package
+    >>> types = scan_package(["backend.models"], exclude=["backend.models.tests*", "*.Internal*"])
+    >>> convert_many(types)
+"""
+
+import enum
+import importlib
+import importlib.util
+import inspect
+import os
+import pkgutil
+import threading
+from fnmatch import fnmatchcase
+from types import ModuleType
+from typing import Any, Iterable, Iterator, NewType, Sequence
+
+from pytots.cache import CacheInfo
+from pytots.converter import DEFAULT_CONVERTER
+from pytots.plugin import Plugin
+
+
+class DiscoveryCache:
+    """模块发现结果的缓存：模块名 -> (文件标识, 扫描配置, 发现的名称)"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._data: dict[str, tuple[tuple, tuple, tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, module: str, stamp: tuple, signature: tuple) -> tuple[str, ...] | None:
+        """读取缓存，文件或扫描配置有变化时视为未命中"""
+        with self._lock:
+            entry = self._data.get(module)
+            if entry is None or entry[0] != stamp or entry[1] != signature:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[2]
+
+    def put(self, module: str, stamp: tuple, signature: tuple, names: tuple[str, ...]) -> None:
+        with self._lock:
+            self._data[module] = (stamp, signature, names)
+
+    def clear(self) -> None:
+        """清空缓存及统计信息"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, None, len(self._data))
+
+
+DISCOVERY_CACHE = DiscoveryCache()
+
+
+def _file_stamp(module: ModuleType) -> tuple | None:
+    """模块文件的 (路径, 修改时间, 大小)，没有对应文件时返回 None"""
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+class Scanner:
+    """包扫描器"""
+
+    def __init__(
+        self,
+        plugins: Sequence[Plugin] | None = None,
+        include: Iterable[str] = ("*",),
+        exclude: Iterable[str] = (),
+        cache: DiscoveryCache | None = None,
+    ) -> None:
+        """
+        Args:
+            plugins: 用于判断类是否可转换的插件，为 None 时使用默认会话的插件
+            include: 需要收集的类型，匹配 "模块名.类型名"
+            exclude: 需要排除的类型或模块
+            cache: 发现结果的缓存，为 None 时使用共享的 `DISCOVERY_CACHE`
+        """
+        self.plugins = plugins
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.cache = cache if cache is not None else DISCOVERY_CACHE
+
+    def _plugins(self) -> Sequence[Plugin]:
+        return self.plugins if self.plugins is not None else DEFAULT_CONVERTER.plugins
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatchcase(name, pattern) for pattern in self.exclude)
+
+    def _included(self, name: str) -> bool:
+        return any(fnmatchcase(name, pattern) for pattern in self.include) and not self._excluded(name)
+
+    def iter_module_names(self, names: Iterable[str]) -> Iterator[str]:
+        """
+        展开包名：依次产出每个名称本身及其所有子模块，去除重复。
+        只导入查找子模块所需的上级包，模块本身不会被导入
+        """
+        seen: set[str] = set()
+        stack = list(reversed(list(names)))
+        while stack:
+            name = stack.pop()
+            if name in seen or self._excluded(name):
+                continue
+            seen.add(name)
+            yield name
+            spec = importlib.util.find_spec(name)
+            if spec is not None and spec.submodule_search_locations is not None:
+                children = pkgutil.iter_modules(spec.submodule_search_locations, name + ".")
+                stack.extend(reversed([info.name for info in children]))
+
+    def is_convertible(self, obj: Any) -> bool:
+        """是否为可转换的类型：NewType、枚举，或任一插件支持的类"""
+        if isinstance(obj, NewType):
+            return True
+        if not inspect.isclass(obj):
+            return False
+        if issubclass(obj, enum.Enum):
+            return True
+        return any(plugin.is_supported(obj) for plugin in self._plugins())
+
+    def module_types(self, module: ModuleType) -> list:
+        """
+        模块中定义的可转换的公开类型（`__all__` 中的名称，没有 `__all__` 时为不以下划线开头的名称），
+        按定义顺序排列
+        """
+        stamp = _file_stamp(module)
+        signature = (tuple(self._plugins()), self.include, self.exclude)
+        if stamp is not None and (names := self.cache.get(module.__name__, stamp, signature)) is not None:
+            return [getattr(module, name) for name in names]
+
+        candidates = getattr(module, "__all__", None)
+        if candidates is None:
+            candidates = [name for name in vars(module) if not name.startswith("_")]
+        found = []
+        for name in candidates:
+            obj = getattr(module, name, None)
+            if (
+                getattr(obj, "__module__", None) == module.__name__
+                and self._included(f"{module.__name__}.{name}")
+                and self.is_convertible(obj)
+            ):
+                found.append(name)
+        if stamp is not None:
+            self.cache.put(module.__name__, stamp, signature, tuple(found))
+        return [getattr(module, name) for name in found]
+
+    def scan(self, names: Iterable[str]) -> list:
+        """扫描包或模块，依次导入每个模块并返回其中可转换的类型"""
+        types = []
+        for name in self.iter_module_names(names):
+            types.extend(self.module_types(importlib.import_module(name)))
+        return types
+
+
+def scan_package(
+    names: Iterable[str],
+    include: Iterable[str] = ("*",),
+    exclude: Iterable[str] = (),
+    plugins: Sequence[Plugin] | None = None,
+) -> list:
+    """
+    扫描包或模块中可转换的类型
+    Args:
+        names: 包名或模块名
+        include: 需要收集的类型，匹配 "模块名.类型名"，默认收集全部
+        exclude: 需要排除的类型或模块
+        plugins: 用于判断类是否可转换的插件，为 None 时使用默认会话的插件
+    """
+    return Scanner(plugins, include, exclude).scan(names)
+
+
+__all__ = [
+    "DiscoveryCache",
+    "DISCOVERY_CACHE",
+    "Scanner",
+    "scan_package",
+]
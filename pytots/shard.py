@@ -0,0 +1,143 @@
+"""
+分片输出
+
+把会话中已转换的声明按 Python 模块（或自定义的分组函数）分别写入多个 `.ts` 文件：
+
+- 每个声明加上 `export`（函数为 `export declare`），分片内的顺序与 `get_output_ts_str` 一致；
+- 引用了其他分片中声明的分片，在文件开头生成 `import type { ... } from "./..."`；
+- 生成一个索引文件（barrel），依次 `export * from` 各分片。
+
+各分片在线程池中并行渲染和写出，内容未变化的文件不会被重写，`tsc --build` 等增量构建只会处理受影响的分片。
+
+Example:
+    >>> converter.output_ts_shards("frontend/src/types")
+    {'frontend/src/types/backend.models.user.ts': True, ..., 'frontend/src/types/index.ts': False}
+"""
+
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from pytots.cache import FormatCache
+from pytots.output import write_file
+from pytots.render import format_declarations
+from pytots.store import Store
+
+# 需要以 `export declare` 导出的声明分类（只有签名，没有实现）
+DECLARE_CATEGORIES = ("function", "method")
+
+
+def module_key(type_: Any) -> str:
+    """默认的分组：声明所在的 Python 模块"""
+    return getattr(type_, "__module__", None) or "global"
+
+
+def _specifier(source: str, target: str) -> str:
+    """从分片 source 引用分片 target 时的相对路径（不含扩展名）"""
+    path = posixpath.relpath(target, posixpath.dirname(source) or ".")
+    return path if path.startswith(".") else f"./{path}"
+
+
+def render_shards(
+    store: Store,
+    key: Callable[[Any], str] = module_key,
+    format: bool = True,
+    cache: FormatCache | None = None,
+) -> dict[str, str]:
+    """
+    将存储中的声明按分组渲染为多个分片。
+    Args:
+        store: 已转换的存储
+        key: 声明的类型 -> 分组名，分组名可以包含 "/"，对应子目录
+        format: 是否格式化输出，默认值为 True
+        cache: 声明格式化结果的缓存
+    Returns:
+        分组名 -> 分片内容，按分组首次出现的顺序排列
+    Raises:
+        ValueError: 同一分片中出现两个同名的不同声明（包括导入的声明）
+    """
+    # 与 get_output_ts_str 相同的顺序：NewType、枚举、其余分类
+    sections: list[tuple[str, dict]] = [("newtype", store.processed_newtype), ("enum", store.processed_enum)]
+    sections.extend(store.processed_missing.items())
+    groups: dict[Any, str] = {}
+    shards: dict[str, list[tuple[str, Any]]] = {}
+    for category, codes in sections:
+        prefix = "export declare " if category in DECLARE_CATEGORIES else "export "
+        for type_, code in zip(codes, store.declarations(codes)):
+            group = groups[type_] = key(type_)
+            shards.setdefault(group, []).append((prefix, code))
+
+    # 引用其他分片中的声明时导入其名称
+    imports: dict[str, dict[str, dict[str, Any]]] = {group: {} for group in shards}
+    names: dict[str, dict[str, Any]] = {group: {} for group in shards}
+    for type_, group in groups.items():
+        name = store.declaration_index[type_].name
+        names[group].setdefault(name, type_)
+        if names[group][name] is not type_:
+            raise ValueError(f"❌ 声明名称重复: {name} ({group})")
+    for type_, group in groups.items():
+        for dep in store.dependencies.get(type_, ()):
+            try:
+                target = groups.get(dep)
+            except TypeError:
+                continue
+            if target is None or target == group:
+                continue
+            name = store.declaration_index[dep].name
+            if names[group].setdefault(name, dep) is not dep:
+                raise ValueError(f"❌ 声明名称重复: {name} ({group}, {target})")
+            imports[group].setdefault(target, {})[name] = dep
+
+    result = {}
+    for group, declarations in shards.items():
+        if format:
+            body = "".join(format_declarations(declarations, cache=cache))
+        else:
+            body = "\n".join(prefix + str(code) for prefix, code in declarations)
+        header = [
+            f'import type {{ {", ".join(sorted(imported))} }} from "{_specifier(group, target)}";'
+            for target, imported in imports[group].items()
+        ]
+        result[group] = "\n".join(header + ([""] if header else []) + [body]) + "\n"
+    return result
+
+
+def output_shards(
+    directory: str,
+    store: Store,
+    key: Callable[[Any], str] = module_key,
+    format: bool = True,
+    index: str | None = "index.ts",
+    workers: int | None = None,
+    cache: FormatCache | None = None,
+) -> dict[str, bool]:
+    """
+    将存储中的声明按分组写入 directory 下的多个 `.ts` 文件，内容未变化的文件不会被重写。
+    Args:
+        directory: 输出目录
+        store: 已转换的存储
+        key: 声明的类型 -> 分组名（即分片相对 directory 的路径，不含扩展名），默认为所在的 Python 模块
+        format: 是否格式化输出，默认值为 True
+        index: 索引文件名，为 None 时不生成索引文件
+        workers: 写文件的线程数，为 None 时由 `ThreadPoolExecutor` 决定
+        cache: 声明格式化结果的缓存
+    Returns:
+        文件路径 -> 内容是否发生了变化
+    """
+    shards = render_shards(store, key, format, cache)
+    files = {os.path.join(directory, *f"{group}.ts".split("/")): content for group, content in shards.items()}
+    if index is not None:
+        exports = [f'export * from "{_specifier(index, group)}";' for group in shards]
+        files[os.path.join(directory, index)] = "\n".join(exports) + "\n"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        changed = pool.map(lambda item: write_file(item[0], item[1], if_changed=True), files.items())
+        return dict(zip(files, changed))
+
+
+__all__ = [
+    "module_key",
+    "render_shards",
+    "output_shards",
+]
@@ -1,10 +1,252 @@
-STORE_PROCESSED_NEWTYPE = {}
-STORE_PROCESSED_TYPEVAR = {}
-STORE_PROCESSED_GENERIC = {}
-STORE_PROCESSED_ENUM = {}
-STORE_PROCESSED_MISSING = {}
-STORE_GENERIC_INTERFACE = {}  # 存储泛型实例，用于参数替换
-
-TEMP_CONTEXT = {
-    "typevar": {},
-}  # 临时存储，用于参数替换
+import threading
+from typing import Any, Callable, Iterable, Iterator, Mapping, NamedTuple
+
+
+class Declaration(NamedTuple):
+    """已转换的声明"""
+
+    category: str  # 所属分类：newtype、typevar、enum、function、method 或插件名
+    name: str  # 声明名称
+    code: str  # TypeScript 代码
+    section: str  # 所在的字典：newtype、typevar、enum 或 missing（`processed_missing`）
+
+
+def walk_dependencies(refs: Iterable, dependencies: Mapping[Any, Iterable], visited: set | None = None) -> list:
+    """
+    从 refs 出发按引用顺序后序遍历依赖图（先访问先标记），返回依赖在前的顺序。
+    只访问 dependencies 中存在的节点，visited 中的节点视为已输出
+    """
+    visited = set() if visited is None else visited
+    order = []
+    stack: list[tuple[Any, Any]] = [(None, iter(refs))]
+    while stack:
+        node, deps = stack[-1]
+        for dep in deps:
+            try:
+                if dep in visited or dep not in dependencies:
+                    continue
+            except TypeError:
+                continue
+            visited.add(dep)
+            stack.append((dep, iter(dependencies[dep])))
+            break
+        else:
+            stack.pop()
+            if node is not None:
+                order.append(node)
+    return order
+
+
+def declaration_modules(type_: Any) -> tuple[str, ...]:
+    """
+    声明的内容所取决于的模块，基类在前：类为其 MRO 中各类所在的模块（插件会展开继承的字段），
+    其余类型为其自身所在的模块
+    """
+    mro = getattr(type_, "__mro__", None) if isinstance(type_, type) else None
+    classes = reversed(mro) if mro else (type_,)
+    return tuple(dict.fromkeys(m for c in classes if (m := getattr(c, "__module__", None))))
+
+
+# 声明分类
+NEWTYPE_CATEGORY = "newtype"
+TYPEVAR_CATEGORY = "typevar"
+ENUM_CATEGORY = "enum"
+# `processed_missing` 中的声明（枚举、函数、方法及插件生成的类型），其分类为字典中的键
+MISSING_CATEGORY = "missing"
+
+
+class Store:
+    """
+    转换结果存储，每个转换会话（`Converter`）拥有一个独立的实例。
+
+    多个线程同时转换时，通过 `claim` 保证同一类型只会被转换一次。
+    """
+
+    def __init__(self) -> None:
+        self.processed_newtype: dict[Any, str] = {}
+        self.processed_typevar: dict[Any, str] = {}
+        self.processed_generic: dict[Any, str] = {}
+        self.processed_enum: dict[Any, str] = {}
+        self.processed_missing: dict[str, dict[Any, str]] = {}
+        self.generic_interface: dict[str, dict] = {}  # 存储泛型实例，用于参数替换
+
+        # 统一的声明索引：类型 -> 声明，用于 O(1) 判断类型是否已转换。
+        # 输出顺序仍以上面按分类存储的字典为准
+        self.declaration_index: dict[Any, Declaration] = {}
+
+        # 声明 -> 生成该声明时引用的其他声明，用于批量转换后按依赖关系确定输出顺序
+        self.dependencies: dict[Any, tuple] = {}
+
+        # 声明 -> 转换器返回的 `pytots.ir` 声明节点，格式化输出时直接输出节点（返回代码的声明没有节点）
+        self.nodes: dict[Any, Any] = {}
+
+        self._claimed: set[Any] = set()  # 正在转换中的类型
+        # 由外部提供的声明：返回 True 的类型不在本会话中转换，只引用其名称（如由其他进程转换的模块中的类型）
+        self.external: Callable[[Any], bool] | None = None
+        self._lock = threading.Lock()
+
+    def get_declaration(self, type_: Any) -> Declaration | None:
+        """获取类型对应的声明，未转换或不可哈希时返回 None"""
+        try:
+            return self.declaration_index.get(type_)
+        except TypeError:
+            return None
+
+    def record_declaration(
+        self, target: dict, type_: Any, category: str, code: str, deps: Iterable = (), node: Any = None
+    ) -> None:
+        """写入按分类存储的字典 target，并同步更新声明索引和依赖，node 为声明的 IR 节点"""
+        target[type_] = code
+        self.dependencies[type_] = tuple(deps)
+        self.declaration_index[type_] = Declaration(
+            category, getattr(type_, "__name__", str(type_)), code, self._section(target)
+        )
+        if node is not None:
+            self.nodes[type_] = node
+        else:
+            self.nodes.pop(type_, None)
+
+    def _section(self, target: dict) -> str:
+        if target is self.processed_newtype:
+            return NEWTYPE_CATEGORY
+        if target is self.processed_typevar:
+            return TYPEVAR_CATEGORY
+        if target is self.processed_enum:
+            return ENUM_CATEGORY
+        return MISSING_CATEGORY
+
+    def declarations(self, target: dict) -> Iterator:
+        """按顺序产出 target 中各声明的 IR 节点，没有节点的声明产出其代码"""
+        nodes = self.nodes
+        for type_, code in target.items():
+            yield nodes.get(type_, code)
+
+    def claim(self, type_: Any) -> bool:
+        """
+        认领类型的转换：类型尚未声明且没有其他线程正在转换时返回 True，
+        认领者转换完成后需调用 `release`。不可哈希的类型总是返回 True
+        """
+        try:
+            if type_ in self.declaration_index:
+                return False
+        except TypeError:
+            return True
+        if self.external is not None and self.external(type_):
+            return False
+        with self._lock:
+            if type_ in self.declaration_index or type_ in self._claimed:
+                return False
+            self._claimed.add(type_)
+            return True
+
+    def release(self, type_: Any) -> None:
+        """释放 `claim` 认领的类型"""
+        with self._lock:
+            self._claimed.discard(type_)
+
+    def dependency_order(self, refs: Iterable, visited: set | None = None) -> list:
+        """
+        从 refs 出发按引用顺序后序遍历依赖，返回依赖在前的声明顺序，与逐个转换时声明写入的顺序一致。
+        visited 中的声明视为已输出
+        """
+        return walk_dependencies(refs, self.dependencies, visited)
+
+    def reorder(self, order: Iterable) -> None:
+        """
+        按给定的类型顺序原地重排各分类的声明，未出现在 order 中的声明保持原有顺序排在最后。
+        `processed_missing` 中的分类按其第一个声明的位置排序，与逐个转换时分类首次出现的顺序一致
+        """
+        rank: dict[Any, int] = {}
+        for type_ in order:
+            rank.setdefault(type_, len(rank))
+        last = len(rank)
+
+        def sort_in_place(target: dict) -> None:
+            items = sorted(target.items(), key=lambda item: rank.get(item[0], last))
+            target.clear()
+            target.update(items)
+
+        for target in (
+            self.processed_newtype,
+            self.processed_typevar,
+            self.processed_enum,
+            self.declaration_index,
+            *self.processed_missing.values(),
+        ):
+            sort_in_place(target)
+
+        categories = sorted(
+            self.processed_missing.items(),
+            key=lambda item: min((rank.get(t, last) for t in item[1]), default=last),
+        )
+        self.processed_missing.clear()
+        self.processed_missing.update(categories)
+
+    def dependents(self, types: Iterable) -> set:
+        """直接或间接引用了 types 中任一类型的声明（不含 types 本身）"""
+        reverse: dict[Any, list] = {}
+        for type_, deps in self.dependencies.items():
+            for dep in deps:
+                try:
+                    reverse.setdefault(dep, []).append(type_)
+                except TypeError:
+                    continue
+        found: set = set()
+        stack = list(types)
+        while stack:
+            for type_ in reverse.get(stack.pop(), ()):
+                if type_ not in found:
+                    found.add(type_)
+                    stack.append(type_)
+        return found - set(types)
+
+    def discard(self, types: Iterable) -> None:
+        """移除 types 中各类型的声明，其余声明的顺序保持不变"""
+        types = set(types)
+        for target in (
+            self.processed_newtype,
+            self.processed_typevar,
+            self.processed_generic,
+            self.processed_enum,
+            self.declaration_index,
+            self.dependencies,
+            self.nodes,
+            *self.processed_missing.values(),
+        ):
+            for type_ in types & target.keys():
+                del target[type_]
+        for category in [c for c, codes in self.processed_missing.items() if not codes]:
+            del self.processed_missing[category]
+
+    def clear(self) -> None:
+        """清除所有已转换的声明（原地清空，保持对各字典的引用有效）"""
+        self.processed_newtype.clear()
+        self.processed_typevar.clear()
+        self.processed_enum.clear()
+        self.processed_missing.clear()
+        self.declaration_index.clear()
+        self.dependencies.clear()
+        self.nodes.clear()
+
+
+DEFAULT_STORE = Store()  # 默认会话的存储
+
+STORE_PROCESSED_NEWTYPE = DEFAULT_STORE.processed_newtype
+STORE_PROCESSED_TYPEVAR = DEFAULT_STORE.processed_typevar
+STORE_PROCESSED_GENERIC = DEFAULT_STORE.processed_generic
+STORE_PROCESSED_ENUM = DEFAULT_STORE.processed_enum
+STORE_PROCESSED_MISSING = DEFAULT_STORE.processed_missing
+STORE_GENERIC_INTERFACE = DEFAULT_STORE.generic_interface  # 存储泛型实例，用于参数替换
+STORE_DECLARATION_INDEX = DEFAULT_STORE.declaration_index
+
+TEMP_CONTEXT: dict[str, dict] = {"typevar": {}}  # 已不再使用，类型变量的替换保存在转换上下文的 `typevar_map` 中
+
+
+def get_declaration(type_: Any) -> Declaration | None:
+    """获取默认会话中类型对应的声明，未转换或不可哈希时返回 None"""
+    return DEFAULT_STORE.get_declaration(type_)
+
+
+def record_declaration(store: dict, type_: Any, category: str, code: str) -> None:
+    """写入默认会话中按分类存储的字典，并同步更新声明索引"""
+    DEFAULT_STORE.record_declaration(store, type_, category, code)
@@ -1,28 +1,23 @@
 import inspect
+import re
 import typing
 from typing import (
     Any,
+    Callable,
+    Iterable,
+    NamedTuple,
     TypeVar,
     get_type_hints,
     NewType,
     get_origin,
     get_args,
-    TYPE_CHECKING,
 )
 from builtins import Ellipsis
 
-from pytots.store import STORE_PROCESSED_GENERIC, STORE_PROCESSED_TYPEVAR
-
-if TYPE_CHECKING:
-    from .processer import (
-        Extra,
-        Processers,
-        ProcessNewTypeFunc,
-        ProcessTypeVarFunc,
-        ProcessTypedDictFunc,
-        ProcessEnumFunc,
-        ProcessMissingFunc,
-    )
+from pytots.store import DEFAULT_STORE, Store
+from pytots.cache import invalidate_all_caches
+from pytots.context import ConversionContext
+from pytots import ir
 
 
 from .clf import (
@@ -37,7 +32,6 @@ from .clf import (
     QUEUE_TYPES_COLLECTION,
     COUNTER_TYPES_COLLECTION,
     CHAINMAP_TYPES_COLLECTION,
-    REPLACEABLE_TYPES_MAP,
 )
 
 
@@ -215,18 +209,18 @@ def handle_literal_type(args: list[Any]) -> str:
 
 
 
-def handle_generic_type(generic_type,args: list[TypeVar]) -> str:
+def handle_generic_type(generic_type,args: list[TypeVar], store: Store = DEFAULT_STORE) -> str:
     """
     处理 Generic 类型。
     """
-    res = [{STORE_PROCESSED_TYPEVAR[arg]} for arg in args]
+    res = [{store.processed_typevar[arg]} for arg in args]
     res = join_type_args(res, " , ")
-    STORE_PROCESSED_GENERIC[generic_type] = res
+    store.processed_generic[generic_type] = res
     return res
 
 
 
-def map_newType_type(new_type, **extra) -> str:
+def map_newType_type(new_type, context: ConversionContext | None = None) -> str:
     """
     映射 Python 中的 NewType
     """
@@ -234,11 +228,11 @@ def map_newType_type(new_type, **extra) -> str:
         raise TypeError("The argument must be a NewType.")
 
     base_type = new_type.__supertype__
-    base_result = map_base_type(base_type, **extra)
+    base_result = map_base_type(base_type, context)
     ts_base_type = base_result["code"] if isinstance(base_result, dict) and "code" in base_result else base_result
     return ts_base_type
 
-def map_type_alias_type(type_alias, **extra) -> str:
+def map_type_alias_type(type_alias, context: ConversionContext | None = None) -> str:
     """
     映射 Python 中的 TypeAlias
     """
@@ -246,11 +240,11 @@ def map_type_alias_type(type_alias, **extra) -> str:
         raise TypeError("The argument must be a TypeAlias.")
 
     base_type = type_alias.__supertype__
-    base_result = map_base_type(base_type, **extra)
+    base_result = map_base_type(base_type, context)
     ts_base_type = base_result["code"] if isinstance(base_result, dict) and "code" in base_result else base_result
     return ts_base_type
 
-def map_typeVar_type(type_var, **extra) -> str:
+def map_typeVar_type(type_var, context: ConversionContext | None = None) -> str:
     """
     映射 Python 中的 TypeVar
     """
@@ -260,36 +254,35 @@ def map_typeVar_type(type_var, **extra) -> str:
     constraints = type_var.__constraints__
 
     if bound:
-        bound_result = map_base_type(bound, **extra)
+        bound_result = map_base_type(bound, context)
         return bound_result["code"] if isinstance(bound_result, dict) and "code" in bound_result else bound_result
     if constraints:
         constraint_list = []
         for c in constraints:
-            c_result = map_base_type(c, **extra)
+            c_result = map_base_type(c, context)
             constraint_list.append(c_result["code"] if isinstance(c_result, dict) and "code" in c_result else c_result)
         return handle_union_type(constraint_list)
 
     return "any"
 
 
-def map_enum_type(enum_type, **extra) -> str:
+def map_enum_type(enum_type, context: ConversionContext | None = None) -> str:
     """
     映射 Python 中的枚举类型
     """
+    return str(map_enum_declaration(enum_type, context))
+
+
+def map_enum_declaration(enum_type, context: ConversionContext | None = None) -> ir.Enum:
+    """
+    映射 Python 中的枚举类型为 IR 节点
+    """
     import enum
     if not isinstance(enum_type, type) or not issubclass(enum_type, enum.Enum):
         raise TypeError("The argument must be an Enum class.")
     
     # 获取枚举成员
-    members = []
-    for member in enum_type:
-        if isinstance(member.value, str):
-            members.append(f"{member.name} = '{member.value}'")
-        else:
-            members.append(f"{member.name} = {member.value}")
-    
-    members_str = ",\n  ".join(members)
-    return f"enum {enum_type.__name__} {{\n  {members_str},\n}}"
+    return ir.Enum(enum_type.__name__, [ir.EnumMember(member.name, member.value) for member in enum_type])
 
 
 # # 原始复合类型
@@ -320,14 +313,244 @@ def map_enum_type(enum_type, **extra) -> str:
 # }
 
 
+def _map_literal_instance(python_type, origin, args, arg_types, context) -> dict:
+    """字面量实例（字符串、数字）原样返回"""
+    return {"code":python_type, "is_literal":True}
+
+
+def _map_tuple_instance(python_type, origin, args, arg_types, context) -> dict:
+    """元组实例，如 Callable 的参数列表或 tuple[T, ...] 的展开"""
+    if len(python_type) == 2 and python_type[1] is Ellipsis:
+        # tuple[T, ...] -> T[]
+        return {"code":f"{arg_types[0]}[]", "tuple":True}
+    # 固定长度元组
+    return {"code":handel_tuple_type(arg_types), "tuple":True}
+
+
+def _map_list_instance(python_type, origin, args, arg_types, context) -> dict:
+    """列表实例，如 Callable[[int, str], None] 中的参数列表"""
+    return {"code":handel_tuple_type(arg_types), "list":True}
+
+
+def _map_generic(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_generic_type(python_type,args,context.converter.store), "generic":True}
+
+
+def _map_list(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_list_type(arg_types), "list":True}
+
+
+def _map_tuple(python_type, origin, args, arg_types, context) -> dict:
+    if len(args) == 2 and args[1] is Ellipsis:
+        # tuple[T, ...] -> T[]
+        return {"code":f"{arg_types[0]}[]", "tuple":True}
+    return {"code":handel_tuple_type(arg_types), "tuple":True}
+
+
+def _map_record(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_record_type(arg_types), "dict":True}
+
+
+def _map_set(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_set_type(origin,arg_types), "set":True}
+
+
+def _map_deque(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_deque_type(arg_types), "deque":True}
+
+
+def _map_counter(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_counter_type(arg_types), "counter":True}
+
+
+def _map_chainmap(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_chainmap_type(arg_types), "chainmap":True}
+
+
+def _map_union(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_union_type(arg_types), "union":True}
+
+
+def _map_optional(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_optional_type(arg_types), "optional":True}
+
+
+def _map_literal(python_type, origin, args, arg_types, context) -> dict:
+    return {"code":handle_literal_type(args), "literal":True}
+
+
+def _map_callable(python_type, origin, args, arg_types, context) -> dict:
+    if args[1] == type(None):
+        arg_types[1] = "void"
+    return {"code":handle_callable_type(arg_types), "callable":True}
+
+
+# 类型表达式节点的构造器：(origin, 原始参数, 参数的代码, 参数的节点) -> 节点，与对应处理器的代码相同
+
+
+def _any() -> ir.Reference:
+    return ir.Reference("any")
+
+
+def _list_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    if len(nodes) == 0:
+        return ir.Array(_any(), shorthand=True)
+    if len(nodes) == 1:
+        return ir.Array(nodes[0])
+    return ir.Tuple(nodes)
+
+
+def _tuple_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    if len(args) == 2 and args[1] is Ellipsis:
+        return ir.Array(nodes[0], shorthand=True)
+    if len(nodes) == 0:
+        return ir.Array(_any(), shorthand=True)
+    if len(nodes) == 2 and arg_types[1] == "...":
+        return ir.Array(nodes[0], shorthand=True)
+    return ir.Tuple(nodes)
+
+
+def _record_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Reference("Record", nodes or (ir.Reference("string"), _any()))
+
+
+def _set_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Reference("Set" if origin is set else "ReadonlySet", nodes or (_any(),))
+
+
+def _deque_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Array(nodes[0] if nodes else _any())
+
+
+def _counter_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Reference("Record", (nodes[0] if nodes else _any(), ir.Reference("number")))
+
+
+def _chainmap_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Reference("Record", nodes or (_any(), _any()))
+
+
+def _union_members(nodes: Iterable[ir.TypeNode]) -> Iterable[ir.TypeNode]:
+    # 成员本身是联合类型（如 None 的 `null | undefined`）时展开，输出相同
+    for node in nodes:
+        if isinstance(node, ir.Union):
+            yield from node.members
+        else:
+            yield node
+
+
+def _union_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Union(_union_members(nodes))
+
+
+def _optional_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return ir.Union((*_union_members(nodes), ir.Reference("undefined")))
+
+
+def _literal_node(origin, args, arg_types, nodes) -> ir.TypeNode:
+    return literal_node(args)
+
+
+def literal_node(values: Iterable[Any]) -> ir.TypeNode:
+    """`Literal[...]` 的类型表达式节点，与 `handle_literal_type` 的结果相同"""
+    literals = [ir.Literal(value) for value in values]
+    if len(literals) == 0:
+        return ir.Reference("never")
+    if len(literals) == 1:
+        return literals[0]
+    return ir.Union(literals)
+
+
+# 可以直接作为类型引用的名称
+_NAME = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+def _named(code: str, **extra) -> dict:
+    """名称（基础类型、已声明的类型等）的映射结果，code 为标识符或标识符的联合（如 `null | undefined`）时带有节点"""
+    if _NAME.fullmatch(code):
+        return {"code": code, "node": ir.Reference(code), **extra}
+    names = code.split(" | ")
+    if len(names) > 1 and all(_NAME.fullmatch(name) for name in names):
+        return {"code": code, "node": ir.Union(ir.Reference(name) for name in names), **extra}
+    return {"code": code, **extra}
+
+
+def result_node(result: dict) -> ir.TypeNode:
+    """`map_base_type` 结果的类型表达式节点，没有结构化节点（自定义处理器等返回的代码）时为 `Raw`"""
+    node = result.get("node")
+    return node if node is not None else ir.Raw(result["code"])
+
+
+class OriginHandler(NamedTuple):
+    """复合类型处理器"""
+
+    handler: Callable[..., dict]
+    # 是否需要先将类型参数映射为 TypeScript 代码（Literal 直接使用原始参数）
+    map_args: bool = True
+    # 类型表达式节点的构造器，为 None 时结果只有代码
+    to_ir: Callable[..., ir.TypeNode] | None = None
+
+
+# 按实例类型分派：`type(python_type)` -> 处理器
+INSTANCE_HANDLERS: dict[type, OriginHandler] = {
+    str: OriginHandler(_map_literal_instance, map_args=False),
+    int: OriginHandler(_map_literal_instance, map_args=False),
+    float: OriginHandler(_map_literal_instance, map_args=False),
+    tuple: OriginHandler(_map_tuple_instance),
+    list: OriginHandler(_map_list_instance),
+}
+
+# 按 origin 分派：`get_origin(python_type) or python_type` -> 处理器
+ORIGIN_HANDLERS: dict[Any, OriginHandler] = {}
+
+
+def register_origin_handler(
+    *origins: Any,
+    handler: Callable[..., dict],
+    map_args: bool = True,
+    to_ir: Callable[..., ir.TypeNode] | None = None,
+) -> None:
+    """
+    注册复合类型处理器，后注册的会覆盖先注册的。
+    Args:
+        origins: `get_origin` 的返回值（无参时为类型本身）
+        handler: `handler(python_type, origin, args, arg_types, context) -> dict`，
+            返回值与 `map_base_type` 相同，至少包含 `code`
+        map_args: 为 False 时 `arg_types` 为空列表，处理器自行使用 `args`
+        to_ir: `to_ir(origin, args, arg_types, arg_nodes) -> TypeNode`，构造与 `code` 相同的
+            `pytots.ir` 类型表达式节点（写入结果的 `node`），为 None 时其他后端只能得到代码（`Raw`）
+    """
+    for origin in origins:
+        ORIGIN_HANDLERS[origin] = OriginHandler(handler, map_args, to_ir)
+    invalidate_all_caches()
+
+
+register_origin_handler(typing.Generic, handler=_map_generic)
+register_origin_handler(*ARRAY_TYPES_COLLECTION, handler=_map_list, to_ir=_list_node)
+register_origin_handler(*TUPLE_TYPES_COLLECTION, handler=_map_tuple, to_ir=_tuple_node)
+register_origin_handler(*RECORD_TYPES_COLLECTION, handler=_map_record, to_ir=_record_node)
+register_origin_handler(*SET_TYPES_COLLECTION, handler=_map_set, to_ir=_set_node)
+register_origin_handler(*QUEUE_TYPES_COLLECTION, handler=_map_deque, to_ir=_deque_node)
+register_origin_handler(*COUNTER_TYPES_COLLECTION, handler=_map_counter, to_ir=_counter_node)
+register_origin_handler(*CHAINMAP_TYPES_COLLECTION, handler=_map_chainmap, to_ir=_chainmap_node)
+register_origin_handler(*UNION_TYPES_COLLECTION, handler=_map_union, to_ir=_union_node)
+register_origin_handler(*OPTIONAL_TYPES_COLLECTION, handler=_map_optional, to_ir=_optional_node)
+register_origin_handler(*LITERAL_TYPES_COLLECTION, handler=_map_literal, map_args=False, to_ir=_literal_node)
+register_origin_handler(typing.Callable, get_origin(typing.Callable), handler=_map_callable)
+
+
+def _lookup(table: dict, key: Any) -> Any:
+    """哈希查找，不可哈希的类型（如 pydantic 的部分注解对象）直接视为未命中"""
+    try:
+        return table.get(key)
+    except TypeError:
+        return None
+
+
 def map_base_type(
     python_type: Any,
-    *,
-    __stack: list[Any] = [],
-    process_newType: 'ProcessNewTypeFunc',
-    process_typeVar: 'ProcessTypeVarFunc',
-    process_enum: 'ProcessEnumFunc',
-    process_missing: 'ProcessMissingFunc',
+    context: ConversionContext | None = None,
+    **processer,
 ) -> dict:
     """
     基础类型映射
@@ -343,205 +566,200 @@ def map_base_type(
     - NewType 类型。
     - TypeVar 类型。
     - TypedDict 类型。
-    """
 
-    # 判断是否为自引用
-    if python_type in __stack:
-        return {"code":f"{python_type.__name__}"}
-    
-    # 1. 处理 ForwardRef 类型
-    if isinstance(python_type, typing.ForwardRef):
-        # try:
-        #     bbb = python_type._evaluate(globals(), locals(), frozenset())
-        # except NameError:
-        #     pass
-        # __stack.append(python_type)
-        return {"code":python_type.__forward_arg__}
-
-    # 2. 简略处理 Final 和 ClassVar 类型
-    if get_origin(python_type) in [typing.Final, typing.ClassVar]:
-        python_type = get_args(python_type)[0]  # 获取 Final 或 ClassVar 的原始类型
-
-
-    __stack.append(python_type)
-    processer: "Processers" = {
-        "process_newType": process_newType,
-        "process_typeVar": process_typeVar,
-        "process_enum": process_enum,
-        "process_missing": process_missing,
-    }
-    extra: "Extra" = {
-        "__stack": __stack,
-        **processer,
-    }
-
-    if isinstance(python_type, NewType):  # 处理 NewType 类型，只返回名称
-        if process_newType:
-            process_newType(*__stack, **processer)
-        __stack.pop()
-        return {"code":python_type.__name__,"new_type":True}  # type: ignore
-
-    if isinstance(python_type, TypeVar):  # 处理 TypeVar 类型，只返回名称
-        res = python_type.__name__
-        if process_typeVar:
-            res = process_typeVar(*__stack, **processer)
-        __stack.pop()
-        return {"code":res,"type_var":True, "type":python_type}
+    #### 匹配顺序:
+    1. `ForwardRef`：返回引用的名称；`Final` / `ClassVar`：取出被修饰的类型
+    2. 自引用：已在转换栈中的类型直接返回名称
+    3. `NewType` / `TypeVar`：交由对应的处理函数
+    4. 按实例类型查找 `INSTANCE_HANDLERS`（字面量字符串、数字，以及元组、列表实例）
+    5. 按类型本身精确查找 `SINGLE_TYPES_MAP`
+    6. 按 origin 查找 `ORIGIN_HANDLERS`（由 `clf.py` 中的集合编译而来）
+    7. `process_missing`（枚举、函数、泛型类及插件）
+    8. 可替换类型映射（默认会话为 `REPLACEABLE_TYPES_MAP`）
+    9. 兜底为 `any`
+
+    第 5、6 步为哈希查找，不可哈希的类型会跳过这两步。
+
+    可缓存的类型表达式的结果会写入当前会话的转换缓存，重复出现时直接返回。
+    类型参数以显式栈后序遍历，嵌套深度不受递归深度限制；生成声明期间遇到的类由最外层的声明逐个生成（见 `processer._declare`），
+    类之间的嵌套深度同样不受限制。
+
+    Args:
+        python_type: 要映射的类型
+        context: 转换上下文，为 None 时使用当前激活的上下文，
+            不在转换过程中时以 `processer` 中的处理函数为默认会话新建
+    """
+    if context is None:
+        context = ConversionContext.current() or ConversionContext(**processer)
+    return _traverse(python_type, context)
+
+
+# 遍历栈中的帧：(_ENTER, 类型) 表示待访问，
+# (_EXIT, 类型, 缓存键, 处理器, origin, 原始参数, 子节点数, 进入时引用列表的长度) 表示子节点已全部入栈
+_ENTER = 0
+_EXIT = 1
+
+
+def _traverse(python_type: Any, context: ConversionContext) -> dict:
+    """
+    以显式栈后序遍历类型表达式：先求出所有类型参数，再交给对应的处理器。
+
+    类型参数的嵌套深度只受内存限制，不会触发 `RecursionError`；
+    插件转换类的字段时会再次调用 `map_base_type`，但字段中的类只会推迟生成，不会继续递归。
+    """
+    cache = context.converter.cache
+    refs = context.refs  # 处理函数只在生成新声明期间临时替换 `context.refs`，遍历的各帧之间保持不变
+    results: list[dict] = []
+    work: list[tuple] = [(_ENTER, python_type)]
+    depth = len(context.stack)
+
+    try:
+        while work:
+            frame = work.pop()
+
+            if frame[0] is _EXIT:
+                _, node, key, entry, origin, args, n, mark = frame
+                start = len(results) - n
+                arg_typpes = [r["code"] for r in results[start:]]
+                if entry is not None and entry.to_ir is not None:
+                    arg_nodes = [result_node(r) for r in results[start:]]
+                del results[start:]
+                res = _finish(node, entry, origin, args, arg_typpes, context)
+                if entry is not None and entry.to_ir is not None:
+                    res["node"] = type_node = entry.to_ir(origin, args, arg_typpes, arg_nodes)
+                    type_node._code = res["code"]  # 与代码相同，输出时不必递归拼接
+                context.pop()
+                if key is not None:
+                    cache.put(key, node, res, tuple(refs[mark:]))
+                results.append(res)
+                continue
+
+            node = frame[1]
+            key = cache.make_key(node)
+            if key is not None and (hit := cache.lookup(key)) is not None:
+                res, cached_refs = hit
+                context.replay(cached_refs)  # 重放命中条目引用的声明
+                results.append(res)
+                continue
+
+            # 1. 处理 ForwardRef 类型
+            if isinstance(node, typing.ForwardRef):
+                results.append(_named(node.__forward_arg__))
+                continue
+
+            # 2. 简略处理 Final 和 ClassVar 类型
+            if get_origin(node) in [typing.Final, typing.ClassVar]:
+                node = get_args(node)[0]  # 获取 Final 或 ClassVar 的原始类型
+                key = None  # 只缓存被修饰的类型
+
+            # 判断是否为自引用
+            if node in context:
+                # 环状引用同样记为依赖，使依赖关系与先转换哪一个类型无关
+                refs.append(node)
+                results.append(_named(node.__name__))
+                continue
+
+            context.push(node)
+            mark = len(refs)
+            res, entry, origin, args, children = _enter(node, context)
+            if res is not None:
+                context.pop()
+                if key is not None:
+                    cache.put(key, node, res, tuple(refs[mark:]))
+                results.append(res)
+                continue
+
+            work.append((_EXIT, node, key, entry, origin, args, len(children), mark))
+            for child in reversed(children):
+                work.append((_ENTER, child))
+    except BaseException:
+        while len(context.stack) > depth:
+            context.pop()
+        raise
+
+    return results[0]
+
+
+def _enter(node: Any, context: ConversionContext) -> tuple:
+    """
+    访问节点（已入栈），返回 `(结果, 处理器, origin, 原始参数, 待映射的子节点)`，
+    结果不为 None 时节点为叶子节点。
+    """
+    if isinstance(node, NewType):  # 处理 NewType 类型，只返回名称
+        if context.process_newType:
+            context.process_newType(node, context)
+        return _named(node.__name__, new_type=True), None, None, (), ()  # type: ignore
+
+    if isinstance(node, TypeVar):  # 处理 TypeVar 类型，只返回名称
+        res = node.__name__
+        if context.process_typeVar:
+            res = context.process_typeVar(node, context)
+        return _named(res, type_var=True, type=node), None, None, (), ()
 
     # 0.特殊实例处理
-    if type(python_type) is str:  # 处理字符串,它是字面量
-        __stack.pop()
-        return {"code":python_type, "is_literal":True}
-    
-    
-    if type(python_type) in [int,float]:  # 处理数字,它是字面量
-        __stack.pop()
-        return {"code":python_type, "is_literal":True}
-    
-    
-    if type(python_type) is typing.Any:  # 处理 Any 类型
-        __stack.pop()
-        return {"code":"any"}
-    
+    if (entry := INSTANCE_HANDLERS.get(type(node))) is not None:
+        if entry.map_args:
+            return None, entry, None, node, node
+        return entry.handler(node, None, node, [], context), None, None, (), ()
 
-    if type(python_type) is tuple:  # 处理元组
-        # 检查是否是可变长度元组 (tuple[T, ...])
-        if len(python_type) == 2 and python_type[1] is Ellipsis:
-            # tuple[T, ...] -> T[]
-            element_result = map_base_type(python_type[0], **extra)
-            element_type = element_result["code"] if isinstance(element_result, dict) and "code" in element_result else element_result
-            res = f"{element_type}[]"
-        else:
-            # 固定长度元组
-            type_list = []
-            for a in python_type:
-                a_result = map_base_type(a, **extra)
-                type_list.append(a_result["code"] if isinstance(a_result, dict) and "code" in a_result else a_result)
-            res = handel_tuple_type(type_list)
-        __stack.pop()
-        return {"code":res, "tuple":True}
-
-    if type(python_type) is list:
-        type_list = []
-        for a in python_type:
-            a_result = map_base_type(a, **extra)
-            type_list.append(a_result["code"] if isinstance(a_result, dict) and "code" in a_result else a_result)
-        res = handel_tuple_type(type_list)
-        __stack.pop()
-        return {"code":res, "list":True}
-
-    # 1.处理单一类型
-    if any(python_type == x for x in SINGLE_TYPES_MAP.keys()):
-        __stack.pop()
-        return {"code":SINGLE_TYPES_MAP[python_type]}  # type: ignore
-
-    origin = get_origin(python_type)
-    args = get_args(python_type)
+    origin = get_origin(node)
+    args = get_args(node)
 
     if origin is None:
-        origin = python_type
-
-    arg_typpes = []
-    for arg in args:
-        arg_result = map_base_type(arg, **extra)
-        arg_typpes.append(arg_result["code"] if isinstance(arg_result, dict) and "code" in arg_result else arg_result)
-
-    # 2.处理复合类型
-    
-    if origin is typing.Generic:   # 处理 Generic 类型
-        res = handle_generic_type(python_type,args)
-        __stack.pop()
-        return {"code":res, "generic":True}
-    
-    if origin in ARRAY_TYPES_COLLECTION:  # 映射 List
-        res = handle_list_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "list":True}
-
-    if origin in TUPLE_TYPES_COLLECTION:  # 映射 Tuple
-        # 检查是否是可变长度元组 (tuple[T, ...])
-        if len(args) == 2 and args[1] is Ellipsis:
-            # tuple[T, ...] -> T[]
-            element_result = map_base_type(args[0], **extra)
-            element_type = element_result["code"] if isinstance(element_result, dict) and "code" in element_result else element_result
-            res = f"{element_type}[]"
-        else:
-            res = handel_tuple_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "tuple":True}
-
-    if origin in RECORD_TYPES_COLLECTION:  # 映射 Dict
-        res = handle_record_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "dict":True}
-
-    if origin in SET_TYPES_COLLECTION:  # 映射 Set
-        res = handle_set_type(origin,arg_typpes)
-        __stack.pop()
-        return {"code":res, "set":True}
-
-    if origin in QUEUE_TYPES_COLLECTION:  # 映射 Deque
-        res = handle_deque_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "deque":True}
-
-    if origin in COUNTER_TYPES_COLLECTION:  # 映射 Counter
-        res = handle_counter_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "counter":True}
-
-    if origin in CHAINMAP_TYPES_COLLECTION:  # 映射 ChainMap
-        res = handle_chainmap_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "chainmap":True}
-
-    if origin in UNION_TYPES_COLLECTION:  # 映射 Union
-        res = handle_union_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "union":True}
-
-    if origin in OPTIONAL_TYPES_COLLECTION:  # 映射 Optional
-        res = handle_optional_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "optional":True}
-
-    if origin in LITERAL_TYPES_COLLECTION:  # 映射 Literal
-        res = handle_literal_type(args)
-        __stack.pop()
-        return {"code":res, "literal":True}
-
-    if origin is typing.Callable or origin is get_origin(typing.Callable):
-        if args[1] == type(None):
-            arg_typpes[1] = "void"
-        res = handle_callable_type(arg_typpes)
-        __stack.pop()
-        return {"code":res, "callable":True}
+        # 1.处理单一类型（单一类型都不是复合类型，无需对复合类型求哈希）
+        if (res := _lookup(SINGLE_TYPES_MAP, node)) is not None:
+            return _named(res), None, None, (), ()
+        origin = node
+
+    # 2.处理复合类型，Literal 等不需要映射参数的直接使用原始参数
+    entry = _lookup(ORIGIN_HANDLERS, origin)
+    if entry is not None and not entry.map_args:
+        res = entry.handler(node, origin, args, [], context)
+        if entry.to_ir is not None:
+            res["node"] = entry.to_ir(origin, args, [], [])
+        return res, None, None, (), ()
+
+    return None, entry, origin, args, args
+
+
+def _finish(
+    node: Any,
+    entry: OriginHandler | None,
+    origin: Any,
+    args: tuple,
+    arg_typpes: list[str],
+    context: ConversionContext,
+) -> dict:
+    """子节点映射完成后计算节点结果（节点仍在栈中）"""
+    if entry is not None:
+        return entry.handler(node, origin, args, arg_typpes, context)
 
-    
-    if process_missing and (
-        res := process_missing(*__stack, **processer)
+    if context.process_missing and (
+        res := context.process_missing(node, context)
     ):  # 处理未知类型
-        __stack.pop()
         if type(res) is str:
-            return {"code":res}
-        return {"code":"any"}
+            return _named(res)
+        return _named("any")
 
-    if origin in REPLACEABLE_TYPES_MAP:
-        res = REPLACEABLE_TYPES_MAP[origin]
-        __stack.pop()
-        return {"code":res}
+    if (res := _lookup(context.converter.replaceable_types_map, origin)) is not None:
+        return _named(res)
     
     # any 兜底
-    __stack.pop()
-    return {"code":"any"}
+    return _named("any")
 
 
 __all__ = [
     "map_base_type",
+    "result_node",
+    "literal_node",
+    "register_origin_handler",
+    "INSTANCE_HANDLERS",
+    "ORIGIN_HANDLERS",
     "map_newType_type",
     "map_type_alias_type",
     "map_typeVar_type",
     "map_enum_type",
+    "map_enum_declaration",
     "handle_deque_type",
     "handle_counter_type",
     "handle_chainmap_type",
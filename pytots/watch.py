@@ -0,0 +1,214 @@
+"""
+监视模式
+
+轮询包中各模块源码文件的修改时间和大小（不依赖 inotify 等第三方库），发现变化时：
+
+1. 找出变化模块中定义的声明（包括基类在变化模块中的类），以及直接或间接引用了它们的声明，从会话的存储中移除；
+2. 按依赖在前的顺序重新加载变化的模块和引用了它们的模块，其余模块保持不变；
+3. 重新转换这些模块的公开类型，按与完整转换相同的顺序重排声明，再通过 `output_ts_file` 写出
+   （内容未变化时不写入）。
+
+新增的模块会被导入并转换，删除的模块的声明会被移除。模块重新加载失败（如编辑到一半的语法错误）时
+打印错误并保留上一次的输出，文件再次修改后重试。
+
+Example:
+    >>> from pytots.watch import watch
+    >>> watch(["backend.models"], "frontend/src/types/models.d.ts", None)
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+from typing import Any, Iterable
+
+from pytots.converter import DEFAULT_CONVERTER, Converter
+from pytots.scanner import Scanner
+from pytots.store import declaration_modules
+
+
+def _stamp(name: str) -> tuple | None:
+    """已导入模块的源码文件的 (修改时间, 大小)，没有对应文件时返回 None"""
+    path = getattr(sys.modules.get(name), "__file__", None)
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size) if stat else None
+
+
+class Watcher:
+    """监视包中的模块，增量地重新生成 TypeScript 定义文件"""
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        file_path: str,
+        module_name: str | None = "PytsDemo",
+        format: bool = True,
+        *,
+        converter: Converter | None = None,
+        include: Iterable[str] = ("*",),
+        exclude: Iterable[str] = (),
+        interval: float = 0.5,
+    ) -> None:
+        """
+        Args:
+            names: 包名或模块名
+            file_path: 输出文件路径
+            module_name: 模块名，默认值为 "PytsDemo", 当为 None 时，输出不添加模块声明。
+            format: 是否格式化输出，默认值为 True
+            converter: 转换会话，为 None 时使用默认会话的副本
+            include: 需要转换的类型，见 `pytots.scanner.Scanner`
+            exclude: 需要排除的类型或模块
+            interval: 轮询间隔（秒）
+        """
+        self.names = list(names)
+        self.file_path = file_path
+        self.module_name = module_name
+        self.format = format
+        self.converter = converter or DEFAULT_CONVERTER.clone()
+        self.scanner = Scanner(self.converter.plugins, include, exclude)
+        self.interval = interval
+        self.modules: list[str] = []  # 监视中的模块，按包的遍历顺序
+        self.roots: dict[str, list] = {}  # 模块 -> 模块中的公开类型
+        self._stamps: dict[str, tuple | None] = {}  # 模块 -> 源码文件的标识
+        self._dirs: dict[str, int] = {}  # 包目录 -> 修改时间，目录变化时重新查找模块
+
+    def _package_dirs(self) -> dict[str, int]:
+        dirs = {}
+        for name in self.modules:
+            for path in getattr(sys.modules.get(name), "__path__", None) or ():
+                try:
+                    dirs[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    dirs[path] = -1
+        return dirs
+
+    def build(self) -> None:
+        """完整转换并写出文件"""
+        self.converter.reset_store()
+        self.modules = list(self.scanner.iter_module_names(self.names))
+        self.roots = {}
+        for name in self.modules:
+            self.roots[name] = self.scanner.module_types(importlib.import_module(name))
+            self._stamps[name] = _stamp(name)
+        self._dirs = self._package_dirs()
+        for roots in self.roots.values():
+            for root in roots:
+                self.converter.convert_to_ts(root)
+        self._output()
+
+    def _output(self) -> None:
+        # 内容未变化时不写入，避免触发下游的重新构建
+        self.converter.output_ts_file(self.file_path, self.module_name, self.format, if_changed=True)
+
+    def poll(self) -> list[str]:
+        """
+        检查一次源码的变化，有变化时增量更新并写出文件。
+        Returns:
+            重新加载（或新导入）的模块，没有变化时为空列表
+        """
+        modules = self.modules
+        if self._package_dirs() != self._dirs:
+            modules = list(self.scanner.iter_module_names(self.names))
+        removed = [name for name in self.modules if name not in modules]
+        changed = [
+            name for name in modules
+            if name not in self._stamps or name not in sys.modules or _stamp(name) != self._stamps[name]
+        ]
+        if not changed and not removed:
+            return []
+        return self.update(modules, changed, removed)
+
+    def update(self, modules: list[str], changed: list[str], removed: list[str]) -> list[str]:
+        """移除受影响的声明，重新加载相关模块并重新转换"""
+        store = self.converter.store
+        touched = set(changed) | set(removed)
+        # 类的声明展开了继承的字段，基类所在的模块变化时同样需要重新转换
+        stale = {t for t in store.declaration_index if touched.intersection(declaration_modules(t))}
+        stale |= store.dependents(stale)
+
+        # 依赖在前：按当前声明的顺序排列受影响的模块，基类所在的模块排在子类所在的模块之前（子类重新加载后继承新的基类），
+        # 没有声明的变化模块排在最前，新增的模块排在最后
+        watched = set(modules)
+        reloading = set(changed) | {getattr(t, "__module__", None) for t in stale}
+        ordered: list[str] = []
+        for type_ in store.dependency_order(r for roots in self.roots.values() for r in roots):
+            if type_ not in stale:
+                continue
+            for module in declaration_modules(type_):
+                if module in reloading and module in watched and module not in ordered:
+                    ordered.append(module)
+        affected = [name for name in changed if name in self.roots and name not in ordered]
+        affected += ordered
+        affected += [name for name in changed if name not in self.roots]
+
+        store.discard(stale)
+        self.converter.cache.invalidate()
+        self.converter.plugin_index().clear()  # 重新加载后模块中的类是新的对象
+        for name in removed:
+            self.roots.pop(name, None)
+            self._stamps.pop(name, None)
+            sys.modules.pop(name, None)
+
+        reloaded = []
+        for name in affected:
+            self._stamps[name] = _stamp(name)
+            try:
+                if name in sys.modules:
+                    module = importlib.reload(sys.modules[name])
+                else:
+                    module = importlib.import_module(name)
+            except Exception as e:
+                print(f"❌ 重新加载 {name} 失败: {e!r}")
+                continue
+            self._stamps[name] = _stamp(name)
+            self.roots[name] = self.scanner.module_types(module)
+            reloaded.append(name)
+
+        self.modules = modules
+        self._dirs = self._package_dirs()
+        self.roots = {name: self.roots[name] for name in modules if name in self.roots}
+        # 其余模块的声明都还在存储中，只需转换受影响的模块（重新加载失败的模块沿用原有的类型）
+        for name in affected:
+            for root in self.roots.get(name, ()):
+                self.converter.convert_to_ts(root)
+        store.reorder(store.dependency_order(r for name in modules for r in self.roots.get(name, ())))
+        self._output()
+        return reloaded
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """完整转换一次，然后持续轮询直到 stop 被设置"""
+        stop = stop or threading.Event()
+        self.build()
+        print(f"👀 正在监视 {', '.join(self.names)} -> {self.file_path}")
+        while not stop.wait(self.interval):
+            start = time.perf_counter()
+            if reloaded := self.poll():
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"🔄 {', '.join(reloaded)} 已更新，重新生成耗时 {elapsed:.0f} ms")
+
+
+def watch(
+    names: Iterable[str],
+    file_path: str,
+    module_name: str | None = "PytsDemo",
+    format: bool = True,
+    **options: Any,
+) -> None:
+    """
+    监视包中的模块，源码变化时增量地重新生成 TypeScript 定义文件，按 Ctrl+C 停止。
+    参数见 `Watcher`
+    """
+    try:
+        Watcher(names, file_path, module_name, format, **options).run()
+    except KeyboardInterrupt:
+        pass
+
+
+__all__ = [
+    "Watcher",
+    "watch",
+]
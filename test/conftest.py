@@ -0,0 +1,90 @@
+import sys
+import textwrap
+
+import pytest
+
+
+MODULES = {
+    "__init__.py": "",
+    "common.py": """
+        from enum import Enum
+        from typing import NewType
+        from dataclasses import dataclass
+
+        UserId = NewType("UserId", int)
+
+        class Role(Enum):
+            ADMIN = "admin"
+            GUEST = "guest"
+
+        @dataclass
+        class User:
+            id: UserId
+            role: Role
+    """,
+    "orders/__init__.py": "",
+    "orders/models.py": """
+        from dataclasses import dataclass
+        from typing import List, Optional
+        from ..common import User, UserId
+
+        @dataclass
+        class Order:
+            owner: User
+            reviewers: List[UserId]
+            parent: Optional["Order"]
+    """,
+    "orders/billing.py": """
+        from typing import TypedDict
+        from .models import Order
+
+        class Invoice(TypedDict):
+            order: Order
+            amount: float
+    """,
+}
+
+
+# 子类在另一个模块中继承基类的字段
+INHERITED_MODULES = {
+    "__init__.py": "",
+    "base.py": """
+        from dataclasses import dataclass
+
+        @dataclass
+        class Parent:
+            x: int
+    """,
+    "animal.py": """
+        from dataclasses import dataclass
+        from .base import Parent
+
+        @dataclass
+        class Child(Parent):
+            y: str
+    """,
+}
+
+
+def _make_package(tmp_path, monkeypatch, name, modules):
+    root = tmp_path / name
+    for path, source in modules.items():
+        file = root / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(textwrap.dedent(source), encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield name
+    for module in [m for m in sys.modules if m == name or m.startswith(name + ".")]:
+        del sys.modules[module]
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """在临时目录中生成一个包含子包和跨模块引用的包"""
+    yield from _make_package(tmp_path, monkeypatch, "shop", MODULES)
+
+
+@pytest.fixture
+def inherited(tmp_path, monkeypatch):
+    """在临时目录中生成一个子类与基类在不同模块中的包"""
+    yield from _make_package(tmp_path, monkeypatch, "zoo", INHERITED_MODULES)
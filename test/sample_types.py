@@ -0,0 +1,43 @@
+"""测试共用的类型：互相引用的 dataclass、枚举和 NewType"""
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, NewType, Optional
+
+
+@dataclass
+class TreeNode:
+    value: int
+    children: List["TreeNode"]
+    parent: Optional["TreeNode"]
+
+
+Sku = NewType("Sku", str)
+
+
+class Status(Enum):
+    OPEN = "open"
+
+
+@dataclass
+class Item:
+    sku: Sku
+    status: Status
+
+
+@dataclass
+class Cart:
+    items: List[Item]
+    owner: Optional["Customer"]
+
+
+@dataclass
+class Customer:
+    carts: Dict[str, Cart]
+    favorite: Optional[Item]
+
+
+@dataclass
+class Payment:
+    customer: Customer
+    status: Status
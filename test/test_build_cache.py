@@ -0,0 +1,61 @@
+import os
+import sys
+
+from pytots.build_cache import BuildCache
+from pytots.parallel import convert_package, output_package, render_declarations
+
+
+def test_build_cache(package, tmp_path):
+    """测试增量构建只重新转换源码或依赖有变化的模块"""
+    cache = BuildCache(tmp_path / "cache")
+    expected = convert_package([package], workers=1)
+    assert convert_package([package], workers=1, cache=cache) == expected
+    assert cache.report.reused == []
+    assert len(cache.report.rebuilt) == 5
+
+    # 新的缓存实例读取已有的缓存目录，所有模块都直接复用
+    cache = BuildCache(tmp_path / "cache")
+    assert convert_package([package], workers=1, cache=cache) == expected
+    assert cache.report.rebuilt == []
+
+    # 修改 common 后，引用其声明的 orders.models 也需要重新转换，orders.billing 只引用 Order，可以复用
+    common = sys.modules["shop.common"].__file__
+    with open(common, "a", encoding="utf-8") as f:
+        f.write("\nclass Extra(Enum):\n    A = 1\n")
+    st = os.stat(common)
+    os.utime(common, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    for name in [m for m in sys.modules if m.startswith("shop")]:
+        del sys.modules[name]
+    records = convert_package([package], workers=1, cache=cache)
+    assert cache.report.rebuilt == ["shop.common", "shop.orders.models"]
+    assert "Extra" in render_declarations(records, None)
+    assert records == convert_package([package], workers=1)
+
+
+def test_output_package(package, tmp_path):
+    """测试使用缓存输出到文件"""
+    path = tmp_path / "out" / "types.d.ts"
+    first = output_package([package], str(path), cache_dir=str(tmp_path / "cache"), workers=1)
+    content = path.read_text(encoding="utf-8")
+    second = output_package([package], str(path), cache_dir=str(tmp_path / "cache"), workers=1)
+    assert (len(first.rebuilt), len(second.reused)) == (5, 5)
+    assert path.read_text(encoding="utf-8") == content
+    assert str(second) == "♻️ 复用 5 个模块, 🔨 重新转换 0 个模块"
+
+
+def test_build_cache_inherited(inherited, tmp_path):
+    """测试修改基类后，在其他模块中继承其字段的子类也重新转换"""
+    cache = BuildCache(tmp_path / "cache")
+    convert_package([inherited], workers=1, cache=cache)
+
+    base = sys.modules["zoo.base"].__file__
+    with open(base, "a", encoding="utf-8") as f:
+        f.write("    z: float\n")
+    st = os.stat(base)
+    os.utime(base, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    for name in [m for m in sys.modules if m.startswith("zoo")]:
+        del sys.modules[name]
+    records = convert_package([inherited], workers=1, cache=cache)
+    assert cache.report.rebuilt == ["zoo.animal", "zoo.base"]
+    assert "z: number;" in render_declarations(records, None).split("type Child")[1]
+    assert records == convert_package([inherited], workers=1)
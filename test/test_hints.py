@@ -0,0 +1,81 @@
+import sys
+import types
+import typing
+
+import pytest
+
+from pytots.hints import get_type_hints, clear_type_hints_cache
+
+from sample_types import TreeNode
+
+
+def test_type_hints_cache():
+    """测试注解解析缓存：结果与 typing.get_type_hints 相同，注解变化和重新定义后重新解析"""
+    source = '''
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Annotated, Callable, ClassVar, Dict, List, Literal, Optional, TypedDict
+
+@dataclass
+class Node:
+    value: int
+    parent: Optional[Node]
+    children: List["Node"]
+    kind: Literal["a", "b"]
+    callback: Callable[[int, Node], str]
+    note: Annotated[int, "meta"] = 0
+    count: ClassVar[int] = 0
+
+class Leaf(Node):
+    extra: Dict[str, Leaf]
+
+class Row(TypedDict):
+    id: int
+    node: Optional[Node]
+
+def handle(node: Node, depth: int = 0) -> List[Leaf]: ...
+'''
+    module = types.ModuleType("_hints_case")
+    sys.modules[module.__name__] = module
+    try:
+        exec(source, module.__dict__)
+        for obj in (module.Node, module.Leaf, module.Row, module.handle, TreeNode):
+            expected = typing.get_type_hints(obj)
+            assert get_type_hints(obj) == expected
+            # 命中缓存的结果相同，且是新的字典
+            cached = get_type_hints(obj)
+            assert cached == expected and list(cached) == list(expected)
+            cached.clear()
+            assert get_type_hints(obj) == expected
+
+        # 注解增加后重新解析
+        module.Row.__annotations__["name"] = "str"
+        assert get_type_hints(module.Row)["name"] is str
+
+        # 重新定义的类不会命中旧的结果
+        old = module.Node
+        exec(source.replace("value: int", "value: str"), module.__dict__)
+        assert get_type_hints(module.Node)["value"] is str
+        assert get_type_hints(old)["value"] is int
+
+        clear_type_hints_cache()
+        assert get_type_hints(module.Leaf) == typing.get_type_hints(module.Leaf)
+    finally:
+        del sys.modules[module.__name__]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="typing.Required 需要 Python 3.11")
+def test_required_wrappers():
+    """测试 Required、NotRequired 与 typing.get_type_hints 一样被去掉，TypedDict 正常转换"""
+    from typing import NotRequired, Required, TypedDict
+    from pytots import Converter
+
+    class Row(TypedDict, total=False):
+        a: Required[int]
+        b: NotRequired[str]
+        c: int
+
+    assert get_type_hints(Row) == typing.get_type_hints(Row) == {"a": int, "b": str, "c": int}
+    converter = Converter()
+    assert converter.convert_to_ts(Row) == "Row"
+    assert "type Row = {\n  a: number;\n  b: string;\n  c: number;\n}" in converter.get_output_ts_str(None)
@@ -0,0 +1,171 @@
+import random
+from dataclasses import dataclass
+from typing import Callable, Literal as TypingLiteral, Optional, Tuple as TypingTuple
+
+from pytots import Converter
+from pytots.formart import TypeScriptFormatter
+from pytots.ir import (
+    Array,
+    Enum,
+    EnumMember,
+    Field,
+    FunctionDecl,
+    Interface,
+    Literal,
+    Parameter,
+    Raw,
+    Reference,
+    Tuple,
+    TypeAlias,
+    Union,
+    format_declaration,
+)
+from pytots.plugin.inner import DataclassPlugin
+from pytots.render import format_declarations
+
+
+def test_compact_output():
+    """测试 IR 的紧凑输出与原来拼接的代码相同"""
+    user = Interface("User", [Field("id", Reference("number")), Field("tags", Array(Raw("string")), True)])
+    assert str(user) == "type User = {\n  id: number;\n  tags?: Array<string>;\n}"
+    page = Interface("Page", [Field("items", Raw("Array<T>"))], ["T extends Base"], ["Base"], "interface")
+    assert str(page) == "interface Page extends Base<T extends Base> {\n  items: Array<T>;\n}"
+    assert str(Interface("A", [], extends=["B", "C"])) == "type A = {\n  \n} &B & C;"
+    assert str(Enum("Color", [EnumMember("RED", "red"), EnumMember("ONE", 1)])) == "enum Color {\n  RED = 'red',\n  ONE = 1,\n}"
+    signature = FunctionDecl("f", [Parameter("a", Union([Literal("x"), Literal(True)])), Parameter("b", Raw("number"), True)], Raw("void"))
+    assert str(signature) == "function f(a: 'x' | true, b?: number): void;"
+    assert str(TypeAlias("UserId", Raw("number"))) == "type UserId = number;"
+    pair = Tuple([Reference("Record", [Reference("string"), Array(Reference("number"), shorthand=True)]), Tuple([])])
+    assert str(pair) == "[Record<string, number[]>, []]"
+
+
+# 格式化时需要特殊处理的类型表达式：操作符、逗号、括号、花括号、字符串和注释
+TYPES = [
+    "number", "Record<string, any>", "'a' | 'b'", "(...args:[string]) => number", "-1", "{ a: string }",
+    "[A, B]", "x /* c */", "a//b", "'it's'", "(", "}", "", " a  b ", "a=b", "?",
+]
+
+
+# 结构化节点的名称和字面量，包括需要格式化器处理的名称
+NAMES = ["number", "Item", "Record", "a b", "a-b"]
+LITERALS = ["x", "it's", "a b", "", 1, -1.5, True, None]
+
+
+def random_type(rng: random.Random, depth: int = 0):
+    kind = rng.randrange(7 if depth < 3 else 3)
+    if kind == 0:
+        return Raw(rng.choice(TYPES))
+    if kind == 1:
+        return Reference(rng.choice(NAMES))
+    if kind == 2:
+        return Literal(rng.choice(LITERALS))
+    members = [random_type(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    if kind == 3:
+        return Reference(rng.choice(NAMES), members)
+    if kind == 4:
+        return Array(random_type(rng, depth + 1), rng.random() < 0.3)
+    return Union(members) if kind == 5 else Tuple(members)
+
+
+def random_declaration(rng: random.Random):
+    type_ = lambda: random_type(rng)
+    name = lambda: rng.choice(["a", "b_c", "名字", "a-b", "x y"])
+    kind = rng.randrange(4)
+    if kind == 0:
+        return TypeAlias(rng.choice(["X", "A-b"]), type_(), rng.choice([(), ("T extends number",)]))
+    if kind == 1:
+        fields = [Field(name(), type_(), rng.random() < 0.5) for _ in range(rng.randint(0, 3))]
+        return Interface("User", fields, rng.choice([(), ("T",)]), rng.choice([(), ("Base", "A<T>")]), rng.choice(["type", "interface"]))
+    if kind == 2:
+        return Enum("E", [EnumMember(name(), rng.choice(["red", 1, -1.5, None, "it's"])) for _ in range(rng.randint(0, 3))])
+    params = [Parameter(name(), type_(), rng.random() < 0.5) for _ in range(rng.randint(0, 3))]
+    return FunctionDecl(rng.choice(["f", "g-"]), params, type_())
+
+
+def test_format_declaration():
+    """测试直接输出的格式化结果与格式化器格式化紧凑输出的结果逐字节相同"""
+    rng = random.Random(0)
+    printed = 0
+    for _ in range(2000):
+        node = random_declaration(rng)
+        level, prefix = rng.randint(0, 2), rng.choice(["", "declare "])
+        output = format_declaration(node, level, prefix)
+        if output is not None:
+            printed += 1
+            assert output == TypeScriptFormatter().format_declaration(prefix + str(node), level), node
+
+        declarations = [(prefix, random_declaration(rng) if rng.random() < 0.8 else str(random_declaration(rng))) for _ in range(3)]
+        for head, tail in (("", ""), ("declare namespace X {\n  ", "\n}")):
+            code = head + "\n  ".join(p + str(d) for p, d in declarations) + tail
+            assert "".join(format_declarations(declarations, head, tail)) == TypeScriptFormatter().format(code)
+    assert printed > 500
+
+
+def test_plugin_nodes():
+    """测试内置插件返回 IR 节点，返回代码的插件与之输出相同"""
+    from sample_types import Customer, TreeNode
+
+    @dataclass
+    class Query:
+        page: Optional[int]
+        sort: str
+
+    converter = Converter()
+    for tp in (Customer, TreeNode, Query):
+        converter.convert_to_ts(tp)
+    assert isinstance(converter.store.nodes[Query], Interface)
+    assert converter.store.processed_missing["dataclass"][Query] == str(converter.store.nodes[Query])
+
+    class CodePlugin(DataclassPlugin):
+        def converter(self, python_type, **extra):
+            return str(super().converter(python_type, **extra))
+
+    legacy = Converter(plugins=[CodePlugin()])
+    for tp in (Customer, TreeNode, Query):
+        legacy.convert_to_ts(tp)
+    assert not any(isinstance(node, Interface) for node in legacy.store.nodes.values())
+    for module_name in ("PytsDemo", None):
+        expected = TypeScriptFormatter().format(legacy.get_output_ts_str(module_name))
+        assert converter.get_output_ts_str(module_name, True) == expected
+        assert legacy.get_output_ts_str(module_name, True) == expected
+
+
+def test_structured_nodes(monkeypatch):
+    """测试插件和函数转换生成结构化的类型节点，格式化时不经过格式化器"""
+    from sample_types import Cart, Customer, TreeNode
+
+    @dataclass
+    class Report:
+        tags: TypingTuple[str, ...]
+        pair: TypingTuple[int, Cart]
+        level: TypingLiteral["low", "high"]
+        hook: Callable[[int], None]
+
+    def checkout(cart: Cart, coupon: Optional[str] = None) -> Customer: ...
+
+    converter = Converter()
+    for tp in (Report, TreeNode, checkout):
+        converter.convert_to_ts(tp)
+    fields = {field.name: field.type for field in converter.store.nodes[Report].fields}
+    assert isinstance(fields["tags"], Array) and fields["tags"].shorthand
+    assert isinstance(fields["pair"], Tuple) and isinstance(fields["pair"].elements[1], Reference)
+    assert isinstance(fields["level"], Union) and all(isinstance(m, Literal) for m in fields["level"].members)
+    assert isinstance(fields["hook"], Raw)
+    children, parent = (field.type for field in converter.store.nodes[TreeNode].fields[1:])
+    assert isinstance(children, Array) and isinstance(children.element, Reference)
+    assert isinstance(parent, Union) and [str(m) for m in parent.members] == ["TreeNode", "null", "undefined"]
+    signature = converter.store.nodes[checkout]
+    assert isinstance(signature.params[1].type, Union) and isinstance(signature.returns, Reference)
+
+    # Raw 类型的字段和代码形式的声明也按词法单元直接输出
+    expected = TypeScriptFormatter().format(converter.get_output_ts_str("PytsDemo"))
+    codes = [str(node) for node in converter.store.nodes.values()]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("不应经过格式化器")
+
+    monkeypatch.setattr(TypeScriptFormatter, "format_declaration", fail)
+    monkeypatch.setattr(TypeScriptFormatter, "format_inline", fail)
+    assert converter.get_output_ts_str("PytsDemo", True) == expected
+    for code in codes:
+        assert format_declaration(code, 1, "declare ") is not None
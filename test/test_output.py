@@ -0,0 +1,197 @@
+import os
+from dataclasses import make_dataclass
+from typing import List
+
+from pytots import Converter
+from pytots.output import write_file
+
+
+def test_write_if_changed(tmp_path):
+    """测试内容未变化时不写入文件"""
+    path = str(tmp_path / "types" / "out.d.ts")
+    assert write_file(path, "type A = string;\n", if_changed=True)
+    os.utime(path, ns=(0, 0))
+    assert not write_file(path, "type A = string;\n", if_changed=True)
+    assert os.stat(path).st_mtime_ns == 0
+    assert write_file(path, "type A = number;\n", if_changed=True)
+    assert os.stat(path).st_mtime_ns != 0
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "type A = number;\n"
+    assert [p for p in os.listdir(tmp_path / "types")] == ["out.d.ts"]
+
+
+def test_write_file_mode(tmp_path):
+    """测试原子替换时新文件的权限与直接创建时相同，已有文件保留原来的权限"""
+    plain, atomic = str(tmp_path / "plain.d.ts"), str(tmp_path / "atomic.d.ts")
+    write_file(plain, "type A = string;\n")
+    write_file(atomic, "type A = string;\n", if_changed=True)
+    assert os.stat(atomic).st_mode == os.stat(plain).st_mode
+    os.chmod(atomic, 0o640)
+    assert write_file(atomic, "type A = number;\n", if_changed=True)
+    assert os.stat(atomic).st_mode & 0o777 == 0o640
+
+
+def test_output_ts_file_if_changed(tmp_path):
+    """测试 output_ts_file 返回文件内容是否变化"""
+    converter = Converter()
+    converter.convert_to_ts(list[int])
+    path = str(tmp_path / "out.d.ts")
+    assert converter.output_ts_file(path, if_changed=True)
+    assert not converter.output_ts_file(path, if_changed=True)
+    assert converter.output_ts_file(path, None, if_changed=True)
+
+
+UGLY_TS = """
+interface Config{host:string;port:number} // 端口
+/* 块注释 { } */ type A='a;{' | "b\\"}"
+const f=(c:Config)=>{if(c.port>8000){for(let i=0;i<10;i++){log(i);}}else{throw new Error( "x" );}}
+"""
+
+
+def test_formatter_feed():
+    """测试按任意位置切分后增量格式化的结果与整体格式化相同"""
+    from pytots.formart import TypeScriptFormatter
+
+    expected = TypeScriptFormatter().format(UGLY_TS)
+    for size in range(1, 9):
+        formatter = TypeScriptFormatter()
+        chunks = [formatter.feed(UGLY_TS[i:i + size]) for i in range(0, len(UGLY_TS), size)]
+        assert "".join(chunks) + formatter.finish() == expected
+
+
+def test_formatter_reference():
+    """测试格式化结果与逐字符的参考实现逐字节相同"""
+    import random
+    from pytots.formart import ReferenceTypeScriptFormatter, TypeScriptFormatter
+
+    assert TypeScriptFormatter().format(UGLY_TS) == ReferenceTypeScriptFormatter().format(UGLY_TS)
+    pieces = list("a_1 \t\n{}();,=?:+-*%/'\"`\\>") + ["//", "/*", "*/", "=>", "x y", "if", "\u00a0"]
+    rng = random.Random(0)
+    for _ in range(2000):
+        code = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 60)))
+        assert TypeScriptFormatter().format(code) == ReferenceTypeScriptFormatter().format(code), code
+
+
+def test_stream_output(tmp_path):
+    """测试流式输出与 get_output_ts_str 一致"""
+    from sample_types import Customer, TreeNode
+
+    converter = Converter()
+    converter.convert_to_ts(Customer)
+    converter.convert_to_ts(TreeNode)
+    for module_name in ("PytsDemo", None):
+        for format in (False, True):
+            chunks = list(converter.iter_output_ts(module_name, format))
+            assert len(chunks) > 2
+            assert "".join(chunks) == converter.get_output_ts_str(module_name, format)
+
+    path = str(tmp_path / "out.d.ts")
+    assert converter.output_ts_file(path, stream=True)
+    assert not converter.output_ts_file(path, if_changed=True, stream=True)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == converter.get_output_ts_str("PytsDemo", True)
+
+    # 流式输出完成后清理缓存，修改过的声明不会在缓存中累积
+    count = len(converter.format_cache)
+    for index in range(5):
+        node = make_dataclass("Node", [("value", List[int] if index % 2 else str)])
+        converter.convert_to_ts(node)
+        converter.output_ts_file(path, stream=True)
+        assert len(converter.format_cache) == count + 1
+        converter.store.discard([node])
+
+
+def test_format_cache():
+    """测试重复格式化输出时只格式化新增或变化的声明"""
+    from pytots.formart import TypeScriptFormatter
+    from sample_types import Customer, Payment, TreeNode
+
+    converter = Converter()
+    converter.convert_to_ts(Customer)
+    first = converter.get_output_ts_str(format=True)
+    count = len(converter.format_cache)
+    assert converter.format_cache.info().misses == count > 0
+
+    converter.convert_to_ts(Payment)
+    converter.convert_to_ts(TreeNode)
+    output = converter.get_output_ts_str(format=True)
+    assert output == TypeScriptFormatter().format(converter.get_output_ts_str())
+    added = len(converter.store.declaration_index) - count
+    assert converter.format_cache.info().hits == count
+    assert converter.format_cache.info().misses == count + added
+
+    # 移除的声明在下一次输出后从缓存中清除
+    converter.store.discard([Payment, TreeNode])
+    assert converter.get_output_ts_str(format=True) == first
+    assert len(converter.format_cache) == count
+
+
+def test_parallel_format(monkeypatch):
+    """测试在进程池中并行格式化的输出与逐个格式化相同"""
+    import pytots.render
+    from sample_types import Customer, Payment, TreeNode
+
+    converter = Converter()
+    for tp in (Customer, Payment, TreeNode):
+        converter.convert_to_ts(tp)
+    expected = {name: converter.get_output_ts_str(name, True) for name in ("PytsDemo", None)}
+    # 去掉 IR 节点，按代码形式的声明（如多进程转换的声明记录）格式化，并让很小的输出也使用进程池
+    converter.store.nodes.clear()
+    monkeypatch.setattr(pytots.render, "PARALLEL_FORMAT_THRESHOLD", 0)
+    for name, output in expected.items():
+        converter.format_cache.clear()
+        assert converter.get_output_ts_str(name, True, workers=2) == output
+        # 拼接时每个声明都使用工作进程格式化的结果，并写入缓存
+        assert converter.format_cache.info().misses == 0 < len(converter.format_cache)
+
+
+def test_parallel_format_nodes(monkeypatch):
+    """测试 IR 节点形式的声明（NewType、枚举、函数及插件生成的接口）同样在进程池中并行格式化"""
+    import pytots.render
+    from pytots.ir import DeclarationNode
+    from sample_types import Cart, Customer, Payment, TreeNode
+
+    def checkout(cart: Cart, customer: Customer) -> Payment:
+        ...
+
+    converter = Converter()
+    for tp in (Cart, Customer, Payment, TreeNode, checkout):
+        converter.convert_to_ts(tp)
+    assert all(isinstance(node, DeclarationNode) for node in converter.store.nodes.values())
+    assert len(converter.store.nodes) == len(converter.store.declaration_index)
+    expected = {name: converter.get_output_ts_str(name, True, workers=1) for name in ("PytsDemo", None)}
+
+    pools = []
+
+    class Pool(pytots.render.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(pytots.render, "ProcessPoolExecutor", Pool)
+    monkeypatch.setattr(pytots.render, "PARALLEL_FORMAT_THRESHOLD", 0)
+    for name, output in expected.items():
+        converter.format_cache.clear()
+        # 默认不使用进程池
+        assert converter.get_output_ts_str(name, True) == output and not pools
+        converter.format_cache.clear()
+        assert converter.get_output_ts_str(name, True, workers=2) == output
+        # 拼接时每个声明都使用工作进程格式化的结果，并写入缓存
+        assert converter.format_cache.info().misses == 0
+        assert len(converter.format_cache) == len(converter.store.declaration_index)
+        pools.clear()
+        # 缓存中已有全部声明时不启动进程池
+        assert converter.get_output_ts_str(name, True, workers=2) == output and not pools
+
+    # 并行格式化时仍逐个声明地读入，只提前读入两个窗口
+    consumed = []
+
+    def declarations():
+        for i in range(100):
+            consumed.append(i)
+            yield "", f"type A{i} = {{ a: number }};"
+
+    chunks = pytots.render.format_declarations(declarations(), workers=2)
+    assert next(chunks) == "type A0 = {\n    a : number\n};"
+    assert len(consumed) <= 3 and len(pools) == 1
+    assert "".join(chunks).count("type A") == 99
@@ -0,0 +1,46 @@
+import pytest
+
+from pytots import Converter
+from pytots.scanner import Scanner
+from pytots.parallel import (
+    ModuleRecords,
+    convert_package,
+    merge_records,
+    render_declarations,
+)
+
+
+def test_convert_package(package):
+    """测试多进程转换与逐个转换的输出一致"""
+    import importlib
+
+    converter = Converter()
+    scanner = Scanner(converter.plugins)
+    for name in ["shop.common", "shop.orders.billing", "shop.orders.models"]:
+        for tp in scanner.module_types(importlib.import_module(name)):
+            converter.convert_to_ts(tp)
+    expected = converter.get_output_ts_str(None)
+
+    serial = convert_package([package], workers=1)
+    parallel = convert_package([package], workers=2)
+    assert serial == parallel
+    assert render_declarations(parallel, None) == expected
+    assert [r.key for r in parallel if r.section != "typevar"] == [
+        "shop.common.UserId",
+        "shop.common.Role",
+        "shop.common.User",
+        "shop.orders.models.Order",
+        "shop.orders.billing.Invoice",
+    ]
+    order = next(r for r in parallel if r.name == "Order")
+    assert order.deps == ("shop.common.User", "shop.common.UserId", "shop.orders.models.Order")
+
+
+def test_merge_duplicate_names(package):
+    """测试不同模块中的同名声明"""
+    records = convert_package([package], workers=1)
+    batch = ModuleRecords("shop", tuple(r.key for r in records), records)
+    assert merge_records([batch, batch]) == records
+    clash = ModuleRecords("other", (), [records[0]._replace(key="other.UserId")])
+    with pytest.raises(ValueError, match="UserId"):
+        merge_records([batch, clash])
@@ -0,0 +1,174 @@
+import gc
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, TypeVar
+
+import pytest
+
+from pytots.plugin import PluginIndex
+from pytots.plugin.inner import DataclassPlugin, TypedDictPlugin
+
+from sample_types import Cart, Item
+
+
+def test_plugin_index_releases_types():
+    """测试插件分派缓存不会阻止类型被回收，不能弱引用的键按容量淘汰"""
+    index = PluginIndex([DataclassPlugin(), TypedDictPlugin()])
+
+    @dataclass
+    class Temp:
+        value: int
+
+    assert index.resolve(Temp) is index.plugins[0]
+    assert index.resolve(int) is None
+    assert len(index) == 2
+
+    ref = weakref.ref(Temp)
+    del Temp
+    gc.collect()
+    assert ref() is None
+    assert len(index) == 1
+
+    for i in range(PluginIndex.STRONG_CACHE_SIZE + 10):
+        assert index.resolve(f"Forward{i}") is None
+    assert len(index._strong) == PluginIndex.STRONG_CACHE_SIZE
+
+    index.clear()
+    assert len(index) == 0
+
+
+def test_plugin_index():
+    """测试插件分派按类型缓存、只对声明的基类调用 is_supported，并跳过同名插件"""
+    from pytots import Converter
+
+    class Base:
+        pass
+
+    class Money:
+        pass
+
+    calls = []
+
+    class BasePlugin(DataclassPlugin):
+        name = "base"
+        bases = (Base,)
+        TYPES_MAP = {Money: "string"}
+
+        def is_supported(self, python_type):
+            calls.append(python_type)
+            return isinstance(python_type, type) and issubclass(python_type, Base)
+
+        def converter(self, python_type, **extra):
+            return f"type {python_type.__name__} = {{}};"
+
+    class Model(Base):
+        pass
+
+    class Wrapper(DataclassPlugin):
+        name = "wrapper"
+        requires = [BasePlugin()]
+
+    converter = Converter(plugins=[BasePlugin(), Wrapper(), Wrapper()])
+    assert [p.name for p in converter.plugins] == ["base", "wrapper"]
+
+    assert converter.convert_to_ts(Dict[str, Model]) == "Record<string, Model>"
+    assert converter.convert_to_ts(Item) == "Item"
+    assert converter.convert_to_ts(List[Money]) == "Array<string>"
+    assert converter.convert_to_ts(Optional[Money]) == "string | null | undefined"
+    # 只有 Model 的 MRO 中有 Base，其余类型不调用 is_supported
+    assert calls == [Model]
+    assert converter.plugin_index().resolve(Model) is converter.plugins[0]
+
+    # 修改插件列表后重建索引
+    index = converter.plugin_index()
+    converter.plugins.pop(0)
+    assert converter.plugin_index() is not index
+    assert converter.plugin_index().resolve(Model) is None
+
+
+def test_plugin_call():
+    """测试插件从调用参数中取得泛型和继承参数，旧接口的插件经适配后输出相同"""
+    from dataclasses import is_dataclass
+    from typing import Generic, get_type_hints
+    from pytots import Converter
+    from pytots.plugin import Plugin
+    from pytots.plugin.tools import assemble_interface_type, generic_feild_fill
+
+    T = TypeVar("T")
+
+    @dataclass
+    class Page(Generic[T]):
+        items: List[T]
+        total: int
+
+    @dataclass
+    class ItemPage(Page[Item]):
+        cursor: Optional[str]
+
+    calls = []
+
+    class CallPlugin(DataclassPlugin):
+        def convert(self, python_type, call):
+            calls.append(call)
+            return super().convert(python_type, call)
+
+    class LegacyPlugin(Plugin):
+        name = "dataclass"
+
+        def is_supported(self, python_type):
+            return isinstance(python_type, type) and is_dataclass(python_type)
+
+        def converter(self, python_type, **extra):
+            fields = []
+            for field, field_type in get_type_hints(python_type).items():
+                ts_type = generic_feild_fill(self, field_type, **extra)
+                fields.append(f"{field}{'?' if 'undefined' in ts_type else ''}: {ts_type};")
+            return assemble_interface_type(self, python_type.__name__, "\n  ".join(fields))
+
+    outputs = []
+    for plugin in (DataclassPlugin(), CallPlugin(), LegacyPlugin()):
+        converter = Converter(plugins=[plugin])
+        converter.convert_to_ts(ItemPage)
+        outputs.append(converter.get_output_ts_str(None, True))
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert "items : Array<Item>;" in outputs[0]
+
+    assert {call.context is not None for call in calls} == {True}
+    assert any(call.type_params == ("T extends any",) and call.generic_names == ("T",) for call in calls)
+    assert any(call.extends and call.extends[0].startswith("Page<") for call in calls)
+    with pytest.raises(AttributeError):
+        calls[0].extends = ()
+
+
+def test_fill_fields():
+    """测试批量转换字段：结果与逐个调用 fill_field 相同，继承的泛型基类的类型变量被替换"""
+    from typing import Generic
+    from pytots import Converter
+    from pytots.plugin.tools import fill_field, fill_fields
+
+    T = TypeVar("T")
+    U = TypeVar("U")
+
+    @dataclass
+    class Pair(Generic[T, U]):
+        first: T
+        rest: List[Optional[U]]
+        count: int
+
+    @dataclass
+    class ItemPair(Pair[Item, Cart]):
+        label: Optional[str]
+
+    batches = []
+
+    class CheckPlugin(DataclassPlugin):
+        def convert(self, python_type, call):
+            types = [T, List[Optional[U]], Dict[str, T], int]
+            batch = fill_fields(call, types)
+            assert batch == [fill_field(call, tp) for tp in types]
+            batches.append((call.extends, batch))
+            return super().convert(python_type, call)
+
+    converter = Converter(plugins=[CheckPlugin()])
+    converter.convert_to_ts(ItemPair)
+    assert (("Pair<Item, Cart>",), ["Item", "Array<Cart | null | undefined>", "Record<string, Item>", "number"]) in batches
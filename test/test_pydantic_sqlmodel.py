@@ -114,6 +114,142 @@ def test_function_availability():
     assert callable(handle_chainmap_type)
 
 
+def _convert_pydantic(models, **options):
+    """分别按注解和按 core schema 转换，返回两份输出"""
+    from pytots import Converter
+    from pytots.plugin.inner import DataclassPlugin
+    from pytots.plugin.plus import PydanticPlugin
+
+    outputs = []
+    for core_schema in (False, True):
+        converter = Converter(plugins=[DataclassPlugin(), PydanticPlugin({**options, "core_schema": core_schema})])
+        for model in models:
+            converter.convert_to_ts(model)
+        outputs.append(converter.get_output_ts_str(None, True))
+    return outputs
+
+
+def test_pydantic_core_schema():
+    """测试按 core schema 转换 pydantic 模型：嵌套模型、联合、约束类型和默认值的输出与按注解转换相同"""
+    pytest.importorskip("pydantic")
+    import datetime
+    import enum
+    from dataclasses import dataclass
+    from typing import Deque, FrozenSet, Literal, Set, Tuple, Union
+    from pydantic import BaseModel, Field, SecretStr, conint, constr, field_validator
+
+    class Role(enum.Enum):
+        ADMIN = "admin"
+        USER = "user"
+
+    @dataclass
+    class Point:
+        x: float
+        y: float
+
+    class Base(BaseModel):
+        id: int
+        created_at: datetime.datetime
+        token: SecretStr = Field(default="", exclude=True)
+
+    class Tag(BaseModel):
+        name: constr(max_length=20)
+        weight: conint(gt=0) = 1
+
+    class User(Base):
+        name: str
+        email: Optional[str] = None
+        role: Role
+        tags: List[Tag] = Field(default_factory=list)
+        scores: Dict[str, Optional[float]]
+        location: Union[Point, str, None] = None
+        flags: Set[str]
+        frozen: FrozenSet[int]
+        pair: Tuple[int, str]
+        history: Tuple[Tag, ...]
+        kind: Literal["a", "b", 3]
+        parent: Optional["User"] = None
+        children: List["User"] = []
+        # core schema 不能区分的写法，按注解转换
+        extra: Dict[Any, Any]
+        anything: List[Any]
+        queue: Deque[int]
+
+        @field_validator("name")
+        @classmethod
+        def strip(cls, value):
+            return value.strip()
+
+    User.model_rebuild()
+    from pytots.plugin.plus.pydantic_schema import model_schema
+    assert model_schema(User) is not None
+    for options in ({}, {"exclude": True}):
+        by_annotations, by_schema = _convert_pydantic([User], **options)
+        assert by_schema == by_annotations
+    assert "tags ? : Array<Tag>;" in by_schema
+    assert "token" not in by_schema
+
+
+def test_pydantic_core_schema_models():
+    """测试随机生成的模型族按 core schema 转换的输出与按注解转换相同，模型重建后重新解析 core schema"""
+    pytest.importorskip("pydantic")
+    import random
+    from typing import NewType, Union
+    from pydantic import BaseModel, create_model
+    from pytots.plugin.plus.pydantic_schema import model_schema
+
+    rng = random.Random(0)
+    models = []
+    for i in range(60):
+        fields = {}
+        for j in range(6):
+            if models and rng.random() < 0.4:
+                ref = rng.choice(models)
+                tp = rng.choice([ref, List[ref], Optional[ref], Dict[str, ref]])
+            else:
+                tp = rng.choice([int, str, float, bool, List[str], Optional[int]])
+            fields[f"f{j}"] = (tp, None) if rng.random() < 0.3 else (tp, ...)
+        models.append(create_model(f"Model{i}", **fields))
+    assert all(model_schema(model) is not None for model in models)
+    by_annotations, by_schema = _convert_pydantic(models)
+    assert by_schema == by_annotations
+
+    # core schema 中还原不出的注解按注解转换：NewType、自定义 core schema 的类型、None 不在最后的联合类型
+    UserId = NewType("UserId", int)
+
+    class Money:
+        @classmethod
+        def __get_pydantic_core_schema__(cls, source, handler):
+            return handler(float)
+
+    class Loose(BaseModel):
+        value: Union[int, None, str]
+        names: Optional[List[Union[None, str]]]
+        user: UserId
+        ids: List[UserId]
+        price: Money
+        plain: Optional[Union[int, str]]
+
+    by_annotations, by_schema = _convert_pydantic([Loose])
+    assert by_schema == by_annotations
+    assert "value : number | null | undefined | string;" in by_schema
+    assert "user : UserId;" in by_schema
+    annotated = [f.name for f in model_schema(Loose).fields if f.annotated]
+    assert annotated == ["value", "names", "user", "ids", "price"]
+
+    class Later(BaseModel):
+        node: "Node"
+
+    assert model_schema(Later) is None  # 前向引用未解析，按注解转换
+
+    class Node(BaseModel):
+        value: int
+
+    Later.model_rebuild()
+    schema = model_schema(Later)
+    assert [f.name for f in schema.fields] == ["node"] and model_schema(Later) is schema
+
+
 if __name__ == "__main__":
     """运行所有测试"""
     print("=== 开始 Pydantic 和 SQLModel 支持测试 ===")
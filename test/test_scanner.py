@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+from pytots.scanner import DiscoveryCache, Scanner, scan_package
+
+
+@pytest.fixture
+def tests_module(package, tmp_path):
+    """在包中加入一个不应被导入的测试子包"""
+    tests = tmp_path / package / "tests"
+    tests.mkdir()
+    (tests / "__init__.py").write_text("", encoding="utf-8")
+    (tests / "test_models.py").write_text("raise RuntimeError('imported')\n", encoding="utf-8")
+    return package
+
+
+def test_scan_package(tests_module):
+    """测试扫描包中可转换的类型"""
+    names = [
+        f"{t.__module__}.{t.__name__}"
+        for t in scan_package([tests_module], exclude=["shop.tests*", "*.Role"])
+    ]
+    assert names == [
+        "shop.common.UserId",
+        "shop.common.User",
+        "shop.orders.billing.Invoice",
+        "shop.orders.models.Order",
+    ]
+    assert "shop.tests.test_models" not in sys.modules
+
+    only = scan_package([tests_module], include=["shop.orders.*"], exclude=["shop.tests*"])
+    assert [t.__name__ for t in only] == ["Invoice", "Order"]
+
+
+def test_discovery_cache(package, tmp_path):
+    """测试未修改的模块复用发现结果，修改后重新扫描"""
+    cache = DiscoveryCache()
+    scanner = Scanner(cache=cache)
+    first = scanner.scan([package])
+    assert cache.info().hits == 0
+    assert scanner.scan([package]) == first
+    assert cache.info().hits == cache.info().misses
+
+    common = tmp_path / package / "common.py"
+    stat = common.stat()
+    common.write_text(common.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    os.utime(common, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    misses = cache.info().misses
+    scanner.scan([package])
+    assert cache.info().misses == misses + 1
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from pytots import Converter
+from pytots.scanner import scan_package
+from pytots.shard import render_shards
+
+
+def test_output_shards(package, tmp_path):
+    """测试按模块分片输出及跨文件的 import type"""
+    converter = Converter()
+    for tp in scan_package([package]):
+        converter.convert_to_ts(tp)
+    directory = str(tmp_path / "types")
+    changed = converter.output_ts_shards(directory)
+    assert all(changed.values())
+    assert sorted(os.listdir(directory)) == [
+        "index.ts", "shop.common.ts", "shop.orders.billing.ts", "shop.orders.models.ts",
+    ]
+
+    def read(name):
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            return f.read()
+
+    models = read("shop.orders.models.ts")
+    assert models.startswith('import type { User, UserId } from "./shop.common";\n\nexport type Order = {')
+    assert 'import type { Order } from "./shop.orders.models";' in read("shop.orders.billing.ts")
+    assert "export enum Role" in read("shop.common.ts")
+    assert read("index.ts") == (
+        'export * from "./shop.common";\n'
+        'export * from "./shop.orders.models";\n'
+        'export * from "./shop.orders.billing";\n'
+    )
+
+    # 再次输出时内容不变的文件不会被重写
+    assert not any(converter.output_ts_shards(directory).values())
+
+    # 自定义分组，分组名中的 "/" 对应子目录
+    changed = converter.output_ts_shards(directory, key=lambda t: t.__module__.replace(".", "/"), index="all.ts")
+    assert os.path.join(directory, "shop", "orders", "models.ts") in changed
+    assert read("shop/orders/billing.ts").startswith('import type { Order } from "./models";')
+    assert 'from "../common"' in read("shop/orders/models.ts")
+    assert 'export * from "./shop/common";' in read("all.ts")
+
+
+def test_shard_duplicate_names(package):
+    """测试同一分片中的同名声明"""
+    converter = Converter()
+    for tp in scan_package([package]):
+        converter.convert_to_ts(tp)
+    store = converter.store
+    twin = type("User", (), {"__module__": "shop.other"})
+    store.record_declaration(store.processed_missing["dataclass"], twin, "dataclass", "type User = {}")
+    assert "shop.other" in render_shards(store)
+    with pytest.raises(ValueError, match="User"):
+        render_shards(store, key=lambda t: "all")
@@ -0,0 +1,33 @@
+from enum import Enum
+from typing import Dict, List, NewType
+
+from pytots import convert_to_ts, get_output_ts_str, reset_store
+from pytots.processer import exist_missing_type
+from pytots.store import DEFAULT_STORE, get_declaration
+
+from sample_types import TreeNode
+
+
+def test_declaration_index():
+    """测试声明索引与按分类存储的字典保持一致"""
+    UserId = NewType("UserId", int)
+
+    class Color(Enum):
+        RED = 1
+
+    reset_store()
+    convert_to_ts(Dict[UserId, Color])
+    convert_to_ts(TreeNode)
+    convert_to_ts(List[UserId])
+    assert get_declaration(UserId) == ("newtype", "UserId", "type UserId = number;", "newtype")
+    assert get_declaration(Color).category == "enum"
+    assert get_declaration(TreeNode).category == "dataclass"
+    # 只有 processed_missing 中的声明属于缺失类型，与分类名无关
+    assert get_declaration(TreeNode).section == "missing"
+    assert exist_missing_type(TreeNode, DEFAULT_STORE)
+    assert not exist_missing_type(UserId, DEFAULT_STORE)
+    assert get_declaration(int) is None
+    assert get_declaration([]) is None
+    assert get_output_ts_str(None).startswith("type UserId = number;\n  enum Color")
+    reset_store()
+    assert get_declaration(UserId) is None
@@ -0,0 +1,221 @@
+import pytest
+from dataclasses import dataclass
+from pytots import convert_to_ts, reset_store, cache_info
+from pytots.type_map import ORIGIN_HANDLERS, register_origin_handler
+from typing import Callable, Literal, Optional, List, Dict, TypeVar
+
+from sample_types import Cart, Customer, Item, Payment, Sku, TreeNode
+
+
+def test_origin_dispatch():
+    """测试按 origin 分派的复合类型"""
+    assert convert_to_ts(Literal["a", 1, True]) == "'a' | 1 | true"
+    assert convert_to_ts(Callable[[int, str], None]) == "(...args:[number, string]) => void"
+    assert convert_to_ts(Optional[List[int]]) == "Array<number> | null | undefined"
+    assert convert_to_ts(Dict[str, tuple[int, ...]]) == "Record<string, number[]>"
+
+
+def test_eq_is_not_called():
+    """单一类型查找不应触发自定义的 __eq__"""
+
+    class Weird(type):
+        def __eq__(cls, other):
+            raise AssertionError("__eq__ should not be called")
+
+        __hash__ = type.__hash__
+
+    class Column(metaclass=Weird):
+        pass
+
+    assert convert_to_ts(Column) == "any"
+
+
+def test_register_origin_handler():
+    """测试注册自定义 origin 处理器"""
+
+    class MyList(list):
+        pass
+
+    try:
+        register_origin_handler(
+            MyList, handler=lambda t, origin, args, arg_types, extra: {"code": "MyList"}
+        )
+        assert convert_to_ts(MyList) == "MyList"
+    finally:
+        ORIGIN_HANDLERS.pop(MyList, None)
+        reset_store()
+    assert convert_to_ts(MyList) == "any"
+
+
+def test_deep_nesting():
+    """测试深层嵌套的类型表达式不会触发递归深度限制"""
+    import sys
+
+    depth = sys.getrecursionlimit()
+    tp = int
+    for _ in range(depth):
+        tp = list[dict[str, tp]]
+    res = convert_to_ts(tp)
+    assert res == "Array<Record<string, " * depth + "number" + ">>" * depth
+
+
+def test_deep_class_nesting():
+    """测试逐层包裹上一个模型的 dataclass 链：直接转换最外层的模型，声明按依赖在前的顺序输出"""
+    import sys
+    from dataclasses import make_dataclass
+    from pytots import Converter
+
+    depth = sys.getrecursionlimit()
+    models = [make_dataclass("Level0", [("value", int)])]
+    for i in range(1, depth):
+        models.append(make_dataclass(f"Level{i}", [("value", List[Optional[models[-1]]])]))
+    converter = Converter()
+    assert converter.convert_to_ts(models[-1]) == f"Level{depth - 1}"
+    assert list(converter.store.declaration_index) == models
+    output = converter.get_output_ts_str(None)
+    assert f"type Level{depth - 1} = {{\n  value?: Array<Level{depth - 2} | null | undefined>;\n}}" in output
+
+
+def test_conversion_cache():
+    """测试转换缓存的命中与失效"""
+    from pytots import replaceable_type_map
+    import datetime
+
+    reset_store()
+    tp = List[Dict[str, Optional[int]]]
+    assert convert_to_ts(tp) == "Array<Record<string, number | null | undefined>>"
+    hits = cache_info().hits
+    assert convert_to_ts(tp) == "Array<Record<string, number | null | undefined>>"
+    assert cache_info().hits == hits + 1
+
+    # 参数顺序不同的联合类型不能共用缓存
+    assert convert_to_ts(List[int | str]) == "Array<number | string>"
+    assert convert_to_ts(list[str | int]) == "Array<string | number>"
+
+    # 修改可替换类型映射后缓存失效
+    assert convert_to_ts(List[datetime.date]) == "Array<string>"
+    try:
+        replaceable_type_map(datetime.date, "Date")
+        assert convert_to_ts(List[datetime.date]) == "Array<Date>"
+    finally:
+        replaceable_type_map(datetime.date, "string")
+
+
+def test_conversion_cache_bound():
+    """测试缓存容量限制"""
+    from pytots.cache import ConversionCache
+
+    cache = ConversionCache(maxsize=2)
+    for tp in (List[int], List[str], List[bool]):
+        cache.put(cache.make_key(tp), tp, {"code": ""})
+    assert len(cache) == 2
+    assert cache.get(cache.make_key(List[int])) is None
+    assert cache.get(cache.make_key(List[bool])) is not None
+    assert cache.info().hits == 1 and cache.info().misses == 1
+    assert cache.make_key(List["T"]) is not None
+    assert cache.make_key(List[TypeVar("T")]) is None
+
+
+def test_conversion_context():
+    """测试转换上下文：自引用检测，且转换栈不会跨调用残留"""
+    from pytots import get_output_ts_str
+    from pytots.context import ConversionContext
+    from pytots.processer import new_context
+    from pytots.type_map import map_base_type
+
+    reset_store()
+    assert convert_to_ts(TreeNode) == "TreeNode"
+    assert "parent?: TreeNode | null | undefined;" in get_output_ts_str(None)
+    assert ConversionContext.current() is None
+
+    context = new_context()
+
+    def boom(cur, ctx):
+        raise RuntimeError("boom")
+
+    class Unknown:
+        pass
+
+    context.process_missing = boom
+    with pytest.raises(RuntimeError):
+        map_base_type(Dict[str, List[Unknown]], context)
+    assert context.stack == [] and not context.seen
+
+
+def test_isolated_converters():
+    """测试独立的转换会话互不影响"""
+    import datetime
+    import threading
+    from pytots import Converter, get_output_ts_str
+    from pytots.plugin.inner import DataclassPlugin
+
+    @dataclass
+    class Order:
+        created: datetime.date
+
+    @dataclass
+    class Invoice:
+        amount: float
+
+    reset_store()
+    first, second = Converter(), Converter(plugins=[DataclassPlugin()])
+    second.replaceable_type_map(datetime.date, "Date")
+
+    def run(converter, tp):
+        converter.convert_to_ts(tp)
+
+    threads = [
+        threading.Thread(target=run, args=(first, Order)),
+        threading.Thread(target=run, args=(second, Order)),
+        threading.Thread(target=run, args=(second, Invoice)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert "created: string;" in first.get_output_ts_str(None)
+    assert "Invoice" not in first.get_output_ts_str(None)
+    assert "created: Date;" in second.get_output_ts_str(None)
+    assert "Invoice" in second.get_output_ts_str(None)
+    assert get_output_ts_str(None) == ""
+
+    first.reset_store()
+    assert first.get_output_ts_str(None) == ""
+    assert "Order" in second.get_output_ts_str(None)
+
+
+def test_convert_many():
+    """测试线程池批量转换：共享依赖只转换一次，输出与逐个转换一致"""
+    import random
+    from pytots import Converter
+    from pytots.plugin.inner import DataclassPlugin
+
+    class CountingPlugin(DataclassPlugin):
+        calls: Dict[type, int] = {}
+
+        def converter(self, python_type, **extra):
+            self.calls[python_type] = self.calls.get(python_type, 0) + 1
+            return super().converter(python_type, **extra)
+
+    roots = [Payment, List[Cart], Item, Customer, Dict[Sku, Payment]]
+    sequential = Converter()
+    codes = [sequential.convert_to_ts(tp) for tp in roots]
+
+    for _ in range(5):
+        plugin = CountingPlugin()
+        plugin.calls = {}
+        converter = Converter(plugins=[plugin])
+        results = converter.convert_many(random.sample(roots, len(roots)), workers=4)
+        assert all(n == 1 for n in plugin.calls.values()) and len(plugin.calls) == 4
+        assert all(r.elapsed >= 0 for r in results)
+
+        converter = Converter()
+        results = converter.convert_many(roots, workers=4)
+        assert [r.code for r in results] == codes
+        assert [r.type for r in results] == roots
+        assert converter.get_output_ts_str(None) == sequential.get_output_ts_str(None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
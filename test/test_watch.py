@@ -0,0 +1,67 @@
+import os
+import sys
+
+from pytots import Converter
+from pytots.scanner import Scanner
+from pytots.watch import Watcher
+
+
+def _touch(path, text):
+    """追加内容并推后修改时间，避免与上一次写入落在同一时间戳内"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _fresh(package):
+    converter = Converter()
+    scanner = Scanner(converter.plugins)
+    for tp in scanner.scan([package]):
+        converter.convert_to_ts(tp)
+    return converter.get_output_ts_str(None, True)
+
+
+def test_watcher(package, tmp_path):
+    """测试源码变化后只重新加载相关模块，输出与完整转换一致"""
+    out = tmp_path / "types.d.ts"
+    watcher = Watcher([package], str(out), None)
+    watcher.build()
+    assert out.read_text(encoding="utf-8") == _fresh(package)
+    assert watcher.poll() == []
+
+    billing = sys.modules["shop.orders.billing"].__file__
+    _touch(billing, "\nclass Refund(TypedDict):\n    invoice: Invoice\n")
+    assert watcher.poll() == ["shop.orders.billing"]
+    assert "Refund" in out.read_text(encoding="utf-8")
+
+    common = sys.modules["shop.common"].__file__
+    _touch(common, "\nclass Extra(Enum):\n    A = 1\n")
+    assert watcher.poll() == ["shop.common", "shop.orders.models", "shop.orders.billing"]
+    assert out.read_text(encoding="utf-8") == _fresh(package)
+
+    # 语法错误时保留上一次的输出，修复后继续更新
+    before = out.read_text(encoding="utf-8")
+    _touch(common, "\nclass Broken(\n")
+    watcher.poll()
+    assert out.read_text(encoding="utf-8") == before
+    with open(common, encoding="utf-8") as f:
+        source = f.read().replace("\nclass Broken(\n", "\nclass Later(Enum):\n    B = 2\n")
+    with open(common, "w", encoding="utf-8") as f:
+        f.write(source)
+    _touch(common, "")
+    assert "shop.common" in watcher.poll()
+    assert out.read_text(encoding="utf-8") == _fresh(package)
+
+
+def test_watcher_inherited(inherited, tmp_path):
+    """测试修改基类后，在其他模块中继承其字段的子类所在的模块也重新加载，且在基类的模块之后加载"""
+    out = tmp_path / "types.d.ts"
+    watcher = Watcher([inherited], str(out), None)
+    watcher.build()
+
+    _touch(sys.modules["zoo.base"].__file__, "    z: float\n")
+    assert watcher.poll() == ["zoo.base", "zoo.animal"]
+    assert sys.modules["zoo.animal"].Child.__mro__[1] is sys.modules["zoo.base"].Parent
+    assert "z : number;" in out.read_text(encoding="utf-8").split("type Child")[1]
+    assert out.read_text(encoding="utf-8") == _fresh(inherited)